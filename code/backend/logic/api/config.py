@@ -1 +1,10 @@
-BOARD_COUNT = 1
\ No newline at end of file
+from typing import Optional
+from logic.api.entity.capture_profile import CaptureProfile
+
+BOARD_COUNT = 1
+
+# Capture mode negotiated with the webcams of the boards, None keeps the driver defaults
+CAPTURE_PROFILE: Optional[CaptureProfile] = CaptureProfile()
+
+# Detector processes, 0 runs the detectors as threads of the API process
+DETECTOR_PROCESSES = 0
@@ -1,24 +1,32 @@
 import chess
 from fastapi import WebSocket
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional
 from .camera import Camera
+from .frame_source import FrameSource
+from .latency import LatencyRecorder
 
 from logic.machine_learning.utilities.constants import START_FEN
 
 class Board:
   """ Chess board class to handle chess moves and history. """
   
-  def __init__(self, id: int):
+  def __init__(self, id: int, source: Optional[FrameSource] = None, lazy_open: bool = False):
     """ Initialize the chess board object.
     Args:
       id (int): Board ID
+      source (Optional[FrameSource]): Source of the frames, defaults to the webcam with the same ID
+      lazy_open (bool): Defer opening the camera until it is first needed
     """
     self.set_id(id)
-    self.camera = Camera(id)
+    self.camera = Camera(id, source, lazy_open)
     self.move_history: List[str] = []
     self.clients: List[WebSocket] = []
     self.chess_board = chess.Board(START_FEN)
     self.invalid_latched = False
+    self.latency = LatencyRecorder()
+    # Move detection state of map_pieces.score_pieces, per board since boards are scored in parallel
+    self.last_update_time = 0.0
+    self.greedy_move_to_time: Dict[str, float] = {}
     
   def set_id(self, id: int) -> None:
     """ Set the ID of the chess board. 
@@ -67,6 +75,7 @@ class Board:
       self.chess_board.reset()
       self.move_history = []
       self.invalid_latched = False
+      self.greedy_move_to_time = {}
     except Exception:
       return "RESET_FAILED"
     return "RESET"
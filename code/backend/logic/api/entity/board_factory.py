@@ -1,9 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
 from logic.api.entity.board import Board
+from logic.api.entity.camera import CameraDoesNotExistError
+from logic.api.entity.frame_source import FrameSource, CameraFrameSource
+from logic.api.entity.capture_profile import CaptureProfile
 
 class BoardFactory:
   """ Factory class for creating Board objects. """
+
+  def __init__(
+    self,
+    source_factory: Optional[Callable[[int], FrameSource]] = None,
+    capture_profile: Optional[CaptureProfile] = None,
+    lazy_open: bool = False,
+    max_workers: int = 8
+  ):
+    """ Initialize the board factory.
+
+    Args:
+      source_factory (Optional[Callable[[int], FrameSource]]): Creates the frame source of a board from its ID.
+        Defaults to the webcam with the same ID.
+      capture_profile (Optional[CaptureProfile]): Capture mode negotiated with the default webcams
+      lazy_open (bool): Defer opening the cameras until the detector or a viewer first needs them
+      max_workers (int): Number of cameras opened at the same time
+    """
+    self.source_factory = source_factory
+    self.capture_profile = capture_profile
+    self.lazy_open = lazy_open
+    self.max_workers = max_workers
     
-  def create_boards(self, board_count:int) -> dict[int, Board]:
-    """ Create a dictionary of Board objects. """
-    boards = {i: Board(i) for i in range(1, (board_count + 1))}
-    return boards
\ No newline at end of file
+  def create_boards(self, board_count:int, progress_callback: Optional[Callable[[int, int], None]] = None) -> dict[int, Board]:
+    """ Create a dictionary of Board objects, opening their cameras concurrently.
+
+    Args:
+      board_count (int): Number of boards
+      progress_callback (Optional[Callable[[int, int], None]]): Called from a worker thread with the number of
+        boards done and the total each time a board is created
+    Returns:
+      dict[int, Board]: Boards by ID.
+    Raises:
+      CameraDoesNotExistError: If a camera could not be opened. On this or any other error, the cameras that
+        were opened are released.
+    """
+    boards: dict[int, Board] = {}
+    errors: dict[int, Exception] = {}
+    futures = {}
+
+    try:
+      with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, board_count))) as executor:
+        futures = {executor.submit(self._create_board, i): i for i in range(1, (board_count + 1))}
+        for done, future in enumerate(as_completed(futures), start=1):
+          board_id = futures[future]
+          try:
+            boards[board_id] = future.result()
+          except Exception as e:
+            errors[board_id] = e
+          if progress_callback is not None:
+            progress_callback(done, board_count)
+
+      if errors:
+        raise errors[min(errors)]
+    except BaseException:
+      # The executor waited for every board, release the ones that were created
+      for future in futures:
+        if not future.cancelled() and future.exception() is None:
+          future.result().camera.release()
+      raise
+
+    return dict(sorted(boards.items()))
+
+  def _create_board(self, board_id: int) -> Board:
+    """ Create one board, opening its camera unless opening is deferred. """
+    return Board(board_id, self._create_source(board_id), self.lazy_open)
+
+  def _create_source(self, board_id: int) -> Optional[FrameSource]:
+    """ Create the frame source of a board, or None for the default webcam. """
+    if self.source_factory is not None:
+      return self.source_factory(board_id)
+    if self.capture_profile is not None:
+      return CameraFrameSource(board_id, profile=self.capture_profile)
+    return None
@@ -1,19 +1,25 @@
-from typing import Generator
+from typing import Generator, Optional
 from .detector import Detector
-import cv2
+from .frame_grabber import FrameGrabber
+from .frame_broadcaster import FrameBroadcaster
+from .frame_source import FrameSource, CameraFrameSource
 
 class Camera:
   """ Camera class to handle webcam. """
   
-  def __init__(self, cam_id: int):
+  def __init__(self, cam_id: int, source: Optional[FrameSource] = None, lazy_open: bool = False):
     """ Initialize the camera object.
 
     Args:
       cam_id (int): Camera ID
+      source (Optional[FrameSource]): Source of the frames, defaults to the webcam with the same ID
+      lazy_open (bool): Defer opening the source until the detector or a viewer first reads from it
     """
     self.set_cam_id(cam_id)
-    self.set_camera(cv2.VideoCapture(self.cam_id, cv2.CAP_DSHOW))
-    self.detector = Detector(cam_id)
+    self.set_source(source if source is not None else CameraFrameSource(self.cam_id), open_now=not lazy_open)
+    self.grabber = FrameGrabber(self.source)
+    self.broadcaster = FrameBroadcaster(self.grabber)
+    self.detector = Detector(cam_id, self.grabber)
     
   def set_cam_id(self, cam_id: int) -> None:
     """ Set the camera ID.
@@ -31,31 +37,36 @@ class Camera:
     
     self.cam_id = cam_id
     
-  def set_camera(self, camera: cv2.VideoCapture) -> None:
-    """ Set the camera object.
+  def set_source(self, source: FrameSource, open_now: bool = True) -> None:
+    """ Set and open the frame source.
 
     Args:
-        camera (cv2.VideoCapture): Camera object
+      source (FrameSource): Source of the frames
+      open_now (bool): Open the source right away, otherwise the grabber opens it when it starts
+    Raises:
+      TypeError: If the source is not a FrameSource.
+      CameraDoesNotExistError: If the source could not be opened.
     """
-    if not isinstance(camera, cv2.VideoCapture):
-      raise TypeError("Camera must be a cv2.VideoCapture object.")
-    if not camera.isOpened():
-      raise CameraDoesNotExistError(f"Could not open Camera {self.cam_id}.")
+    if not isinstance(source, FrameSource):
+      raise TypeError("Source must be a FrameSource object.")
+    if open_now and not source.is_opened() and not source.open():
+      raise CameraDoesNotExistError(f"Could not open {source.describe()}.")
     
-    self.camera = camera
+    self.source = source
     
   def generate_frames(self) -> Generator[bytes, None, None]:
     """ Generate frames from the laptop webcam.
+    
+    Every viewer shares the same encoded JPEG bytes, so the frame is encoded once no matter how many clients watch.
   
     Yields:
       Generator[bytes, None, None]: Image frames
     """
-    while True:
-      success, frame = self.camera.read()
-      if not success:
-        break
-      _, buffer = cv2.imencode(".jpg", frame)
-      yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
+    return self.broadcaster.stream()
+
+  def release(self) -> None:
+    """ Stop grabbing frames and release the source. """
+    self.grabber.stop()
       
 class CameraDoesNotExistError(Exception):
   """ Custom error class for camera errors. """
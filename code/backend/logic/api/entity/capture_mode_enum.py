@@ -0,0 +1,6 @@
+from enum import Enum
+
+class CaptureModeEnum(Enum):
+  """ Enum class to define how a consumer reads frames from a grabber. """
+  SEQUENTIAL = "sequential"
+  LATEST = "latest"
@@ -0,0 +1,142 @@
+import cv2
+from typing import List, Optional, Tuple
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+# Common webcam modes, cheapest first
+COMMON_RESOLUTIONS: List[Tuple[int, int]] = [
+  (640, 360), (640, 480), (800, 600), (960, 540), (1024, 768), (1280, 720), (1600, 900), (1920, 1080)
+]
+
+# Fraction of the frame width and height a board usually covers, the camera is not zoomed in on the board alone
+DEFAULT_ROI_FRACTION = (0.75, 0.75)
+
+class CaptureProfile:
+  """ Requested capture mode of a camera: resolution, FOURCC, frame rate and driver buffer size. """
+
+  def __init__(
+    self,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    fourcc: str = "MJPG",
+    fps: float = 30.0,
+    buffer_size: int = 1,
+    roi_fraction: Tuple[float, float] = DEFAULT_ROI_FRACTION
+  ):
+    """ Initialize the capture profile.
+
+    Leaving the width or height out makes the profile probe the camera for the cheapest mode
+    that still gives the detector enough pixels on the board.
+
+    Args:
+      width (Optional[int]): Requested frame width, None to probe
+      height (Optional[int]): Requested frame height, None to probe
+      fourcc (str): Requested pixel format, MJPG lets most webcams deliver high FPS over USB 2
+      fps (float): Requested frame rate
+      buffer_size (int): Number of frames the driver may queue, 1 keeps frames fresh
+      roi_fraction (Tuple[float, float]): Expected fraction of the frame width and height covered by the board region
+    """
+    self.set_resolution(width, height)
+    self.set_fourcc(fourcc)
+    self.fps = fps
+    self.buffer_size = buffer_size
+    self.set_roi_fraction(roi_fraction)
+
+  def set_resolution(self, width: Optional[int], height: Optional[int]) -> None:
+    """ Set the requested resolution.
+
+    Args:
+      width (Optional[int]): Frame width, None to probe
+      height (Optional[int]): Frame height, None to probe
+    Raises:
+      ValueError: If only one of width and height is given, or if they are not positive.
+    """
+    if (width is None) != (height is None):
+      raise ValueError("Width and height must both be given or both be left out.")
+    if width is not None and (width < 1 or height < 1):
+      raise ValueError("Width and height must be positive integers.")
+
+    self.width = width
+    self.height = height
+
+  def set_roi_fraction(self, roi_fraction: Tuple[float, float]) -> None:
+    """ Set the expected fraction of the frame covered by the board region.
+
+    Args:
+      roi_fraction (Tuple[float, float]): Fraction of the frame width and height
+    Raises:
+      ValueError: If a fraction is not in (0, 1].
+    """
+    if not all(0 < fraction <= 1 for fraction in roi_fraction):
+      raise ValueError("ROI fractions must be greater than 0 and at most 1.")
+
+    self.roi_fraction = tuple(roi_fraction)
+
+  def set_fourcc(self, fourcc: str) -> None:
+    """ Set the requested pixel format.
+
+    Args:
+      fourcc (str): Four character code, e.g. "MJPG" or "YUYV"
+    Raises:
+      ValueError: If the code is not four characters long.
+    """
+    if not isinstance(fourcc, str) or len(fourcc) != 4:
+      raise ValueError("FOURCC must be a string of four characters.")
+
+    self.fourcc = fourcc
+
+  def is_auto(self) -> bool:
+    """ Check if the resolution should be probed. """
+    return self.width is None
+
+  def has_enough_pixels(self, width: int, height: int) -> bool:
+    """ Check if a frame size gives the detector at least its input size on the board region.
+
+    Args:
+      width (int): Frame width
+      height (int): Frame height
+    """
+    return width * self.roi_fraction[0] >= MODEL_WIDTH and height * self.roi_fraction[1] >= MODEL_HEIGHT
+
+  def negotiate(self, capture: cv2.VideoCapture) -> dict:
+    """ Apply the profile to an opened capture, probing for a resolution if needed.
+
+    Args:
+      capture (cv2.VideoCapture): Opened capture device
+    Returns:
+      dict: The mode the driver actually delivers.
+    """
+    if not self.is_auto():
+      return self._apply(capture, self.width, self.height)
+
+    largest = None
+    for width, height in COMMON_RESOLUTIONS:
+      mode = self._apply(capture, width, height)
+      if largest is None or mode["width"] * mode["height"] > largest[0] * largest[1]:
+        largest = (mode["width"], mode["height"])
+      if not self.has_enough_pixels(mode["width"], mode["height"]):
+        continue
+      if mode["fps"] and mode["fps"] < 0.9 * self.fps:
+        continue
+      success, _ = capture.read()
+      if success:
+        return mode
+
+    # Nothing matched, fall back to the largest mode the driver accepted
+    return self._apply(capture, *largest)
+
+  def _apply(self, capture: cv2.VideoCapture, width: int, height: int) -> dict:
+    """ Request a mode and read back what the driver chose. """
+    capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    capture.set(cv2.CAP_PROP_FPS, self.fps)
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+    fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+    return {
+      "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+      "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+      "fps": capture.get(cv2.CAP_PROP_FPS),
+      "fourcc": "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc > 0 else "",
+      "buffer_size": int(capture.get(cv2.CAP_PROP_BUFFERSIZE))
+    }
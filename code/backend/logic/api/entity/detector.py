@@ -1,10 +1,17 @@
+import threading
 from logic.machine_learning.run_video import prepare_to_run_video
-import cv2
+from typing import Optional
+from .frame_grabber import FrameGrabber, FrameReader
+from .capture_mode_enum import CaptureModeEnum
 
 class Detector:
-  def __init__(self, id: int):
+  def __init__(self, id: int, grabber: FrameGrabber):
     """Class to handle video processing for chessboard detection."""
     self.set_id(id)
+    self.grabber = grabber
+    self.reader: Optional[FrameReader] = None
+    # Set once the models are loaded and warmed up, in a detector process too
+    self.ready = threading.Event()
     
   def set_id(self, id: int) -> None:
     """ Set the ID of the detector. 
@@ -23,6 +30,13 @@ class Detector:
     self.id = id
     
   async def run(self) -> None:
-    detector_cap = cv2.VideoCapture(self.id, cv2.CAP_DSHOW)
-    await prepare_to_run_video(self.id, detector_cap)
+    """ Run the detector on the newest frames shared by the board's grabber. """
+    self.reader = self.grabber.reader(CaptureModeEnum.LATEST)
+    await prepare_to_run_video(self.id, self.reader, self.ready.set)
+
+  def get_frame_stats(self) -> dict[str, int]:
+    """ Get the number of frames captured, processed and dropped for this detector. """
+    if self.reader is None:
+      return {"captured": self.grabber.sequence, "read": 0, "dropped": 0}
+    return self.reader.get_stats()
     
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+import cv2
+from typing import Generator, Optional, Tuple
+from .capture_mode_enum import CaptureModeEnum
+from .frame_grabber import FrameGrabber
+
+class FrameBroadcaster:
+  """ Encodes each grabbed frame once and shares the JPEG bytes with every viewer of a board. """
+
+  def __init__(self, grabber: FrameGrabber):
+    """ Initialize the frame broadcaster.
+
+    Args:
+      grabber (FrameGrabber): Grabber providing the frames to encode
+    """
+    self.grabber = grabber
+    self.condition = threading.Condition()
+    self.viewers = 0
+    self.sequence = 0
+    self.chunk: Optional[bytes] = None
+    self.ended = False
+    self.thread: Optional[threading.Thread] = None
+
+  def get_viewer_count(self) -> int:
+    """ Get the number of clients currently streaming the board. """
+    return self.viewers
+
+  def stream(self) -> Generator[bytes, None, None]:
+    """ Stream the shared multipart JPEG chunks to one viewer.
+
+    Yields:
+      Generator[bytes, None, None]: Image frames
+    """
+    self._add_viewer()
+    try:
+      last_sequence = 0
+      while True:
+        last_sequence, chunk = self._wait_for_chunk(last_sequence)
+        if chunk is None:
+          break
+        yield chunk
+    finally:
+      self._remove_viewer()
+
+  def _add_viewer(self) -> None:
+    """ Register a viewer and start encoding if it is the first one. """
+    with self.condition:
+      self.viewers += 1
+      if self.thread is None:
+        # The stream of a stopped camera may have ended, the new encoder starts it again
+        self.ended = False
+        self.chunk = None
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.thread.start()
+
+  def _remove_viewer(self) -> None:
+    """ Unregister a viewer. The encoder stops by itself once nobody is watching. """
+    with self.condition:
+      self.viewers -= 1
+
+  def _wait_for_chunk(self, last_sequence: int) -> Tuple[int, Optional[bytes]]:
+    """ Wait for a chunk newer than the one the viewer has already sent.
+
+    Args:
+      last_sequence (int): Sequence number of the last chunk sent to the viewer
+    Returns:
+      Tuple[int, Optional[bytes]]: Sequence number and chunk, or (last_sequence, None) if the stream ended.
+    """
+    with self.condition:
+      self.condition.wait_for(lambda: (self.sequence > last_sequence and self.chunk is not None) or self.ended)
+      if self.ended:
+        return last_sequence, None
+      return self.sequence, self.chunk
+
+  def _encode_loop(self) -> None:
+    """ Encode frames from the grabber for as long as the board has viewers. An encoder slower than the
+    camera skips to the newest frame instead of falling behind. """
+    reader = self.grabber.reader(CaptureModeEnum.LATEST)
+    try:
+      while True:
+        with self.condition:
+          if self.viewers == 0:
+            self.chunk = None
+            self.thread = None
+            return
+
+        success, frame = reader.read(timeout=1.0)
+        if not success:
+          if reader.is_opened():
+            continue
+          with self.condition:
+            self.ended = True
+            self.thread = None
+            self.condition.notify_all()
+          return
+
+        _, buffer = cv2.imencode(".jpg", frame)
+        chunk = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n"
+
+        with self.condition:
+          self.sequence += 1
+          self.chunk = chunk
+          self.condition.notify_all()
+    finally:
+      reader.release()
@@ -0,0 +1,221 @@
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from .capture_mode_enum import CaptureModeEnum
+from .frame_source import FrameSource
+from .shared_frame_ring import SharedFrameRing
+
+class FrameGrabber:
+  """ Grabber thread that owns a camera device and shares its frames with several consumers. """
+
+  def __init__(self, capture: FrameSource, buffer_size: int = 4):
+    """ Initialize the frame grabber.
+
+    Args:
+      capture (FrameSource): Frame source, owned by the grabber from now on. A closed source is opened on start
+      buffer_size (int): Number of decoded frames kept in the ring buffer
+    """
+    self.set_buffer_size(buffer_size)
+    self.capture = capture
+    self.frames: Deque[Tuple[int, np.ndarray, float]] = deque(maxlen=self.buffer_size)
+    self.sequence = 0
+    self.condition = threading.Condition()
+    self.running = False
+    self.thread: Optional[threading.Thread] = None
+    self.rings: List[SharedFrameRing] = []
+    self.rings_lock = threading.Lock()
+
+  def set_buffer_size(self, buffer_size: int) -> None:
+    """ Set the size of the ring buffer.
+
+    Args:
+      buffer_size (int): Number of frames kept in the ring buffer
+    Raises:
+      TypeError: If the buffer size is not an integer.
+      ValueError: If the buffer size is not a positive integer.
+    """
+    if not isinstance(buffer_size, int):
+      raise TypeError("Buffer size must be an integer.")
+    if buffer_size < 1:
+      raise ValueError("Buffer size must be a positive integer.")
+
+    self.buffer_size = buffer_size
+
+  def start(self) -> bool:
+    """ Start the grabber thread if it is not already running, opening the source first if it is closed.
+
+    Returns:
+      bool: True if the grabber is running, False if the source could not be opened.
+    """
+    with self.condition:
+      if self.running:
+        return True
+      if not self.capture.is_opened() and not self.capture.open():
+        return False
+      self.running = True
+
+    self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+    self.thread.start()
+    return True
+
+  def stop(self) -> None:
+    """ Stop the grabber thread and release the capture device. """
+    with self.condition:
+      self.running = False
+      self.condition.notify_all()
+
+    if self.thread is not None and self.thread is not threading.current_thread():
+      self.thread.join()
+    self.capture.release()
+
+  def attach_ring(self, ring: SharedFrameRing) -> None:
+    """ Also write every grabbed frame into a shared memory ring, for consumers in other processes.
+
+    Args:
+      ring (SharedFrameRing): Ring to write into, frames are written before readers are notified of them
+    """
+    with self.rings_lock:
+      self.rings.append(ring)
+
+  def detach_ring(self, ring: SharedFrameRing) -> None:
+    """ Stop writing frames into a ring.
+
+    Args:
+      ring (SharedFrameRing): Ring attached with attach_ring, it may be freed once this returns
+    """
+    with self.rings_lock:
+      self.rings = [attached for attached in self.rings if attached is not ring]
+
+  def is_running(self) -> bool:
+    """ Check if the grabber thread is running. """
+    return self.running
+
+  def _grab_loop(self) -> None:
+    """ Read frames from the device until stopped or the device fails. """
+    while self.running:
+      success, frame = self.capture.read()
+      capture_time = time.time()
+
+      # Only this thread advances the sequence, the copy into the rings does not hold up the readers
+      if success:
+        with self.rings_lock:
+          for ring in self.rings:
+            ring.write(frame, self.sequence + 1, capture_time)
+
+      with self.condition:
+        if not success:
+          self.running = False
+          self.condition.notify_all()
+          break
+
+        self.sequence += 1
+        self.frames.append((self.sequence, frame, capture_time))
+        self.condition.notify_all()
+
+  def read_after(self, last_sequence: int, timeout: Optional[float] = None, latest: bool = False) -> Tuple[int, Optional[np.ndarray], float]:
+    """ Wait for a buffered frame newer than the given sequence number.
+
+    Frames are shared between all consumers and must not be modified in place.
+
+    Args:
+      last_sequence (int): Sequence number of the last frame the consumer has seen
+      timeout (Optional[float]): Maximum number of seconds to wait, or None to wait forever
+      latest (bool): Return the newest frame instead of the oldest unseen one
+    Returns:
+      Tuple[int, Optional[np.ndarray], float]: Sequence number, frame and capture time (time.time()),
+        or (last_sequence, None, 0.0) if the grabber stopped or timed out.
+    """
+    with self.condition:
+      available = self.condition.wait_for(
+        lambda: self.sequence > last_sequence or not self.running,
+        timeout
+      )
+      if not available or self.sequence <= last_sequence:
+        return last_sequence, None, 0.0
+
+      if latest:
+        return self.frames[-1]
+
+      for sequence, frame, capture_time in self.frames:
+        if sequence > last_sequence:
+          return sequence, frame, capture_time
+
+    return last_sequence, None, 0.0
+
+  def reader(self, mode: CaptureModeEnum = CaptureModeEnum.SEQUENTIAL) -> "FrameReader":
+    """ Create a new consumer of the grabbed frames, starting the grabber if needed.
+
+    If the source cannot be opened the reader is returned closed, see FrameReader.is_opened.
+
+    Args:
+      mode (CaptureModeEnum): How the consumer reads frames from the ring buffer
+    """
+    self.start()
+    return FrameReader(self, mode)
+
+class FrameReader:
+  """ Consumer handle that reads frames from a shared FrameGrabber. """
+
+  def __init__(self, grabber: FrameGrabber, mode: CaptureModeEnum = CaptureModeEnum.SEQUENTIAL):
+    """ Initialize the frame reader.
+
+    In SEQUENTIAL mode the reader gets every buffered frame in order. In LATEST mode it always
+    gets the newest frame and stale frames are dropped, which keeps a slow consumer from working
+    on old frames.
+
+    Args:
+      grabber (FrameGrabber): Grabber to read frames from
+      mode (CaptureModeEnum): How the reader consumes the ring buffer
+    """
+    self.grabber = grabber
+    self.mode = mode
+    self.last_sequence = grabber.sequence
+    self.frames_read = 0
+    self.frames_dropped = 0
+    self.last_capture_time = 0.0
+    self.released = False
+
+  def is_opened(self) -> bool:
+    """ Check if the reader can still deliver frames. """
+    return not self.released and self.grabber.is_running()
+
+  def read(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray]]:
+    """ Read the next frame from the grabber. Its capture time is kept in `last_capture_time`.
+
+    Args:
+      timeout (Optional[float]): Maximum number of seconds to wait, or None to wait forever
+    Returns:
+      Tuple[bool, Optional[np.ndarray]]: Success flag and the frame.
+    """
+    if self.released:
+      return False, None
+
+    sequence, frame, capture_time = self.grabber.read_after(
+      self.last_sequence, timeout, latest=self.mode == CaptureModeEnum.LATEST
+    )
+    if frame is None:
+      return False, None
+
+    self.frames_dropped += sequence - self.last_sequence - 1
+    self.frames_read += 1
+    self.last_sequence = sequence
+    self.last_capture_time = capture_time
+    return True, frame
+
+  def get_stats(self) -> dict[str, int]:
+    """ Get the frame counters of the reader.
+
+    Returns:
+      dict[str, int]: Number of frames captured by the grabber, read and dropped by this reader.
+    """
+    return {
+      "captured": self.grabber.sequence,
+      "read": self.frames_read,
+      "dropped": self.frames_dropped
+    }
+
+  def release(self) -> None:
+    """ Stop reading frames. The device stays open for the other consumers. """
+    self.released = True
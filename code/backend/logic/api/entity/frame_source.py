@@ -0,0 +1,140 @@
+import time
+import cv2
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from .capture_profile import CaptureProfile
+
+class FrameSource(ABC):
+  """ Abstract source of video frames for a board. """
+
+  @abstractmethod
+  def open(self) -> bool:
+    """ Open the source.
+
+    Returns:
+      bool: True if the source was opened.
+    """
+
+  @abstractmethod
+  def is_opened(self) -> bool:
+    """ Check if the source is open. """
+
+  @abstractmethod
+  def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    """ Read the next frame, blocking until it is available.
+
+    Returns:
+      Tuple[bool, Optional[np.ndarray]]: Success flag and the frame in BGR format.
+    """
+
+  @abstractmethod
+  def release(self) -> None:
+    """ Release the source. """
+
+  def describe(self) -> str:
+    """ Get a human readable description of the source. """
+    return type(self).__name__
+
+  def get_mode(self) -> dict:
+    """ Get the capture mode of the source, if it has one. """
+    return {}
+
+class CameraFrameSource(FrameSource):
+  """ Frame source reading from a live webcam. """
+
+  def __init__(self, cam_id: int, api_preference: int = cv2.CAP_DSHOW, profile: Optional[CaptureProfile] = None):
+    """ Initialize the camera frame source.
+
+    Args:
+      cam_id (int): Device index of the camera
+      api_preference (int): OpenCV capture backend
+      profile (Optional[CaptureProfile]): Capture mode to negotiate, None keeps the driver default
+    """
+    self.cam_id = cam_id
+    self.api_preference = api_preference
+    self.profile = profile
+    self.capture: Optional[cv2.VideoCapture] = None
+    self.mode: dict = {}
+
+  def open(self) -> bool:
+    self.capture = cv2.VideoCapture(self.cam_id, self.api_preference)
+    if not self.capture.isOpened():
+      return False
+    if self.profile is not None:
+      self.mode = self.profile.negotiate(self.capture)
+    return True
+
+  def is_opened(self) -> bool:
+    return self.capture is not None and self.capture.isOpened()
+
+  def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    if self.capture is None:
+      return False, None
+    return self.capture.read()
+
+  def release(self) -> None:
+    if self.capture is not None:
+      self.capture.release()
+
+  def describe(self) -> str:
+    return f"Camera {self.cam_id}"
+
+  def get_mode(self) -> dict:
+    return self.mode
+
+class VideoFileFrameSource(FrameSource):
+  """ Frame source replaying a recorded video file. """
+
+  def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+    """ Initialize the video file frame source.
+
+    Args:
+      path (str): Path to the video file
+      realtime (bool): Pace frames at the recorded FPS like a live camera, otherwise read as fast as possible
+      loop (bool): Restart from the first frame when the end of the file is reached
+    """
+    self.path = path
+    self.realtime = realtime
+    self.loop = loop
+    self.capture: Optional[cv2.VideoCapture] = None
+    self.fps = 0.0
+    self.start_time = 0.0
+    self.frame_index = 0
+
+  def open(self) -> bool:
+    self.capture = cv2.VideoCapture(self.path)
+    self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+    self.start_time = time.perf_counter()
+    self.frame_index = 0
+    return self.capture.isOpened()
+
+  def is_opened(self) -> bool:
+    return self.capture is not None and self.capture.isOpened()
+
+  def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    if self.capture is None:
+      return False, None
+
+    success, frame = self.capture.read()
+    if not success and self.loop and self.frame_index > 0:
+      self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+      success, frame = self.capture.read()
+    if not success:
+      return False, None
+
+    if self.realtime:
+      due = self.start_time + self.frame_index / self.fps
+      delay = due - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+    self.frame_index += 1
+
+    return True, frame
+
+  def release(self) -> None:
+    if self.capture is not None:
+      self.capture.release()
+
+  def describe(self) -> str:
+    return f"Video {self.path}"
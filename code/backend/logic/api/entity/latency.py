@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Upper bounds of the histogram buckets in milliseconds, the last bucket is unbounded
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+class LatencyTrace:
+  """ Timestamps of one frame on its way from the camera to the clients. """
+
+  def __init__(self, capture_time: Optional[float] = None):
+    """ Initialize the trace.
+
+    Args:
+      capture_time (Optional[float]): Time the frame was captured (time.time()), defaults to now
+    """
+    self.capture_time = time.time() if capture_time is None else capture_time
+    self.last_mark = self.capture_time
+    self.stages: Dict[str, float] = {}
+
+  def mark(self, stage: str) -> None:
+    """ End a stage. Its duration is the time since the previous mark, or since capture for the first one.
+
+    Args:
+      stage (str): Name of the stage
+    """
+    now = time.time()
+    self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last_mark
+    self.last_mark = now
+
+  def elapsed(self) -> float:
+    """ Get the time in seconds from capture to the last mark. """
+    return self.last_mark - self.capture_time
+
+class LatencyHistogram:
+  """ Histogram of durations with fixed millisecond buckets. """
+
+  def __init__(self):
+    self.counts: List[int] = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+    self.count = 0
+    self.total = 0.0
+    self.max = 0.0
+
+  def record(self, seconds: float) -> None:
+    """ Add a duration to the histogram.
+
+    Args:
+      seconds (float): Duration in seconds
+    """
+    milliseconds = seconds * 1000
+    self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+    self.count += 1
+    self.total += milliseconds
+    self.max = max(self.max, milliseconds)
+
+  def percentile(self, fraction: float) -> float:
+    """ Estimate a percentile as the upper bound of the bucket it falls in.
+
+    Args:
+      fraction (float): Percentile between 0 and 1
+    Returns:
+      float: Upper bound in milliseconds, or the maximum for the unbounded bucket.
+    """
+    if self.count == 0:
+      return 0.0
+    rank = fraction * self.count
+    seen = 0
+    for i, count in enumerate(self.counts):
+      seen += count
+      if seen >= rank and count > 0:
+        return float(BUCKET_BOUNDS_MS[i]) if i < len(BUCKET_BOUNDS_MS) else self.max
+    return self.max
+
+  def to_dict(self) -> dict:
+    """ Summarize the histogram. """
+    labels = [f"<={bound}ms" for bound in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}ms"]
+    return {
+      "count": self.count,
+      "mean_ms": self.total / self.count if self.count else 0.0,
+      "p50_ms": self.percentile(0.5),
+      "p95_ms": self.percentile(0.95),
+      "max_ms": self.max,
+      "buckets": {label: count for label, count in zip(labels, self.counts) if count}
+    }
+
+class LatencyRecorder:
+  """ Latency histograms of one board, per stage of the detection pipeline. """
+
+  def __init__(self):
+    self.histograms: Dict[str, LatencyHistogram] = {}
+    self.lock = threading.Lock()
+
+  def record(self, trace: LatencyTrace, total_name: str, total_seconds: Optional[float] = None) -> None:
+    """ Add the stages of a finished trace and its total duration.
+
+    Args:
+      trace (LatencyTrace): The finished trace
+      total_name (str): Name of the histogram for the capture-to-end duration, e.g. "frame" or "move"
+      total_seconds (Optional[float]): Total duration if it ended before the last mark, defaults to trace.elapsed()
+    """
+    with self.lock:
+      for stage, seconds in trace.stages.items():
+        self.histograms.setdefault(stage, LatencyHistogram()).record(seconds)
+      self.histograms.setdefault(total_name, LatencyHistogram()).record(
+        trace.elapsed() if total_seconds is None else total_seconds
+      )
+
+  def record_total(self, total_name: str, seconds: float) -> None:
+    """ Add a duration to a single histogram, e.g. the "move" total of a trace already recorded as a frame.
+
+    Args:
+      total_name (str): Name of the histogram
+      seconds (float): Duration in seconds
+    """
+    with self.lock:
+      self.histograms.setdefault(total_name, LatencyHistogram()).record(seconds)
+
+  def reset(self) -> None:
+    """ Clear all histograms. """
+    with self.lock:
+      self.histograms = {}
+
+  def to_dict(self) -> Dict[str, dict]:
+    """ Summarize all histograms. """
+    with self.lock:
+      return {name: histogram.to_dict() for name, histogram in self.histograms.items()}
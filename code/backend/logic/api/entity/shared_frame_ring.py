@@ -0,0 +1,142 @@
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+class FrameOverwrittenError(Exception):
+  """ Raised when the ring slot of a frame was written again while the frame was in use. """
+
+  def __init__(self, sequence: int):
+    super().__init__(f"Frame {sequence} was overwritten in its ring slot while in use.")
+    self.sequence = sequence
+
+class RingFrame(np.ndarray):
+  """ View of a frame in a SharedFrameRing that can tell if the writer has come around to its slot since.
+
+  Crops and other arrays made from the frame keep the check, which is stricter than needed for copies.
+  """
+
+  sequences: Optional[np.ndarray] = None
+  sequence = 0
+
+  def __array_finalize__(self, obj) -> None:
+    self.sequences = getattr(obj, "sequences", None)
+    self.sequence = getattr(obj, "sequence", 0)
+
+  def is_current(self) -> bool:
+    """ Check if the slot still holds the frame, i.e. the view was not overwritten while in use. """
+    return self.sequences is None or self.sequences[self.sequence % self.sequences.size] == self.sequence
+
+class SharedFrameRing:
+  """ Fixed-size ring of frames in shared memory, written by a board's grabber and read by detector processes.
+
+  Every slot holds a frame with its sequence number and capture time. A slot's sequence number is cleared
+  while the frame is written, so readers can tell a complete frame from one being overwritten. Reads are
+  RingFrame views into the shared memory, not copies: a reader must be done with a frame before the writer
+  comes around to its slot again, i.e. within slots - 1 frame intervals, see RingFrame.is_current.
+  """
+
+  def __init__(self, shape: Tuple[int, ...], slots: int = 8, name: Optional[str] = None):
+    """ Create a ring, or attach to an existing one by name.
+
+    Args:
+      shape (Tuple[int, ...]): Shape of the uint8 frames, e.g. (480, 640, 3)
+      slots (int): Number of frames in the ring
+      name (Optional[str]): Name of the shared memory of an existing ring, None to create a new one
+    Raises:
+      ValueError: If the number of slots is less than two.
+    """
+    if not isinstance(slots, int) or slots < 2:
+      raise ValueError("A ring needs at least two slots.")
+
+    self.shape = tuple(shape)
+    self.slots = slots
+    frame_bytes = int(np.prod(self.shape))
+    header_bytes = 8 * (2 * slots + 1)
+    self.owner = name is None
+    self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=header_bytes + slots * frame_bytes)
+
+    # Every array of the ring is a view of one buffer array, so close can tell if frames are still in use
+    self.buffer = np.ndarray((header_bytes + slots * frame_bytes,), dtype=np.uint8, buffer=self.memory.buf)
+    self.sequences = self.buffer[:8 * slots].view(np.int64)
+    self.capture_times = self.buffer[8 * slots:16 * slots].view(np.float64)
+    self.head = self.buffer[16 * slots:header_bytes].view(np.int64)
+    self.frames = self.buffer[header_bytes:].reshape((slots, *self.shape))
+    if self.owner:
+      self.sequences[:] = 0
+      self.head[0] = 0
+
+  @classmethod
+  def attach(cls, name: str, shape: Tuple[int, ...], slots: int) -> "SharedFrameRing":
+    """ Attach to the ring described by get_spec, e.g. in a detector process. """
+    return cls(shape, slots, name)
+
+  def get_spec(self) -> dict:
+    """ Get what another process needs to attach to this ring. """
+    return {"name": self.memory.name, "shape": self.shape, "slots": self.slots}
+
+  def write(self, frame: np.ndarray, sequence: int, capture_time: float) -> bool:
+    """ Copy a frame into its slot.
+
+    Args:
+      frame (np.ndarray): The frame
+      sequence (int): Sequence number of the frame, positive and increasing
+      capture_time (float): Time the frame was captured (time.time())
+    Returns:
+      bool: False if the frame does not have the shape of the ring and was not written.
+    """
+    if frame.shape != self.shape:
+      return False
+
+    slot = sequence % self.slots
+    self.sequences[slot] = 0
+    self.frames[slot] = frame
+    self.capture_times[slot] = capture_time
+    self.sequences[slot] = sequence
+    self.head[0] = sequence
+    return True
+
+  def read(self, sequence: int) -> Tuple[Optional[np.ndarray], float]:
+    """ Get a frame by its sequence number.
+
+    Args:
+      sequence (int): Sequence number of the frame
+    Returns:
+      Tuple[Optional[RingFrame], float]: View of the frame and its capture time, or (None, 0.0) if the slot
+        no longer holds that frame.
+    """
+    slot = sequence % self.slots
+    if sequence < 1 or self.sequences[slot] != sequence:
+      return None, 0.0
+    frame = self.frames[slot].view(RingFrame)
+    frame.sequences = self.sequences
+    frame.sequence = sequence
+    return frame, float(self.capture_times[slot])
+
+  def is_current(self, sequence: int) -> bool:
+    """ Check if a frame that was read is still in its slot, i.e. the view was not overwritten while in use. """
+    return self.sequences[sequence % self.slots] == sequence
+
+  def get_latest_sequence(self) -> int:
+    """ Get the sequence number of the newest frame, 0 if none was written. """
+    return int(self.head[0])
+
+  def close(self) -> None:
+    """ Detach from the shared memory.
+
+    Raises:
+      BufferError: If frames returned by read are still in use, close again once they are gone.
+    """
+    self.sequences = self.capture_times = self.head = self.frames = None
+    # Arrays do not hold an export of the shared memory, only a reference: closing the memory under them
+    # would crash the next access to a frame instead of raising
+    if self.buffer is not None and sys.getrefcount(self.buffer) > 2:
+      raise BufferError("Frames of the ring are still in use.")
+    self.buffer = None
+    self.memory.close()
+
+  def unlink(self) -> None:
+    """ Close the ring and free the shared memory. Only the process that created the ring should call this. """
+    self.close()
+    if self.owner:
+      self.memory.unlink()
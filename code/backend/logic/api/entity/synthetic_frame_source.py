@@ -0,0 +1,211 @@
+import time
+import chess
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from .frame_source import FrameSource
+from logic.machine_learning.utilities.constants import START_FEN
+
+SQUARE_PIXELS = 64
+LIGHT_SQUARE = (181, 217, 240)
+DARK_SQUARE = (99, 136, 181)
+TABLE_COLOR = (60, 70, 80)
+HAND_COLOR = (120, 150, 205)
+
+class SyntheticFrameSource(FrameSource):
+  """ Virtual camera rendering a chess game from a move list, for load testing without webcams. """
+
+  def __init__(
+    self,
+    moves: List[str],
+    start_fen: str = START_FEN,
+    resolution: Tuple[int, int] = (640, 480),
+    fps: float = 30.0,
+    move_interval: float = 3.0,
+    perspective: float = 0.25,
+    noise: float = 4.0,
+    hand_duration: float = 0.8,
+    realtime: bool = True,
+    loop: bool = True,
+    seed: int = 0,
+    on_restart: Optional[Callable[[], None]] = None
+  ):
+    """ Initialize the synthetic frame source.
+
+    Args:
+      moves (List[str]): Moves in SAN format played one after another
+      start_fen (str): Starting position
+      resolution (Tuple[int, int]): Frame width and height
+      fps (float): Frame rate of the virtual camera
+      move_interval (float): Seconds between two moves
+      perspective (float): How much narrower the far edge of the board is, 0 for a top-down view
+      noise (float): Standard deviation of the sensor noise in gray levels
+      hand_duration (float): Seconds a hand covers the board around each move, 0 to disable occlusion
+      realtime (bool): Pace frames at the given FPS, otherwise render as fast as possible
+      loop (bool): Restart the game after the last move
+      seed (int): Seed of the noise generator
+      on_restart (Optional[Callable[[], None]]): Called before the game restarts from the starting position,
+        e.g. to reset the board through BoardService.reset_game so the detector does not see an illegal jump
+    """
+    self.moves = moves
+    self.start_fen = start_fen
+    self.width, self.height = resolution
+    self.fps = fps
+    self.move_interval = move_interval
+    self.perspective = perspective
+    self.noise = noise
+    self.hand_duration = hand_duration
+    self.realtime = realtime
+    self.loop = loop
+    self.on_restart = on_restart
+    self.rng = np.random.default_rng(seed)
+
+    self.opened = False
+    self.frame_index = 0
+    self.rounds = 0
+    self.start_time = 0.0
+    self.positions: List[np.ndarray] = []
+    self.move_squares: List[Tuple[int, int]] = []
+    self.move_times: Dict[int, float] = {}
+    self.noise_tiles: List[np.ndarray] = []
+    self.homography: Optional[np.ndarray] = None
+
+  def open(self) -> bool:
+    self.homography = self._get_homography()
+    self.positions, self.move_squares = self._render_positions()
+    self.noise_tiles = [
+      self.rng.normal(0, self.noise, (self.height, self.width, 3)).astype(np.int16)
+      for _ in range(8)
+    ] if self.noise > 0 else []
+    self.frame_index = 0
+    self.rounds = 0
+    self.move_times = {}
+    self.start_time = time.perf_counter()
+    self.opened = True
+    return True
+
+  def is_opened(self) -> bool:
+    return self.opened
+
+  def release(self) -> None:
+    self.opened = False
+
+  def describe(self) -> str:
+    return f"Synthetic board ({len(self.moves)} moves)"
+
+  def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    if not self.opened:
+      return False, None
+
+    if self.realtime:
+      delay = self.start_time + self.frame_index / self.fps - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+
+    game_time = self.frame_index / self.fps
+    self.frame_index += 1
+
+    ply = int(game_time // self.move_interval)
+    if self.loop:
+      game_round, ply = divmod(ply, len(self.positions))
+      if game_round > self.rounds:
+        # Reset before the starting position is shown, the board's history is cleared by then
+        if self.on_restart is not None:
+          self.on_restart()
+        self.rounds = game_round
+    elif ply >= len(self.positions):
+      return False, None
+
+    played = self.rounds * len(self.moves) + ply
+    if ply > 0 and played not in self.move_times:
+      self.move_times[played] = time.time()
+
+    frame = self.positions[ply]
+    if self.noise_tiles:
+      tile = self.noise_tiles[self.frame_index % len(self.noise_tiles)]
+      frame = np.clip(frame + tile, 0, 255).astype(np.uint8)
+    else:
+      frame = frame.copy()
+
+    self._draw_hand(frame, ply, game_time % self.move_interval)
+    return True, frame
+
+  def get_move_times(self) -> Dict[int, float]:
+    """ Get the wall-clock time at which each ply (1-based, counted on across restarts) first appeared on the board. """
+    return dict(self.move_times)
+
+  def _get_homography(self) -> np.ndarray:
+    """ Compute the homography from the top-down board image to the camera frame. """
+    board_pixels = 8 * SQUARE_PIXELS
+    board_height = 0.8 * self.height
+    near_width = min(board_height * 1.2, 0.9 * self.width)
+    far_width = near_width * (1 - self.perspective)
+    cx = self.width / 2
+    top = (self.height - board_height) / 2
+    bottom = top + board_height
+
+    source = np.float32([[0, 0], [board_pixels, 0], [board_pixels, board_pixels], [0, board_pixels]])
+    target = np.float32([
+      [cx - far_width / 2, top], [cx + far_width / 2, top],
+      [cx + near_width / 2, bottom], [cx - near_width / 2, bottom]
+    ])
+    return cv2.getPerspectiveTransform(source, target)
+
+  def _render_positions(self) -> Tuple[List[np.ndarray], List[Tuple[int, int]]]:
+    """ Render the camera frame of every position in the game once. """
+    board = chess.Board(self.start_fen)
+    positions = [self._render_board(board)]
+    move_squares = [(0, 0)]
+
+    for san in self.moves:
+      move = board.parse_san(san)
+      move_squares.append((move.from_square, move.to_square))
+      board.push(move)
+      positions.append(self._render_board(board))
+
+    return positions, move_squares
+
+  def _render_board(self, board: chess.Board) -> np.ndarray:
+    """ Render one position, warped into the camera perspective. """
+    top_down = np.zeros((8 * SQUARE_PIXELS, 8 * SQUARE_PIXELS, 3), dtype=np.uint8)
+
+    for square in chess.SQUARES:
+      x, y = self._square_origin(square)
+      light = (chess.square_file(square) + chess.square_rank(square)) % 2 == 1
+      cv2.rectangle(top_down, (x, y), (x + SQUARE_PIXELS, y + SQUARE_PIXELS), LIGHT_SQUARE if light else DARK_SQUARE, -1)
+
+      piece = board.piece_at(square)
+      if piece is None:
+        continue
+      center = (x + SQUARE_PIXELS // 2, y + SQUARE_PIXELS // 2)
+      fill, outline = ((235, 235, 235), (30, 30, 30)) if piece.color == chess.WHITE else ((30, 30, 30), (235, 235, 235))
+      cv2.circle(top_down, center, SQUARE_PIXELS * 3 // 8, fill, -1, cv2.LINE_AA)
+      cv2.circle(top_down, center, SQUARE_PIXELS * 3 // 8, outline, 2, cv2.LINE_AA)
+      cv2.putText(top_down, piece.symbol().upper(), (center[0] - 10, center[1] + 10),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.9, outline, 2, cv2.LINE_AA)
+
+    return cv2.warpPerspective(
+      top_down, self.homography, (self.width, self.height),
+      borderMode=cv2.BORDER_CONSTANT, borderValue=TABLE_COLOR
+    ).astype(np.int16 if self.noise > 0 else np.uint8)
+
+  def _square_origin(self, square: int) -> Tuple[int, int]:
+    """ Top-left pixel of a square in the top-down image, with white at the bottom. """
+    return chess.square_file(square) * SQUARE_PIXELS, (7 - chess.square_rank(square)) * SQUARE_PIXELS
+
+  def _draw_hand(self, frame: np.ndarray, ply: int, time_in_ply: float) -> None:
+    """ Draw a hand over the squares of the last move during the first part of the ply. """
+    if self.hand_duration <= 0 or ply == 0 or time_in_ply > self.hand_duration:
+      return
+
+    from_square, to_square = self.move_squares[ply]
+    progress = time_in_ply / self.hand_duration
+    (fx, fy), (tx, ty) = self._square_origin(from_square), self._square_origin(to_square)
+    x = fx + (tx - fx) * progress + SQUARE_PIXELS / 2
+    y = fy + (ty - fy) * progress + SQUARE_PIXELS / 2
+
+    # Hand over the square and arm reaching in from the bottom of the frame
+    center = cv2.perspectiveTransform(np.float32([[[x, y]]]), self.homography)[0, 0]
+    radius = int(0.08 * self.height)
+    cv2.ellipse(frame, (int(center[0]), int(center[1])), (radius, int(radius * 0.8)), 0, 0, 360, HAND_COLOR, -1)
+    cv2.line(frame, (int(center[0]), int(center[1])), (int(center[0]), self.height), HAND_COLOR, radius)
@@ -0,0 +1,101 @@
+import threading
+import time
+import unittest
+import numpy as np
+from logic.api.entity.board_factory import BoardFactory
+from logic.api.entity.camera import CameraDoesNotExistError
+from logic.api.entity.frame_source import FrameSource
+
+class SlowOpenSource(FrameSource):
+  """ Frame source stand-in that takes a while to open, like a webcam. """
+
+  def __init__(self, can_open: bool = True, open_time: float = 0.2):
+    self.can_open = can_open
+    self.open_time = open_time
+    self.opened = False
+    self.released = False
+
+  def open(self) -> bool:
+    threading.Event().wait(self.open_time)
+    self.opened = self.can_open
+    return self.opened
+
+  def is_opened(self) -> bool:
+    return self.opened
+
+  def read(self):
+    return True, np.zeros((2, 2, 3), dtype=np.uint8)
+
+  def release(self) -> None:
+    self.released = True
+
+class TestBoardFactory(unittest.TestCase):
+  """ Unit tests for the BoardFactory class. """
+
+  def test_cameras_are_opened_concurrently(self) -> None:
+    """ Test that opening several cameras takes about as long as opening one, with progress for each. """
+    progress = []
+    factory = BoardFactory(lambda board_id: SlowOpenSource(), max_workers=8)
+
+    start = time.perf_counter()
+    boards = factory.create_boards(8, progress_callback=lambda done, total: progress.append((done, total)))
+
+    self.assertLess(time.perf_counter() - start, 0.2 * 4)
+    self.assertEqual(list(boards), list(range(1, 9)))
+    self.assertEqual(progress, [(i, 8) for i in range(1, 9)])
+
+  def test_failed_camera_releases_the_others(self) -> None:
+    """ Test that one camera failing raises and releases the cameras that were opened. """
+    sources = {}
+
+    def create_source(board_id: int) -> SlowOpenSource:
+      sources[board_id] = SlowOpenSource(can_open=board_id != 2, open_time=0.01)
+      return sources[board_id]
+
+    with self.assertRaises(CameraDoesNotExistError):
+      BoardFactory(create_source).create_boards(4)
+    self.assertTrue(all(source.released for board_id, source in sources.items() if board_id != 2))
+
+  def test_unexpected_error_releases_the_others(self) -> None:
+    """ Test that any error, not only a missing camera, releases the cameras that were opened. """
+    sources = {}
+
+    def create_source(board_id: int) -> SlowOpenSource:
+      if board_id == 2:
+        raise RuntimeError("driver crashed")
+      sources[board_id] = SlowOpenSource(open_time=0.01)
+      return sources[board_id]
+
+    with self.assertRaises(RuntimeError):
+      BoardFactory(create_source).create_boards(4)
+    self.assertEqual(sorted(sources), [1, 3, 4])
+    self.assertTrue(all(source.released for source in sources.values()))
+
+  def test_failing_progress_callback_releases_the_boards(self) -> None:
+    """ Test that the opened cameras are released when the progress callback raises. """
+    sources = []
+
+    def create_source(board_id: int) -> SlowOpenSource:
+      sources.append(SlowOpenSource(open_time=0.01))
+      return sources[-1]
+
+    def fail(done: int, total: int) -> None:
+      raise RuntimeError("window closed")
+
+    with self.assertRaises(RuntimeError):
+      BoardFactory(create_source).create_boards(3, progress_callback=fail)
+    self.assertTrue(all(source.released for source in sources))
+
+  def test_lazy_open(self) -> None:
+    """ Test that deferred cameras are opened by the first reader. """
+    boards = BoardFactory(lambda board_id: SlowOpenSource(open_time=0), lazy_open=True).create_boards(2)
+    source = boards[1].camera.source
+    self.assertFalse(source.is_opened())
+
+    reader = boards[1].camera.grabber.reader()
+    self.assertTrue(source.is_opened())
+    self.assertTrue(reader.read(timeout=1)[0])
+    boards[1].camera.release()
+
+if __name__ == "__main__":
+  unittest.main()
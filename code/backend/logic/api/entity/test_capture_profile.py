@@ -0,0 +1,97 @@
+import unittest
+import cv2
+from unittest import mock
+from logic.api.entity.board_factory import BoardFactory
+from logic.api.entity.capture_profile import CaptureProfile, COMMON_RESOLUTIONS
+
+class FakeCapture:
+  """ Capture stand-in that snaps requested sizes to the modes of a driver, like a webcam does. """
+
+  def __init__(self, modes: dict, can_read: bool = True):
+    """ modes maps (width, height) to the frame rate the driver delivers for it. """
+    self.modes = modes
+    self.can_read = can_read
+    self.properties = {cv2.CAP_PROP_FOURCC: 0, cv2.CAP_PROP_BUFFERSIZE: 4}
+    self.requested = {}
+    self.mode = next(iter(modes))
+
+  def set(self, property_id: int, value: float) -> bool:
+    self.requested[property_id] = value
+    if property_id in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+      width = self.requested.get(cv2.CAP_PROP_FRAME_WIDTH, self.mode[0])
+      height = self.requested.get(cv2.CAP_PROP_FRAME_HEIGHT, self.mode[1])
+      # Largest mode that fits the request, else the smallest mode
+      fitting = [mode for mode in self.modes if mode[0] <= width and mode[1] <= height]
+      self.mode = max(fitting, key=lambda mode: mode[0] * mode[1]) if fitting else min(self.modes, key=lambda mode: mode[0] * mode[1])
+    elif property_id != cv2.CAP_PROP_FPS:
+      self.properties[property_id] = value
+    return True
+
+  def get(self, property_id: int) -> float:
+    if property_id == cv2.CAP_PROP_FRAME_WIDTH:
+      return float(self.mode[0])
+    if property_id == cv2.CAP_PROP_FRAME_HEIGHT:
+      return float(self.mode[1])
+    if property_id == cv2.CAP_PROP_FPS:
+      return self.modes[self.mode]
+    return float(self.properties.get(property_id, 0))
+
+  def read(self):
+    return self.can_read, None
+
+class TestCaptureProfile(unittest.TestCase):
+
+  def test_default_roi_skips_modes_too_small_for_the_board(self):
+    # 640x360 holds the model input on the full frame but not on the board region
+    profile = CaptureProfile()
+    self.assertTrue(CaptureProfile(roi_fraction=(1.0, 1.0)).has_enough_pixels(640, 360))
+    self.assertFalse(profile.has_enough_pixels(640, 360))
+
+    capture = FakeCapture({mode: 30.0 for mode in COMMON_RESOLUTIONS})
+    mode = profile.negotiate(capture)
+
+    self.assertEqual((mode["width"], mode["height"]), (640, 480))
+    self.assertEqual(mode["fourcc"], "MJPG")
+    self.assertEqual(mode["buffer_size"], 1)
+
+  def test_probe_skips_modes_below_the_frame_rate(self):
+    capture = FakeCapture({(640, 480): 15.0, (800, 600): 15.0, (1280, 720): 30.0})
+
+    mode = CaptureProfile().negotiate(capture)
+
+    self.assertEqual((mode["width"], mode["height"]), (1280, 720))
+
+  def test_fallback_applies_the_largest_accepted_mode(self):
+    # No mode is fast enough, the last one tried is not the largest the driver accepted
+    capture = FakeCapture({(320, 240): 15.0, (1280, 720): 15.0})
+    with mock.patch("logic.api.entity.capture_profile.COMMON_RESOLUTIONS", [(1280, 720), (640, 360)]):
+      mode = CaptureProfile().negotiate(capture)
+
+    self.assertEqual((mode["width"], mode["height"]), (1280, 720))
+    self.assertEqual(capture.mode, (1280, 720))
+
+  def test_fixed_resolution_is_applied_without_probing(self):
+    capture = FakeCapture({(320, 240): 30.0, (1920, 1080): 30.0}, can_read=False)
+
+    mode = CaptureProfile(width=1920, height=1080).negotiate(capture)
+
+    self.assertEqual((mode["width"], mode["height"]), (1920, 1080))
+
+  def test_invalid_settings_raise(self):
+    with self.assertRaises(ValueError):
+      CaptureProfile(width=640)
+    with self.assertRaises(ValueError):
+      CaptureProfile(fourcc="MJPEG")
+    with self.assertRaises(ValueError):
+      CaptureProfile(roi_fraction=(0.0, 0.5))
+
+  def test_factory_passes_the_profile_to_camera_sources(self):
+    profile = CaptureProfile()
+    factory = BoardFactory(capture_profile=profile)
+
+    source = factory._create_source(0)
+
+    self.assertIs(source.profile, profile)
+
+if __name__ == "__main__":
+  unittest.main()
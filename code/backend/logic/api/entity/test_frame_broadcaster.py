@@ -0,0 +1,127 @@
+import threading
+import unittest
+import cv2
+import numpy as np
+from unittest.mock import patch
+from logic.api.entity.frame_grabber import FrameGrabber
+from logic.api.entity.frame_broadcaster import FrameBroadcaster
+
+class SlowCapture:
+  """ Capture stand-in that returns a fixed number of frames at a steady pace. """
+
+  def __init__(self, frame_count: int):
+    self.frame_count = frame_count
+    self.reads = 0
+    self.ready = threading.Event()
+
+  def is_opened(self):
+    return True
+
+  def read(self):
+    self.ready.wait()
+    if self.reads >= self.frame_count:
+      return False, None
+    self.reads += 1
+    threading.Event().wait(0.005)
+    return True, np.zeros((8, 8, 3), dtype=np.uint8)
+
+  def release(self):
+    pass
+
+class GatedCapture:
+  """ Capture stand-in that returns a frame, whose pixels hold its number, each time it is allowed to. """
+
+  def __init__(self, frame_count: int):
+    self.frame_count = frame_count
+    self.reads = 0
+    self.allowed = threading.Semaphore(0)
+
+  def is_opened(self):
+    return True
+
+  def read(self):
+    self.allowed.acquire()
+    if self.reads >= self.frame_count:
+      return False, None
+    self.reads += 1
+    return True, np.full((8, 8, 3), self.reads, dtype=np.uint8)
+
+  def release(self):
+    pass
+
+class TestFrameBroadcaster(unittest.TestCase):
+  """ Unit tests for the FrameBroadcaster class. """
+
+  def test_frames_are_encoded_once_for_all_viewers(self) -> None:
+    """ Test that several viewers share one JPEG encode per frame. """
+    capture = SlowCapture(20)
+    broadcaster = FrameBroadcaster(FrameGrabber(capture))
+    encode = cv2.imencode
+    received = []
+
+    def view() -> None:
+      received.append(sum(1 for _ in broadcaster.stream()))
+
+    with patch("cv2.imencode", side_effect=encode) as mock_encode:
+      viewers = [threading.Thread(target=view) for _ in range(4)]
+      for viewer in viewers:
+        viewer.start()
+      while broadcaster.get_viewer_count() < 4:
+        threading.Event().wait(0.001)
+      capture.ready.set()
+      for viewer in viewers:
+        viewer.join()
+
+    # Never an encode per viewer, frames the encoder could not keep up with are skipped
+    self.assertLessEqual(mock_encode.call_count, 20)
+    self.assertTrue(all(0 < count <= mock_encode.call_count for count in received))
+    self.assertEqual(broadcaster.get_viewer_count(), 0)
+
+  def test_stream_starts_again_after_the_camera_restarts(self) -> None:
+    """ Test that viewers of a restarted camera get its frames and not the end of the previous stream. """
+    capture = SlowCapture(20)
+    capture.ready.set()
+    broadcaster = FrameBroadcaster(FrameGrabber(capture))
+    self.assertGreater(sum(1 for _ in broadcaster.stream()), 0)
+    while broadcaster.thread is not None:
+      threading.Event().wait(0.001)
+
+    # The camera delivers frames again once the next viewer starts the grabber
+    capture.frame_count += 20
+    chunks = list(broadcaster.stream())
+
+    self.assertGreater(len(chunks), 0)
+    self.assertTrue(broadcaster.ended)
+
+  def test_slow_encoder_skips_to_the_newest_frame(self) -> None:
+    """ Test that frames captured during an encode are skipped for the newest one. """
+    capture = GatedCapture(100)
+    grabber = FrameGrabber(capture)
+    broadcaster = FrameBroadcaster(grabber)
+    encode = cv2.imencode
+    encoded = []
+
+    def slow_encode(extension, frame):
+      encoded.append(int(frame[0, 0, 0]))
+      if len(encoded) == 1:
+        # The camera delivers five more frames while the first one is encoded
+        for _ in range(5):
+          capture.allowed.release()
+        while grabber.sequence < encoded[0] + 5:
+          threading.Event().wait(0.001)
+      else:
+        capture.frame_count = capture.reads
+        capture.allowed.release()
+      return encode(extension, frame)
+
+    with patch("cv2.imencode", side_effect=slow_encode):
+      viewer = threading.Thread(target=lambda: sum(1 for _ in broadcaster.stream()))
+      viewer.start()
+      # Frames captured before the encoder has its reader are not encoded, feed them until one is
+      while not encoded:
+        capture.allowed.release()
+        threading.Event().wait(0.01)
+      viewer.join(timeout=5)
+
+    self.assertFalse(viewer.is_alive())
+    self.assertEqual(encoded, [encoded[0], encoded[0] + 5])
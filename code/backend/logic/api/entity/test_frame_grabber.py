@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+from logic.api.entity.frame_grabber import FrameGrabber, FrameReader
+from logic.api.entity.capture_mode_enum import CaptureModeEnum
+
+class FakeCapture:
+  """ Capture stand-in that returns a fixed number of numbered frames. """
+
+  def __init__(self, frame_count: int):
+    self.frame_count = frame_count
+    self.reads = 0
+    self.released = False
+
+  def is_opened(self):
+    return True
+
+  def read(self):
+    if self.reads >= self.frame_count:
+      return False, None
+    self.reads += 1
+    return True, np.full((2, 2, 3), self.reads, dtype=np.uint8)
+
+  def release(self):
+    self.released = True
+
+class TestFrameGrabber(unittest.TestCase):
+  """ Unit tests for the FrameGrabber class. """
+
+  def test_invalid_buffer_size(self) -> None:
+    """ Test the invalid buffer size initialization. """
+    with self.assertRaises(ValueError):
+      FrameGrabber(FakeCapture(1), buffer_size=0)
+    with self.assertRaises(TypeError):
+      FrameGrabber(FakeCapture(1), buffer_size="INVALID")
+
+  def test_device_is_read_once_for_all_readers(self) -> None:
+    """ Test that two readers share the frames of a single capture. """
+    capture = FakeCapture(3)
+    grabber = FrameGrabber(capture, buffer_size=3)
+    reader_1 = FrameReader(grabber)
+    reader_2 = FrameReader(grabber)
+    grabber.start()
+    grabber.thread.join()
+
+    for reader in (reader_1, reader_2):
+      values = []
+      while True:
+        success, frame = reader.read(timeout=1)
+        if not success:
+          break
+        values.append(int(frame[0, 0, 0]))
+      self.assertEqual(values, [1, 2, 3])
+
+    self.assertEqual(capture.reads, 3)
+
+  def test_latest_reader_drops_stale_frames(self) -> None:
+    """ Test that a latest-frame reader skips to the newest frame and counts the drops. """
+    grabber = FrameGrabber(FakeCapture(4), buffer_size=2)
+    sequential_reader = FrameReader(grabber)
+    latest_reader = FrameReader(grabber, CaptureModeEnum.LATEST)
+    grabber.start()
+    grabber.thread.join()
+
+    success, frame = latest_reader.read(timeout=1)
+    self.assertTrue(success)
+    self.assertEqual(int(frame[0, 0, 0]), 4)
+    self.assertEqual(latest_reader.get_stats(), {"captured": 4, "read": 1, "dropped": 3})
+
+    success, frame = sequential_reader.read(timeout=1)
+    self.assertEqual(int(frame[0, 0, 0]), 3)
+    self.assertEqual(sequential_reader.get_stats()["dropped"], 2)
+
+  def test_released_reader(self) -> None:
+    """ Test that a released reader stops delivering frames. """
+    grabber = FrameGrabber(FakeCapture(2))
+    reader = grabber.reader()
+    reader.release()
+
+    success, frame = reader.read(timeout=1)
+    self.assertFalse(success)
+    self.assertIsNone(frame)
+    self.assertFalse(reader.is_opened())
+
+  def test_stop_releases_device(self) -> None:
+    """ Test that stopping the grabber releases the capture device. """
+    capture = FakeCapture(1)
+    grabber = FrameGrabber(capture)
+    grabber.reader()
+    grabber.stop()
+
+    self.assertTrue(capture.released)
+    self.assertFalse(grabber.is_running())
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+import cv2
+import numpy as np
+import logic.api.services.board_storage as storage
+from logic.api.entity.board import Board
+from logic.api.entity.frame_source import VideoFileFrameSource
+from logic.api.entity.synthetic_frame_source import SyntheticFrameSource
+from logic.api.services.board_service import BoardService
+
+FPS = 20.0
+FRAME_COUNT = 6
+
+def frame_value(frame: np.ndarray) -> int:
+  """ Index of a written frame, recovered from its brightness despite the compression. """
+  return int(round(frame.mean() / 40))
+
+class TestVideoFileFrameSource(unittest.TestCase):
+  """ Unit tests for the VideoFileFrameSource class. """
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """ Record a short video whose frames get brighter one step at a time. """
+    cls.directory = tempfile.TemporaryDirectory()
+    cls.path = os.path.join(cls.directory.name, "board.avi")
+    writer = cv2.VideoWriter(cls.path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for index in range(FRAME_COUNT):
+      writer.write(np.full((48, 64, 3), index * 40, dtype=np.uint8))
+    writer.release()
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    cls.directory.cleanup()
+
+  def read_all(self, source: VideoFileFrameSource, count: int) -> list:
+    """ Read count frames and get their indexes, None for the reads that failed. """
+    values = []
+    for _ in range(count):
+      success, frame = source.read()
+      values.append(frame_value(frame) if success else None)
+    return values
+
+  def test_fast_reads_every_frame_then_ends(self) -> None:
+    """ Test that a source that is not realtime reads every frame as fast as it can, then ends. """
+    source = VideoFileFrameSource(self.path, realtime=False)
+    self.assertTrue(source.open())
+
+    start = time.perf_counter()
+    values = self.read_all(source, FRAME_COUNT)
+    elapsed = time.perf_counter() - start
+    end = source.read()
+    source.release()
+
+    self.assertEqual(values, list(range(FRAME_COUNT)))
+    self.assertLess(elapsed, (FRAME_COUNT - 1) / FPS / 2)
+    self.assertEqual(end, (False, None))
+
+  def test_realtime_paces_frames_at_the_recorded_rate(self) -> None:
+    """ Test that a realtime source gives out the frames no faster than the video was recorded. """
+    source = VideoFileFrameSource(self.path, realtime=True)
+    source.open()
+
+    start = time.perf_counter()
+    values = self.read_all(source, FRAME_COUNT)
+    elapsed = time.perf_counter() - start
+    source.release()
+
+    self.assertEqual(source.fps, FPS)
+    self.assertEqual(values, list(range(FRAME_COUNT)))
+    self.assertGreaterEqual(elapsed, (FRAME_COUNT - 1) / FPS)
+
+  def test_loop_restarts_from_the_first_frame(self) -> None:
+    """ Test that a looping source starts again from the first frame at the end of the video. """
+    source = VideoFileFrameSource(self.path, realtime=False, loop=True)
+    source.open()
+
+    values = self.read_all(source, 2 * FRAME_COUNT + 1)
+    source.release()
+
+    self.assertEqual(values, list(range(FRAME_COUNT)) * 2 + [0])
+
+  def test_missing_file_does_not_open(self) -> None:
+    """ Test that a missing video neither opens nor gives out frames, even when looping. """
+    source = VideoFileFrameSource(os.path.join(self.directory.name, "missing.avi"), loop=True)
+
+    self.assertEqual(source.read(), (False, None))
+    self.assertFalse(source.open())
+    self.assertFalse(source.is_opened())
+    self.assertEqual(source.read(), (False, None))
+
+class TestSyntheticFrameSource(unittest.TestCase):
+  """ Unit tests for the SyntheticFrameSource class. """
+
+  def test_restart_resets_the_board_first(self) -> None:
+    """ Test that a looping game calls on_restart before the starting position is shown again, and counts its moves on. """
+    restarts = []
+    source = SyntheticFrameSource(
+      ["e4", "e5"], fps=1.0, move_interval=1.0, noise=0.0, realtime=False,
+      on_restart=lambda: restarts.append(source.frame_index - 1)
+    )
+    source.open()
+    frames = [source.read()[1] for _ in range(8)]
+    source.release()
+
+    # Frames 0 to 2 play the game, frame 3 starts it over
+    self.assertEqual(restarts, [3, 6])
+    np.testing.assert_array_equal(frames[3], frames[0])
+    self.assertEqual(sorted(source.get_move_times()), [1, 2, 3, 4, 5])
+
+  def test_restart_through_board_service(self) -> None:
+    """ Test that a board without clients is reset through BoardService.reset_game when its game starts over. """
+    boards = storage.boards
+    storage.boards = {1: Board(1, lazy_open=True)}
+    board = storage.boards[1]
+    source = SyntheticFrameSource(
+      ["e4"], fps=1.0, move_interval=1.0, noise=0.0, realtime=False,
+      on_restart=lambda: asyncio.run(BoardService().reset_game(1))
+    )
+    try:
+      source.open()
+      source.read()
+      source.read()
+      board.validate_move("e4")
+      self.assertEqual(board.move_history, ["e4"])
+      source.read()
+    finally:
+      storage.boards = boards
+
+    self.assertEqual(board.move_history, [])
+    self.assertEqual(board.chess_board.fen(), SyntheticFrameSource(["e4"]).start_fen)
+
+  def test_game_ends_without_loop(self) -> None:
+    """ Test that a game that does not loop ends after the last move instead of starting over. """
+    restarts = []
+    source = SyntheticFrameSource(
+      ["e4"], fps=1.0, move_interval=1.0, noise=0.0, realtime=False, loop=False, on_restart=lambda: restarts.append(1)
+    )
+    source.open()
+    reads = [source.read()[0] for _ in range(3)]
+
+    self.assertEqual(reads, [True, True, False])
+    self.assertEqual(restarts, [])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+import logic.api.services.board_storage as storage
+import logic.machine_learning.run_video as run_video
+from logic.api.entity.board import Board
+from logic.api.entity.latency import LatencyRecorder, LatencyTrace
+
+class TestLatencyRecorder(unittest.TestCase):
+  """ Unit tests for the LatencyRecorder class. """
+
+  def test_record_stages_and_total(self) -> None:
+    """ Test that a trace adds its stages and a total, which may end before the last mark. """
+    trace = LatencyTrace(capture_time=0.0)
+    trace.stages = {"detect": 0.03, "broadcast": 0.001}
+    trace.last_mark = 0.04
+    recorder = LatencyRecorder()
+    recorder.record(trace, "frame", 0.035)
+    recorder.record_total("move", trace.elapsed())
+
+    stats = recorder.to_dict()
+    self.assertEqual(sorted(stats), ["broadcast", "detect", "frame", "move"])
+    self.assertAlmostEqual(stats["frame"]["max_ms"], 35.0)
+    self.assertAlmostEqual(stats["move"]["max_ms"], 40.0)
+    self.assertEqual(stats["detect"]["count"], 1)
+
+  def test_move_frames_count_as_frames(self) -> None:
+    """ Test that a frame with a move is in the frame histogram as well as the move histogram. """
+    boards, sink = storage.boards, run_video.MOVE_SINK
+    storage.boards = {1: Board(1, lazy_open=True)}
+    sent = []
+
+    async def collect_move(board_id: int, move: str, trace: LatencyTrace) -> None:
+      sent.append(move)
+    run_video.MOVE_SINK = collect_move
+    try:
+      asyncio.run(run_video.report_payload(1, None, LatencyTrace()))
+      asyncio.run(run_video.report_payload(1, ({}, {"sans": ["e4"]}), LatencyTrace()))
+
+      stats = storage.boards[1].latency.to_dict()
+      self.assertEqual((stats["frame"]["count"], stats["move"]["count"]), (2, 1))
+      self.assertEqual(sent, ["e4"])
+    finally:
+      storage.boards, run_video.MOVE_SINK = boards, sink
+
+if __name__ == "__main__":
+  unittest.main()
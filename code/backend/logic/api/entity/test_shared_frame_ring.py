@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from logic.api.entity.frame_grabber import FrameGrabber, FrameReader
+from logic.api.entity.shared_frame_ring import SharedFrameRing
+from logic.api.entity.test_frame_grabber import FakeCapture
+
+class TestSharedFrameRing(unittest.TestCase):
+  """ Unit tests for the SharedFrameRing class. """
+
+  def setUp(self) -> None:
+    self.ring = SharedFrameRing((2, 2, 3), slots=2)
+
+  def tearDown(self) -> None:
+    self.ring.unlink()
+
+  def test_invalid_slots(self) -> None:
+    """ Test that a ring needs at least two slots. """
+    with self.assertRaises(ValueError):
+      SharedFrameRing((2, 2, 3), slots=1)
+
+  def test_attached_ring_reads_frames_without_copy(self) -> None:
+    """ Test that a ring attached by name sees the frames written to it, as views into the shared memory. """
+    attached = SharedFrameRing.attach(**self.ring.get_spec())
+    self.assertTrue(self.ring.write(np.full((2, 2, 3), 7, dtype=np.uint8), 1, 10.0))
+
+    frame, capture_time = attached.read(1)
+    self.assertEqual(frame[0, 0, 0], 7)
+    self.assertEqual(capture_time, 10.0)
+    self.assertEqual(attached.get_latest_sequence(), 1)
+
+    self.ring.write(np.full((2, 2, 3), 8, dtype=np.uint8), 2, 11.0)
+    self.assertEqual(frame[0, 0, 0], 7)
+    self.ring.write(np.full((2, 2, 3), 9, dtype=np.uint8), 3, 12.0)
+    self.assertEqual(frame[0, 0, 0], 9)
+    self.assertFalse(attached.is_current(1))
+    self.assertEqual(attached.read(1), (None, 0.0))
+
+    del frame
+    attached.close()
+
+  def test_ring_stays_open_while_frames_are_in_use(self) -> None:
+    """ Test that a ring cannot be closed while a frame read from it, or a crop of one, is still in use. """
+    attached = SharedFrameRing.attach(**self.ring.get_spec())
+    self.ring.write(np.full((2, 2, 3), 7, dtype=np.uint8), 1, 10.0)
+    crop = attached.read(1)[0][:1]
+
+    with self.assertRaises(BufferError):
+      attached.close()
+    self.assertEqual(crop[0, 0, 0], 7)
+    self.assertTrue(crop.is_current())
+    del crop
+    attached.close()
+
+  def test_frames_of_another_shape_are_skipped(self) -> None:
+    """ Test that a frame that does not fit the ring is not written. """
+    self.assertFalse(self.ring.write(np.zeros((4, 4, 3), dtype=np.uint8), 1, 0.0))
+    self.assertEqual(self.ring.get_latest_sequence(), 0)
+
+  def test_grabber_writes_frames_with_its_sequence(self) -> None:
+    """ Test that a grabber writes every frame into an attached ring under the sequence its readers see. """
+    grabber = FrameGrabber(FakeCapture(3), buffer_size=3)
+    reader = FrameReader(grabber)
+    grabber.attach_ring(self.ring)
+    grabber.start()
+    grabber.thread.join()
+
+    self.assertEqual(self.ring.get_latest_sequence(), 3)
+    success, frame = reader.read(timeout=1)
+    self.assertTrue(success)
+    ring_frame, _ = self.ring.read(grabber.sequence)
+    self.assertEqual(ring_frame[0, 0, 0], 3)
+    grabber.detach_ring(self.ring)
+    del ring_frame
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,162 @@
+"""
+Load test of the detection pipeline with synthetic boards.
+
+Every board gets a SyntheticFrameSource playing the same game, the detectors are started through
+BoardService.start_detectors and the time from a move appearing on a board to the move being
+detected is measured per board. When the game starts over, the board is reset through
+BoardService.reset_game and its moves are counted on from the previous rounds.
+
+Run from the backend folder with the models in resources/models:
+  python -m logic.api.load_test --boards 8 --duration 60
+  python -m logic.api.load_test --sweep 1 2 4 8 16 32 64 --duration 60
+  python -m logic.api.load_test --boards 8 --uint8   (models wrapped by utilities/wrap_model.py)
+  python -m logic.api.load_test --boards 8 --batch 8 --max-wait 0.005   (pieces model wrapped with --dynamic-batch)
+  python -m logic.api.load_test --boards 8 --variant int8_static   (variants made by utilities/model_variants.py)
+  python -m logic.api.load_test --boards 8 --processes 4   (detectors in worker processes)
+  python -m logic.api.load_test --boards 8 --pipelined   (preprocessing, inference and scoring of frames overlapped)
+  python -m logic.api.load_test --boards 8 --cascade   (low_res screening pass, see utilities/model_variants.py)
+  python -m logic.api.load_test --boards 8 --no-model-cache   (parse and optimize the ONNX files instead of utilities/model_cache.py)
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import logic.api.services.board_storage as storage
+import logic.machine_learning.run_video as run_video
+from logic.api.entity.board_factory import BoardFactory
+from logic.api.entity.synthetic_frame_source import SyntheticFrameSource
+from logic.api.services.board_service import BoardService
+from logic.machine_learning.utilities.model_registry import get_rss_mb
+from logic.machine_learning.utilities.model_variants import MODEL_VARIANTS
+
+GAME = [
+  "e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "O-O", "Be7",
+  "Re1", "b5", "Bb3", "d6", "c3", "O-O", "h3", "Nb8", "d4", "Nbd7"
+]
+
+def run(board_count: int, duration: float, fps: float, move_interval: float, processes: int = 0) -> Dict[str, float]:
+  """ Run the detectors on synthetic boards and measure the detection latency.
+
+  Args:
+    board_count (int): Number of simulated boards
+    duration (float): Seconds to run the test for
+    fps (float): Frame rate of the virtual cameras
+    move_interval (float): Seconds between two moves on a board
+    processes (int): Number of detector processes, 0 runs the detectors as threads
+  Returns:
+    Dict[str, float]: Summary of the run.
+  """
+  factory = BoardFactory(lambda board_id: SyntheticFrameSource(
+    GAME, fps=fps, move_interval=move_interval, seed=board_id,
+    on_restart=lambda: asyncio.run(BoardService().reset_game(board_id))
+  ))
+  storage.boards = factory.create_boards(board_count)
+  start = time.time()
+  BoardService().start_detectors(processes)
+  ready_seconds = float("nan")
+
+  detection_times: Dict[int, Dict[int, float]] = {board_id: {} for board_id in storage.boards}
+  end = time.time() + duration
+  while time.time() < end:
+    if ready_seconds != ready_seconds and all(board.camera.detector.ready.is_set() for board in storage.boards.values()):
+      ready_seconds = time.time() - start
+    for board_id, board in storage.boards.items():
+      # The source counts its rounds once the board was reset, a reset board has no moves until then
+      detected = len(board.move_history)
+      if detected > 0:
+        detected += board.camera.source.rounds * len(GAME)
+      if detected > 0 and detected not in detection_times[board_id]:
+        detection_times[board_id][detected] = time.time()
+    time.sleep(0.02)
+
+  latencies: List[float] = []
+  frame_p95: List[float] = []
+  moves_played = 0
+  frames = {"captured": 0, "read": 0, "dropped": 0}
+  for board_id, board in storage.boards.items():
+    move_times = board.camera.source.get_move_times()
+    moves_played += len(move_times)
+    for ply, detected_at in detection_times[board_id].items():
+      if ply in move_times:
+        latencies.append(detected_at - move_times[ply])
+    for key, value in board.camera.detector.get_frame_stats().items():
+      frames[key] += value
+    frame_latency = board.latency.to_dict().get("frame")
+    if frame_latency:
+      frame_p95.append(frame_latency["p95_ms"])
+
+  latencies.sort()
+  return {
+    "boards": board_count,
+    "processes": processes,
+    "ready_s": ready_seconds,
+    "moves_played": moves_played,
+    "moves_detected": len(latencies),
+    "latency_median": statistics.median(latencies) if latencies else float("nan"),
+    "latency_p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan"),
+    "frame_latency_p95_ms": max(frame_p95) if frame_p95 else float("nan"),
+    "frames_read_ratio": frames["read"] / max(frames["captured"], 1),
+    "frames_dropped_ratio": frames["dropped"] / max(frames["captured"], 1),
+    "rss_mb": get_rss_mb() or float("nan")
+  }
+
+def sweep(board_counts: List[int], args: argparse.Namespace) -> None:
+  """ Run one process per board count so that detector threads do not carry over between runs. """
+  print(f"{'boards':>6} {'played':>7} {'detected':>9} {'median s':>9} {'p95 s':>7} {'frame p95 ms':>13} {'read':>6} {'dropped':>8} {'RSS MB':>7}")
+  for board_count in board_counts:
+    output = subprocess.run(
+      [sys.executable, "-m", "logic.api.load_test", "--boards", str(board_count), "--duration", str(args.duration),
+       "--fps", str(args.fps), "--move-interval", str(args.move_interval), "--json", "--variant", args.variant,
+       "--processes", str(args.processes)]
+      + (["--uint8"] if args.uint8 else [])
+      + (["--pipelined"] if args.pipelined else [])
+      + (["--cascade"] if args.cascade else [])
+      + (["--no-model-cache"] if args.no_model_cache else [])
+      + (["--batch", str(args.batch), "--max-wait", str(args.max_wait)] if args.batch else []),
+      capture_output=True, text=True
+    ).stdout.strip().splitlines()
+    if not output:
+      print(f"{board_count:>6} failed")
+      continue
+    result = json.loads(output[-1])
+    print(f"{result['boards']:>6} {result['moves_played']:>7} {result['moves_detected']:>9} "
+          f"{result['latency_median']:>9.2f} {result['latency_p95']:>7.2f} {result['frame_latency_p95_ms']:>13.0f} "
+          f"{result['frames_read_ratio']:>6.2f} {result['frames_dropped_ratio']:>8.2f} {result['rss_mb']:>7.0f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Load test the detectors with synthetic boards.")
+  parser.add_argument("--boards", type=int, default=8)
+  parser.add_argument("--sweep", type=int, nargs="+")
+  parser.add_argument("--duration", type=float, default=60.0)
+  parser.add_argument("--fps", type=float, default=30.0)
+  parser.add_argument("--move-interval", type=float, default=3.0)
+  parser.add_argument("--json", action="store_true", help="Print the summary as a single JSON line")
+  parser.add_argument("--uint8", action="store_true", help="Feed raw uint8 frames to the wrapped models")
+  parser.add_argument("--batch", type=int, default=0, help="Batch the pieces model runs of all boards, up to this size")
+  parser.add_argument("--max-wait", type=float, default=0.005, help="Seconds a batch waits for more boards")
+  parser.add_argument("--processes", type=int, default=0, help="Run the detectors in this many worker processes")
+  parser.add_argument("--pipelined", action="store_true", help="Overlap the detection stages of consecutive frames")
+  parser.add_argument("--cascade", action="store_true", help="Screen frames with the low_res pieces model first")
+  parser.add_argument("--no-model-cache", action="store_true", help="Load the ONNX files without the optimized model cache")
+  parser.add_argument("--variant", choices=list(MODEL_VARIANTS), default="full", help="Model variant to load")
+  args = parser.parse_args()
+  run_video.MODEL_VARIANT = args.variant
+  run_video.UINT8_INPUT = args.uint8
+  run_video.PIECES_BATCHING = args.batch > 0
+  run_video.PIECES_MAX_BATCH = max(args.batch, 1)
+  run_video.PIECES_MAX_WAIT = args.max_wait
+  run_video.PIPELINED = args.pipelined
+  run_video.CASCADE = args.cascade
+  if args.no_model_cache:
+    run_video.MODEL_CACHE_DIR = None
+
+  if args.sweep:
+    sweep(args.sweep, args)
+  else:
+    summary = run(args.boards, args.duration, args.fps, args.move_interval, args.processes)
+    print(json.dumps(summary) if args.json else summary)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from logic.api.services.board_service import BoardService
 import logic.api.services.board_storage as storage
+from logic.machine_learning.utilities.model_registry import model_registry, get_rss_mb
 
 router = APIRouter()
 
@@ -24,6 +25,38 @@ async def reset_all_boards() -> dict[str, str]:
 
 @router.get("/boards")
 async def list_boards() -> dict:
-  """ List all boards. """
+  """ List all boards and those whose detector has its models loaded and warmed up. """
   ids = list(storage.boards.keys())
-  return {"board_count": len(ids), "boards": ids}
\ No newline at end of file
+  ready = [board_id for board_id in ids if storage.boards[board_id].camera.detector.ready.is_set()]
+  return {"board_count": len(ids), "boards": ids, "ready": ready}
+
+@router.get("/capture/{board_id}")
+async def capture_stats(board_id: int) -> dict:
+  """ Frame counters of the detector of a specific board.
+
+  Args:
+    board_id (int): Board ID
+  """
+  if board_id not in storage.boards:
+    raise HTTPException(404, f"Board {board_id} not found.")
+  camera = storage.boards[board_id].camera
+  return {"board": board_id, "mode": camera.source.get_mode(), **camera.detector.get_frame_stats()}
+
+@router.get("/latency/{board_id}")
+async def latency_stats(board_id: int) -> dict:
+  """ Latency histograms of a specific board, per pipeline stage.
+
+  "frame" is the capture-to-result time of every inferred frame and "move" the capture-to-broadcast time of detected moves.
+
+  Args:
+    board_id (int): Board ID
+  """
+  if board_id not in storage.boards:
+    raise HTTPException(404, f"Board {board_id} not found.")
+  return {"board": board_id, "stages": storage.boards[board_id].latency.to_dict()}
+
+
+@router.get("/models")
+async def model_stats() -> dict:
+  """ Models loaded by the detectors, shared by all boards, their session options and the memory of the process. """
+  return {"rss_mb": get_rss_mb(), "profile": model_registry.profile.to_dict(), "models": model_registry.get_memory_report()}
@@ -1,12 +1,31 @@
 import asyncio
 import threading
+from typing import Optional
+import logic.api.config as config
 import logic.api.services.board_storage as storage
+from logic.api.services.detector_pool import DetectorPool
+from logic.api.entity.latency import LatencyTrace
+from logic.machine_learning.utilities.session_profile import plan_thread_budget, apply_thread_budget
+from logic.machine_learning.utilities.model_registry import model_registry
 
 class BoardService:
   """ Service to manage chess boards and their operations. """
   
-  def start_detectors(self) -> None:
-    """ Start the chess detectors for all boards. """
+  def start_detectors(self, processes: Optional[int] = None) -> None:
+    """ Start the chess detectors for all boards, with the host's cores divided between them.
+
+    Args:
+      processes (Optional[int]): Number of detector processes, 0 runs the detectors as threads of this process.
+        Defaults to DETECTOR_PROCESSES of the config.
+    """
+    if processes is None:
+      processes = config.DETECTOR_PROCESSES
+    if processes > 0:
+      storage.detector_pool = DetectorPool(processes)
+      storage.detector_pool.start(list(storage.boards))
+      return
+
+    apply_thread_budget(plan_thread_budget(len(storage.boards), sessions_per_model=model_registry.pool_size))
     for board_id in storage.boards:
       thread = threading.Thread(
         target=self._run_detector_thread,
@@ -19,12 +38,13 @@ class BoardService:
     """ Run the detector in a separate thread. """
     asyncio.run(storage.boards[board_id].camera.detector.run())
 
-  async def send_move(self, board_id: int, move: str) -> None:
+  async def send_move(self, board_id: int, move: str, trace: Optional[LatencyTrace] = None) -> None:
     """ Send a chess move to all clients.
 
     Args:
       board_id (int): Board ID
       move (str): Chess move
+      trace (Optional[LatencyTrace]): Trace of the frame the move was detected in
     """
     board = storage.boards[board_id]
 
@@ -32,12 +52,18 @@ class BoardService:
     if valid:
       for client in board.clients:
         await client.send_text(checked_move)
+    if trace is not None:
+      trace.mark("broadcast")
 
   async def reset_game(self, board_id: int) -> None:
     """ Reset the chess game of a board. """
     board = storage.boards[board_id]
+    if storage.detector_pool is not None:
+      storage.detector_pool.reset(board_id)
+    # Reset once, also when no client is connected, e.g. a synthetic board restarting its game
+    result = board.reset_board()
     for client in board.clients:
-      await client.send_text(board.reset_board())
+      await client.send_text(result)
 
   async def reset_all_games(self) -> None:
     """ Reset the chess game to all boards. """
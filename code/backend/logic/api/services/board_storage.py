@@ -1 +1,4 @@
 boards = {}
+
+# DetectorPool of the boards when their detectors run in worker processes
+detector_pool = None
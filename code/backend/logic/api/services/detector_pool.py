@@ -0,0 +1,473 @@
+import asyncio
+import atexit
+import multiprocessing
+import threading
+import cv2
+import numpy as np
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple
+
+import logic.api.services.board_storage as storage
+from logic.api.entity.capture_mode_enum import CaptureModeEnum
+from logic.api.entity.frame_grabber import FrameGrabber, FrameReader
+from logic.api.entity.frame_source import FrameSource
+from logic.api.entity.latency import LatencyRecorder, LatencyTrace
+from logic.api.entity.shared_frame_ring import SharedFrameRing
+
+# Frames per board ring, a detector must be done with a frame within this many frame intervals
+RING_SLOTS = 8
+
+# Flags of run_video that the detector processes take over from the API process
+RUN_VIDEO_FLAGS = ["MODEL_VARIANT", "UINT8_INPUT", "PIECES_BATCHING", "PIECES_MAX_BATCH", "PIECES_MAX_WAIT", "PIPELINED", "PIPELINE_DEPTH", "CASCADE", "CASCADE_MARGIN", "MODEL_CACHE_DIR"]
+
+class ChannelFrameReader:
+  """ Frame reader of a detector process, reading the frames of its board from a shared memory ring.
+
+  The reader asks the API process for the next frame over the board's pipe and gets back its sequence
+  number, plus the spec of the board's ring whenever the API process made a new one. Frames are not copied,
+  read returns a RingFrame view into the ring that get_input letterboxes straight into the model input.
+  The grabber may come around to the slot while the frame is in use, so get_input checks the slot again
+  once the input is written and raises FrameOverwrittenError if it was overwritten, the detector then
+  retries with the next frame. Gating the frame on a view that is being overwritten is harmless.
+  """
+
+  def __init__(self, connection: Connection, ring: Optional[SharedFrameRing] = None):
+    """ Initialize the channel frame reader.
+
+    Args:
+      connection (Connection): Detector end of the board's frame pipe
+      ring (Optional[SharedFrameRing]): Frame ring of the board attached in this process, None to attach
+        the ring the API process announces with the first frame
+    """
+    self.connection = connection
+    self.ring = ring
+    self.last_sequence = 0
+    self.last_capture_time = 0.0
+    self.frames_overwritten = 0
+    # Replaced rings that frames still in use point into, closed once the frames are gone
+    self.retired_rings: List[SharedFrameRing] = []
+    self.released = False
+
+  def is_opened(self) -> bool:
+    """ Check if the reader can still deliver frames. """
+    return not self.released
+
+  def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    """ Request the next frame and wait for it.
+
+    Returns:
+      Tuple[bool, Optional[np.ndarray]]: Success flag and a RingFrame view of the frame. False once the API
+        process stops serving frames.
+    """
+    if self.released:
+      return False, None
+
+    frame = None
+    while frame is None:
+      try:
+        self.connection.send(None)
+        answer = self.connection.recv()
+      except (EOFError, OSError):
+        answer = None
+      if answer is None:
+        return False, None
+
+      sequence, ring_spec = answer
+      if ring_spec is not None:
+        self._attach(ring_spec)
+
+      frame, capture_time = self.ring.read(sequence)
+      if frame is None:
+        # Lapped by the grabber while the request was answered, take the newest frame or ask again
+        self.frames_overwritten += 1
+        sequence = self.ring.get_latest_sequence()
+        frame, capture_time = self.ring.read(sequence)
+
+    self.last_sequence = sequence
+    self.last_capture_time = capture_time
+    return True, frame
+
+  def _attach(self, ring_spec: dict) -> None:
+    """ Switch to a new ring of the board, e.g. after the camera changed its resolution. """
+    self._close_rings()
+    self.ring = SharedFrameRing.attach(**ring_spec)
+
+  def _close_rings(self) -> None:
+    """ Close the current ring and the retired ones whose frames are no longer in use. """
+    if self.ring is not None:
+      self.retired_rings.append(self.ring)
+      self.ring = None
+
+    in_use = []
+    for ring in self.retired_rings:
+      try:
+        ring.close()
+      except BufferError:
+        in_use.append(ring)
+    self.retired_rings = in_use
+
+  def release(self) -> None:
+    """ Stop reading frames. Rings that frames still point into are closed when those are collected. """
+    self.released = True
+    self.connection.close()
+    self._close_rings()
+
+class ForwardingLatencyRecorder(LatencyRecorder):
+  """ Latency recorder of a detector process that also sends the traces to the API process. """
+
+  def __init__(self, board_id: int, events: multiprocessing.Queue):
+    """ Initialize the forwarding latency recorder.
+
+    Args:
+      board_id (int): Board ID
+      events (multiprocessing.Queue): Queue of events read by the API process
+    """
+    super().__init__()
+    self.board_id = board_id
+    self.events = events
+
+  def record(self, trace: LatencyTrace, total_name: str, total_seconds: Optional[float] = None) -> None:
+    super().record(trace, total_name, total_seconds)
+    self.events.put(("latency", self.board_id, trace, total_name, total_seconds))
+
+  def record_total(self, total_name: str, seconds: float) -> None:
+    super().record_total(total_name, seconds)
+    # Moves are recorded by the API process once they are broadcast
+    if total_name != "move":
+      self.events.put(("latency", self.board_id, None, total_name, seconds))
+
+class DetectorPool:
+  """ Detectors of the boards running in worker processes, so their Python post-processing does not share one GIL.
+
+  The cameras, streams and clients stay in the API process. Every detector process hosts a group of boards:
+  the grabber of each board writes its frames into a shared memory ring, the detector requests the newest
+  frame over a pipe and copies it out of the ring, only the sequence number goes through the pipe. Moves
+  and latency traces are sent back over a shared event queue and the API process broadcasts the moves as
+  if they were detected locally.
+
+  A board's ring is sized by the mode its camera negotiated, or by its first frame for sources without
+  one, and is replaced when the frames change size. Boards whose source cannot be opened get no detector.
+
+  Where fork is available, a single-threaded master process loads the models once and forks the detector
+  processes, so the weights are shared copy-on-write. The sessions use one intra-op thread, since ONNX
+  Runtime thread pools do not survive a fork, the processes themselves spread the boards over the cores.
+  """
+
+  def __init__(self, process_count: int):
+    """ Initialize the detector pool.
+
+    Args:
+      process_count (int): Number of detector processes
+    Raises:
+      ValueError: If the process count is not a positive integer.
+    """
+    if not isinstance(process_count, int) or process_count < 1:
+      raise ValueError("Process count must be a positive integer.")
+
+    self.process_count = process_count
+    self.context = multiprocessing.get_context("spawn")
+    self.master: Optional[multiprocessing.Process] = None
+    self.events: Optional[multiprocessing.Queue] = None
+    self.commands: List[multiprocessing.Queue] = []
+    self.assignments: List[List[int]] = []
+    self.feeders: List[threading.Thread] = []
+    self.rings: Dict[int, SharedFrameRing] = {}
+    self.rings_lock = threading.Lock()
+    self.stopping = threading.Event()
+
+  def start(self, board_ids: List[int]) -> None:
+    """ Start the detector processes for the given boards, which must be in the board storage.
+
+    Args:
+      board_ids (List[int]): IDs of the boards to detect moves on
+    """
+    import logic.machine_learning.run_video as run_video
+
+    connections: Dict[int, Connection] = {}
+    for board_id in board_ids:
+      camera = storage.boards[board_id].camera
+      # The board's detector is the consumer of its grabber, so its frame counters keep working
+      detector = camera.detector
+      detector.reader = detector.grabber.reader(CaptureModeEnum.LATEST)
+      if not detector.reader.is_opened():
+        print(f"Board {board_id}: could not open {camera.source.describe()}, its detector is not started")
+        continue
+
+      shape = get_frame_shape(camera.source)
+      if shape is not None:
+        self._replace_ring(board_id, detector.grabber, shape)
+
+      api_end, detector_end = self.context.Pipe()
+      connections[board_id] = detector_end
+      feeder = threading.Thread(target=self._serve_frames, args=(board_id, api_end, detector.reader), daemon=True)
+      feeder.start()
+      self.feeders.append(feeder)
+
+    started = list(connections)
+    if not started:
+      return
+    process_count = min(self.process_count, len(started))
+    self.assignments = [started[i::process_count] for i in range(process_count)]
+    self.events = self.context.Queue()
+    self.commands = [self.context.Queue() for _ in self.assignments]
+
+    flags = {name: getattr(run_video, name) for name in RUN_VIDEO_FLAGS}
+    self.master = self.context.Process(
+      target=run_master,
+      args=(self.assignments, connections, self.events, self.commands, flags),
+      name="detector-master"
+    )
+    self.master.start()
+    for connection in connections.values():
+      connection.close()
+
+    threading.Thread(target=self._dispatch_events, daemon=True).start()
+    atexit.register(self.stop)
+
+  def reset(self, board_id: int) -> None:
+    """ Reset the game of a board in the detector process hosting it.
+
+    Args:
+      board_id (int): Board ID
+    """
+    for board_ids, commands in zip(self.assignments, self.commands):
+      if board_id in board_ids:
+        commands.put(("reset", board_id))
+
+  def stop(self, timeout: float = 5.0) -> None:
+    """ Stop serving frames, which ends the detector processes, and wait for them.
+
+    Args:
+      timeout (float): Seconds to wait before the processes are terminated
+    """
+    if self.master is None:
+      return
+
+    self.stopping.set()
+    self.master.join(timeout)
+    if self.master.is_alive():
+      self.master.terminate()
+      self.master.join()
+    self.events.put(None)
+    self.master = None
+
+    with self.rings_lock:
+      for board_id, ring in self.rings.items():
+        storage.boards[board_id].camera.grabber.detach_ring(ring)
+        ring.unlink()
+      self.rings = {}
+
+  def to_dict(self) -> dict:
+    """ Summarize the pool. """
+    return {
+      "processes": len(self.assignments),
+      "boards": self.assignments,
+      "running": self.master is not None and self.master.is_alive()
+    }
+
+  def _replace_ring(self, board_id: int, grabber: FrameGrabber, shape: Tuple[int, ...]) -> Optional[SharedFrameRing]:
+    """ Give a board a new ring for frames of the given shape, freeing its old ring. None once the pool is stopping. """
+    with self.rings_lock:
+      if self.stopping.is_set():
+        return None
+      ring = SharedFrameRing(shape, RING_SLOTS)
+      grabber.attach_ring(ring)
+      old = self.rings.get(board_id)
+      self.rings[board_id] = ring
+      if old is not None:
+        # The detector process keeps its own mapping of the old ring until it attaches the new one
+        grabber.detach_ring(old)
+        old.unlink()
+        print(f"Board {board_id}: frames changed from {old.shape} to {shape}, the frame ring was replaced")
+      return ring
+
+  def _serve_frames(self, board_id: int, connection: Connection, reader: FrameReader) -> None:
+    """ Answer the frame requests of a board's detector with the sequence number of the newest frame of its grabber,
+    along with the spec of the board's ring when the detector has not attached to it yet. """
+    announced = None
+    while True:
+      try:
+        connection.recv()
+        success, frame = reader.read() if not self.stopping.is_set() else (False, None)
+        ring = self.rings.get(board_id)
+        if success and (ring is None or frame.shape != ring.shape):
+          # The grabber wrote this frame before the ring existed, the next ones it writes itself
+          ring = self._replace_ring(board_id, reader.grabber, frame.shape)
+          success = ring is not None and ring.write(frame, reader.last_sequence, reader.last_capture_time)
+
+        if not success:
+          connection.send(None)
+        else:
+          connection.send((reader.last_sequence, ring.get_spec() if ring is not announced else None))
+          announced = ring
+      except (EOFError, OSError):
+        break
+      if not success:
+        if not self.stopping.is_set():
+          print(f"Board {board_id}: no more frames, its detector stops")
+        break
+    connection.close()
+
+  def _dispatch_events(self) -> None:
+    """ Apply the events of the detector processes to the boards of the API process. """
+    from logic.api.services.board_service import BoardService
+
+    loop = asyncio.new_event_loop()
+    board_service = BoardService()
+    while True:
+      event = self.events.get()
+      if event is None:
+        break
+
+      kind, board_id, *payload = event
+      if board_id not in storage.boards:
+        continue
+      board = storage.boards[board_id]
+      if kind == "move":
+        move, trace = payload
+        loop.run_until_complete(board_service.send_move(board_id, move, trace))
+        # The other stages come with the frame's latency event, only the broadcast happened here
+        board.latency.record_total("broadcast", trace.stages["broadcast"])
+        board.latency.record_total("move", trace.elapsed())
+      elif kind == "latency":
+        trace, total_name, seconds = payload
+        if trace is None:
+          board.latency.record_total(total_name, seconds)
+        else:
+          board.latency.record(trace, total_name, seconds)
+      elif kind == "ready":
+        board.camera.detector.ready.set()
+    loop.close()
+
+def run_master(
+  assignments: List[List[int]],
+  connections: Dict[int, Connection],
+  events: multiprocessing.Queue,
+  commands: List[multiprocessing.Queue],
+  flags: dict
+) -> None:
+  """ Load the models and start one detector process per group of boards. Runs in the master process.
+
+  Args:
+    assignments (List[List[int]]): Board IDs hosted by each detector process
+    connections (Dict[int, Connection]): Detector end of the frame pipe of every board
+    events (multiprocessing.Queue): Queue of events read by the API process
+    commands (List[multiprocessing.Queue]): Command queue of each detector process
+    flags (dict): Flags of run_video set in the API process
+  """
+  import logic.machine_learning.run_video as run_video
+  from logic.machine_learning.utilities.model_registry import model_registry
+  from logic.machine_learning.utilities.session_profile import SessionProfile
+
+  # Sessions without thread pools of their own can be used by forked processes
+  model_registry.set_profile(SessionProfile(intra_op_threads=1))
+  apply_flags(flags)
+
+  if "fork" in multiprocessing.get_all_start_methods():
+    context = multiprocessing.get_context("fork")
+    run_video.preload_models()
+  else:
+    context = multiprocessing.get_context("spawn")
+
+  workers = [
+    context.Process(
+      target=run_detectors,
+      args=(
+        board_ids,
+        {board_id: connections[board_id] for board_id in board_ids},
+        events, command_queue, flags
+      ),
+      name=f"detector-{i + 1}"
+    )
+    for i, (board_ids, command_queue) in enumerate(zip(assignments, commands))
+  ]
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+
+def run_detectors(
+  board_ids: List[int],
+  connections: Dict[int, Connection],
+  events: multiprocessing.Queue,
+  commands: multiprocessing.Queue,
+  flags: dict
+) -> None:
+  """ Run the detectors of a group of boards until the API process stops serving their frames. Runs in a detector process.
+
+  Args:
+    board_ids (List[int]): IDs of the boards hosted by this process
+    connections (Dict[int, Connection]): Detector end of the frame pipe of every hosted board
+    events (multiprocessing.Queue): Queue of events read by the API process
+    commands (multiprocessing.Queue): Commands of the API process for this process
+    flags (dict): Flags of run_video set in the API process
+  """
+  import logic.machine_learning.run_video as run_video
+  from logic.api.entity.board import Board
+  from logic.machine_learning.utilities.detection_executor import detection_executor
+  from logic.machine_learning.utilities.model_registry import model_registry
+  from logic.machine_learning.utilities.session_profile import SessionProfile
+
+  # Already done by the master when this process was forked
+  model_registry.set_profile(SessionProfile(intra_op_threads=1))
+  apply_flags(flags)
+  run_video.preload_models()
+
+  cv2.setNumThreads(1)
+  detection_executor.set_max_workers(len(board_ids))
+
+  # Local copies of the boards keep the game state the detectors work on
+  storage.boards = {board_id: Board(board_id, lazy_open=True) for board_id in board_ids}
+  for board_id, board in storage.boards.items():
+    board.latency = ForwardingLatencyRecorder(board_id, events)
+
+  async def report_move(board_id: int, move: str, trace: LatencyTrace) -> None:
+    storage.boards[board_id].validate_move(move)
+    events.put(("move", board_id, move, trace))
+  run_video.MOVE_SINK = report_move
+
+  def handle_commands() -> None:
+    while True:
+      command, board_id = commands.get()
+      if command == "reset" and board_id in storage.boards:
+        storage.boards[board_id].reset_board()
+  threading.Thread(target=handle_commands, daemon=True).start()
+
+  readers = {board_id: ChannelFrameReader(connections[board_id]) for board_id in board_ids}
+  threads = [
+    threading.Thread(
+      target=lambda board_id=board_id: asyncio.run(run_video.prepare_to_run_video(
+        board_id, readers[board_id], lambda: events.put(("ready", board_id))
+      )),
+      name=f"board-{board_id}"
+    )
+    for board_id in readers
+  ]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+def get_frame_shape(source: FrameSource) -> Optional[Tuple[int, int, int]]:
+  """ Get the shape of the frames of a source from the mode it negotiated, see CaptureProfile.
+
+  Args:
+    source (FrameSource): Opened frame source
+  Returns:
+    Optional[Tuple[int, int, int]]: Height, width and channels of the BGR frames, None if the source has no mode.
+  """
+  mode = source.get_mode()
+  if not mode.get("width") or not mode.get("height"):
+    return None
+  return (mode["height"], mode["width"], 3)
+
+def apply_flags(flags: dict) -> None:
+  """ Set the flags of run_video in this process.
+
+  Args:
+    flags (dict): Values of RUN_VIDEO_FLAGS
+  """
+  import logic.machine_learning.run_video as run_video
+
+  for name, value in flags.items():
+    setattr(run_video, name, value)
@@ -0,0 +1,186 @@
+import multiprocessing
+import threading
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+import logic.api.services.board_storage as storage
+from logic.api.entity.board import Board
+from logic.api.entity.frame_source import FrameSource
+from logic.api.entity.shared_frame_ring import FrameOverwrittenError, SharedFrameRing
+from logic.api.services.detector_pool import ChannelFrameReader, DetectorPool, get_frame_shape
+from logic.machine_learning.utilities.preprocess import get_input
+
+class RingGrabber:
+  """ Grabber stand-in that only keeps the attached rings. """
+
+  def __init__(self):
+    self.rings = []
+
+  def attach_ring(self, ring: SharedFrameRing) -> None:
+    self.rings.append(ring)
+
+  def detach_ring(self, ring: SharedFrameRing) -> None:
+    self.rings = [attached for attached in self.rings if attached is not ring]
+
+class RingWritingReader:
+  """ Grabber reader stand-in that writes a frame filled with its sequence number into the attached rings on every read,
+  like the grab loop does. Frames take the shapes given, the last shape is kept. """
+
+  def __init__(self, shapes: list):
+    self.grabber = RingGrabber()
+    self.shapes = shapes
+    self.last_sequence = 0
+    self.last_capture_time = 0.0
+
+  def read(self):
+    self.last_sequence += 1
+    self.last_capture_time = float(self.last_sequence)
+    shape = self.shapes[min(self.last_sequence, len(self.shapes)) - 1]
+    frame = np.full(shape, self.last_sequence, dtype=np.uint8)
+    for ring in self.grabber.rings:
+      ring.write(frame, self.last_sequence, self.last_capture_time)
+    return True, frame
+
+class ClosedSource(FrameSource):
+  """ Frame source that cannot be opened. """
+
+  def open(self):
+    return False
+
+  def is_opened(self):
+    return False
+
+  def read(self):
+    return False, None
+
+  def release(self):
+    pass
+
+class TestDetectorPool(unittest.TestCase):
+  """ Unit tests for the frame channel of the DetectorPool class. """
+
+  def serve(self, pool: DetectorPool, reader: RingWritingReader) -> tuple:
+    """ Start serving the frames of board 1 and get the detector's reader and the feeder thread. """
+    api_end, detector_end = multiprocessing.Pipe()
+    feeder = threading.Thread(target=pool._serve_frames, args=(1, api_end, reader), daemon=True)
+    feeder.start()
+    return ChannelFrameReader(detector_end), feeder
+
+  def test_invalid_process_count(self) -> None:
+    """ Test that the process count must be a positive integer. """
+    with self.assertRaises(ValueError):
+      DetectorPool(0)
+
+  def test_frames_are_served_until_stopped(self) -> None:
+    """ Test that a detector gets a view of a frame per request, and no frames once the pool stops. """
+    pool = DetectorPool(1)
+    reader, feeder = self.serve(pool, RingWritingReader([(2, 2, 3)]))
+
+    for sequence in (1, 2):
+      success, frame = reader.read()
+      self.assertTrue(success)
+      self.assertEqual(frame[0, 0, 0], sequence)
+      self.assertEqual(reader.last_capture_time, float(sequence))
+    # The frame is a view into the ring, it tells when its slot is written again
+    self.assertTrue(frame.is_current())
+    pool.rings[1].write(np.zeros((2, 2, 3), dtype=np.uint8), 2 + 8, 0.0)
+    self.assertEqual(frame[0, 0, 0], 0)
+    self.assertFalse(frame.is_current())
+    del frame
+
+    pool.stopping.set()
+    self.assertEqual(reader.read(), (False, None))
+    feeder.join(1.0)
+    self.assertFalse(feeder.is_alive())
+    reader.release()
+    self.assertFalse(reader.is_opened())
+    pool.rings[1].unlink()
+
+  def test_ring_follows_the_frame_shape(self) -> None:
+    """ Test that the ring is replaced when the frames change size, instead of serving stale frames. """
+    pool = DetectorPool(1)
+    reader, _ = self.serve(pool, RingWritingReader([(2, 2, 3), (4, 6, 3)]))
+
+    first = reader.read()[1]
+    self.assertEqual(first.shape, (2, 2, 3))
+    success, frame = reader.read()
+    self.assertTrue(success)
+    self.assertEqual((frame.shape, frame[0, 0, 0]), ((4, 6, 3), 2))
+    self.assertEqual(pool.rings[1].shape, (4, 6, 3))
+    self.assertEqual(reader.read()[1][0, 0, 0], 3)
+
+    # The replaced ring stays mapped while a frame of it is in use
+    self.assertEqual(len(reader.retired_rings), 1)
+    self.assertEqual(first[0, 0, 0], 1)
+    del first, frame
+    pool.stopping.set()
+    reader.read()
+    reader.release()
+    self.assertEqual(reader.retired_rings, [])
+    pool.rings[1].unlink()
+
+  def test_lapped_frame_is_replaced_by_the_newest(self) -> None:
+    """ Test that a frame the grabber overwrote before the request was answered is replaced by the newest one. """
+    ring = SharedFrameRing((2, 2, 3), slots=2)
+    for sequence in (1, 2, 3):
+      ring.write(np.full((2, 2, 3), sequence, dtype=np.uint8), sequence, float(sequence))
+    api_end, detector_end = multiprocessing.Pipe()
+    reader = ChannelFrameReader(detector_end)
+
+    def answer() -> None:
+      api_end.recv()
+      api_end.send((1, ring.get_spec()))
+    server = threading.Thread(target=answer)
+    server.start()
+    success, frame = reader.read()
+    server.join()
+
+    self.assertTrue(success)
+    self.assertEqual((frame[0, 0, 0], frame.sequence, reader.last_sequence), (3, 3, 3))
+    self.assertEqual(reader.frames_overwritten, 1)
+    del frame
+    reader.release()
+    ring.unlink()
+
+  def test_letterboxing_an_overwritten_frame_raises(self) -> None:
+    """ Test that get_input letterboxes a view into the ring and raises once its slot is written during that. """
+    ring = SharedFrameRing((64, 96, 3), slots=2)
+    ring.write(np.full((64, 96, 3), 128, dtype=np.uint8), 1, 1.0)
+    frame, _ = ring.read(1)
+
+    image4d = get_input(frame)[0]
+    self.assertGreater(image4d.max(), 0)
+
+    resize = cv2.resize
+    def overwriting_resize(*args, **kwargs):
+      ring.write(np.zeros((64, 96, 3), dtype=np.uint8), 3, 3.0)
+      return resize(*args, **kwargs)
+    with mock.patch("cv2.resize", overwriting_resize):
+      with self.assertRaises(FrameOverwrittenError):
+        get_input(frame)
+    del frame, image4d
+    ring.unlink()
+
+  def test_ring_shape_from_negotiated_mode(self) -> None:
+    """ Test that the frame shape is taken from the capture mode when the source has one. """
+    class ModeSource(ClosedSource):
+      def get_mode(self):
+        return {"width": 1280, "height": 720, "fps": 30.0}
+
+    self.assertEqual(get_frame_shape(ModeSource()), (720, 1280, 3))
+    self.assertIsNone(get_frame_shape(ClosedSource()))
+
+  def test_board_without_source_gets_no_detector(self) -> None:
+    """ Test that a board whose source cannot be opened is left out instead of blocking the others. """
+    boards = storage.boards
+    storage.boards = {1: Board(1, ClosedSource(), lazy_open=True)}
+    try:
+      pool = DetectorPool(1)
+      pool.start([1])
+      self.assertEqual((pool.assignments, pool.master, pool.rings), ([], None, {}))
+    finally:
+      storage.boards = boards
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark of a detector process.
+
+Every run is a fresh interpreter that imports the detection hot path, loads the pieces and
+xcorners models and runs one frame through both. --with-tensorflow also imports TensorFlow, which
+is what every detector process paid before the hot path ran on NumPy and OpenCV only.
+
+Run from the backend folder with the models in resources/models:
+  python -m logic.machine_learning.benchmark_startup --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+def get_peak_rss_mb() -> float:
+    """ Get the peak resident memory of this process in MB. """
+    try:
+        import resource
+    except ImportError:
+        # Windows, psutil is only needed here
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def measure(with_tensorflow: bool) -> dict:
+    """ Measure the startup of this process. Must run in a fresh interpreter. """
+    start = time.perf_counter()
+    if with_tensorflow:
+        import tensorflow
+    import asyncio
+    import numpy as np
+    import onnxruntime as ort
+    from logic.machine_learning.run_video import process_video
+    from logic.machine_learning.detection.piece_detection import run_pieces_model
+    from logic.machine_learning.detection.corners_detection import run_xcorners_model
+    from logic.machine_learning.utilities.constants import PIECES_MODEL_PATH, XCORNERS_MODEL_PATH
+    imported = time.perf_counter()
+
+    piece_session = ort.InferenceSession(PIECES_MODEL_PATH)
+    corner_session = ort.InferenceSession(XCORNERS_MODEL_PATH)
+    loaded = time.perf_counter()
+
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    pieces = asyncio.run(run_pieces_model(frame, piece_session))
+    if len(pieces) < 2:
+        # Random noise has no pieces, the xcorners model still needs a region to look at
+        pieces = [[120.0, 70.0, 0.0], [360.0, 70.0, 0.0], [360.0, 220.0, 0.0], [120.0, 220.0, 0.0]]
+    asyncio.run(run_xcorners_model(frame, corner_session, pieces))
+    done = time.perf_counter()
+
+    return {
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "first_frame_s": done - loaded,
+        "total_s": done - start,
+        "peak_rss_mb": get_peak_rss_mb()
+    }
+
+def run(runs: int) -> None:
+    """ Compare the startup with and without TensorFlow, one fresh process per run. """
+    print(f"{'variant':<18} {'import s':>9} {'load s':>7} {'frame s':>8} {'total s':>8} {'peak RSS MB':>12}")
+    for with_tensorflow in (False, True):
+        results = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "logic.machine_learning.benchmark_startup", "--child"]
+                + (["--with-tensorflow"] if with_tensorflow else []),
+                capture_output=True, text=True
+            ).stdout.strip().splitlines()
+            if output:
+                results.append(json.loads(output[-1]))
+
+        name = "with tensorflow" if with_tensorflow else "hot path only"
+        if not results:
+            print(f"{name:<18} failed")
+            continue
+        median = {key: statistics.median(result[key] for result in results) for key in results[0]}
+        print(f"{name:<18} {median['import_s']:>9.2f} {median['load_s']:>7.2f} {median['first_frame_s']:>8.2f} "
+              f"{median['total_s']:>8.2f} {median['peak_rss_mb']:>12.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the startup time and memory of a detector process.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per variant, the median is reported")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--with-tensorflow", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.with_tensorflow)))
+    else:
+        run(args.runs)
@@ -0,0 +1,145 @@
+"""
+Speed and accuracy benchmark of the model variants of utilities/model_variants.py.
+
+Every variant runs the same preprocessed frames. Latency and throughput are measured per run, and
+the detections after NMS are matched to those of the full model by class and center distance, so
+agreement shows how much a faster variant changes what the detectors see. Synthetic frames only
+exercise the models, judge agreement on a recording of a real board.
+
+Run from the backend folder with the models in resources/models:
+  python -m logic.machine_learning.benchmark_variants --video path/to/video.mp4
+  python -m logic.machine_learning.benchmark_variants --model xcorners --variants full float32 int8_static
+"""
+import argparse
+import cv2
+import os
+import statistics
+import time
+import numpy as np
+import onnxruntime as ort
+from typing import Dict, List, Tuple
+
+from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, process_boxes_and_scores
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, PIECES_MODEL_PATH, XCORNERS_MODEL_PATH
+from logic.machine_learning.utilities.model_variants import MODEL_VARIANTS, get_model_variant_path, get_calibration_frames
+from logic.machine_learning.utilities.session_profile import SessionProfile
+
+MODELS = {"pieces": PIECES_MODEL_PATH, "xcorners": XCORNERS_MODEL_PATH}
+
+def get_detections(prediction: np.ndarray, input_size: Tuple[int, int] = (MODEL_WIDTH, MODEL_HEIGHT)) -> np.ndarray:
+    """ Get the detections of a model output as (x, y, class) rows in full size model input pixels. """
+    boxes, scores = get_boxes_and_scores(prediction, MODEL_WIDTH, MODEL_HEIGHT, MODEL_WIDTH, MODEL_HEIGHT, (0, 0, 0, 0), (0, 0), input_size)
+    return process_boxes_and_scores(boxes, scores).astype(np.float32)
+
+def resize_input(frame: np.ndarray, input_size: Tuple[int, int]) -> np.ndarray:
+    """ Resize a float16 NCHW model input to the input size of a variant such as low_res. """
+    if frame.shape[3:1:-1] == input_size:
+        return frame
+    image = cv2.resize(frame[0].transpose(1, 2, 0).astype(np.float32), input_size, interpolation=cv2.INTER_AREA)
+    return image.transpose(2, 0, 1)[np.newaxis].astype(np.float16)
+
+def match_detections(reference: np.ndarray, detections: np.ndarray, tolerance: float) -> int:
+    """
+    Count the detections that match a reference detection of the same class, each reference matched once.
+
+    Args:
+        reference (np.ndarray): Detections of the full model as (x, y, class) rows.
+        detections (np.ndarray): Detections of the variant.
+        tolerance (float): Largest center distance in model input pixels.
+
+    Returns:
+        int: Number of matched detections.
+    """
+    matched = 0
+    unmatched = np.ones(len(reference), dtype=bool)
+    for x, y, class_index in detections:
+        distance = np.hypot(reference[:, 0] - x, reference[:, 1] - y)
+        candidates = np.flatnonzero(unmatched & (reference[:, 2] == class_index) & (distance <= tolerance))
+        if len(candidates):
+            unmatched[candidates[np.argmin(distance[candidates])]] = False
+            matched += 1
+    return matched
+
+def benchmark(
+    model_path: str,
+    variants: List[str],
+    frames: List[np.ndarray],
+    warmup: int = 5,
+    tolerance: float = 8.0
+) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark every variant of a model that exists on disk.
+
+    Args:
+        model_path (str): Path of the full model.
+        variants (List[str]): Variants to compare, the first one is the reference of the others.
+        frames (List[np.ndarray]): Preprocessed float16 model inputs.
+        warmup (int): Runs before timing starts.
+        tolerance (float): Largest center distance of matching detections in model input pixels.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Results per variant.
+    """
+    results = {}
+    reference = None
+    for variant in variants:
+        variant_path = get_model_variant_path(model_path, variant)
+        if not os.path.exists(variant_path):
+            print(f"Skipping {variant}, {variant_path} does not exist.")
+            continue
+
+        session = ort.InferenceSession(variant_path, sess_options=SessionProfile().to_session_options())
+        model_input = session.get_inputs()[0]
+        input_size = (model_input.shape[3], model_input.shape[2])
+        inputs = [resize_input(frame, input_size) for frame in frames]
+        for frame in inputs[:warmup]:
+            session.run(None, {model_input.name: frame})
+
+        latencies = []
+        detections = []
+        for frame in inputs:
+            start = time.perf_counter()
+            prediction = session.run(None, {model_input.name: frame})[0]
+            latencies.append(time.perf_counter() - start)
+            detections.append(get_detections(prediction, input_size))
+
+        if reference is None:
+            reference = detections
+        matched = sum(match_detections(expected, found, tolerance) for expected, found in zip(reference, detections))
+        found = sum(len(found) for found in detections)
+        expected = sum(len(expected) for expected in reference)
+        precision = matched / found if found else 1.0
+        recall = matched / expected if expected else 1.0
+
+        latencies.sort()
+        results[variant] = {
+            "size_mb": os.path.getsize(variant_path) / 2**20,
+            "latency_median_ms": 1000 * statistics.median(latencies),
+            "latency_p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+            "frames_per_s": len(latencies) / sum(latencies),
+            "detections": found,
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the speed and detections of the model variants.")
+    parser.add_argument("--model", choices=list(MODELS), default="pieces")
+    parser.add_argument("--variants", nargs="+", choices=list(MODEL_VARIANTS), default=list(MODEL_VARIANTS),
+                        help="Variants to compare, the first one is the reference")
+    parser.add_argument("--video", help="Recorded video of a board, synthetic boards otherwise")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=8.0, help="Center distance of matching detections in model pixels")
+    args = parser.parse_args()
+
+    frames = get_calibration_frames(args.video, args.frames)
+    results = benchmark(MODELS[args.model], args.variants, frames, args.warmup, args.tolerance)
+
+    print(f"{'variant':<14} {'MB':>5} {'median ms':>10} {'p95 ms':>7} {'frames/s':>9} {'detections':>11} {'precision':>10} {'recall':>7} {'F1':>5}")
+    for variant, result in results.items():
+        print(f"{variant:<14} {result['size_mb']:>5.1f} {result['latency_median_ms']:>10.1f} {result['latency_p95_ms']:>7.1f} "
+              f"{result['frames_per_s']:>9.1f} {result['detections']:>11} {result['precision']:>10.2f} "
+              f"{result['recall']:>7.2f} {result['f1']:>5.2f}")
@@ -1,10 +1,9 @@
 import numpy as np
-import tensorflow as tf
 import time
 import onnxruntime as ort
 
 
-from logic.machine_learning.detection.piece_detection import detect
+from logic.machine_learning.detection.piece_detection import detect_pieces
 from logic.machine_learning.detection.bbox_scores import get_bbox_centers
 from logic.machine_learning.detection.corners_detection import extract_xy_from_labeled_corners
 from logic.machine_learning.utilities.move import san_to_lan, calculate_move_score, get_moves_pairs
@@ -12,54 +11,169 @@ from logic.machine_learning.game.game import make_update_payload
 from logic.machine_learning.view.render import draw_points, draw_polygon, draw_boxes_with_scores
 from logic.machine_learning.detection.run_detections import find_centers_and_boundary
 import logic.api.services.board_storage as storage
+from logic.api.entity.latency import LatencyTrace
+from logic.machine_learning.utilities.detection_executor import detection_executor
+from typing import Optional
 
 import time
 
-last_update_time = 0
-greedy_move_to_time = {}
+# Screening escalates candidate moves scoring above -SCREEN_MARGIN. On synthetic boards the low_res
+# pieces model scores frames without a new move at -0.25 at most and frames with one at -0.19 at least,
+# the margin sits between the two.
+SCREEN_MARGIN = 0.22
  
 async def get_payload(piece_model_ref: ort.InferenceSession,
                       video_ref: np.ndarray,
                       corners_ref: np.ndarray,
-                      board_id: int):
-    global greedy_move_to_time
-    global last_update_time
+                      board_id: int,
+                      trace: Optional[LatencyTrace] = None,
+                      screen_model_ref: Optional[ort.InferenceSession] = None,
+                      screen_margin: float = SCREEN_MARGIN):
+    """
+    Runs compute_payload in the detection executor, keeping the event loop free.
+
+    Args:
+        piece_model_ref (ort.InferenceSession): ONNX model for detecting chess pieces.
+        video_ref (np.ndarray): The input video frame.
+        corners_ref (np.ndarray): The labeled board corners.
+        board_id (int): ID of the board the frame belongs to.
+        trace (Optional[LatencyTrace]): Trace of the frame, the stages are marked on it.
+        screen_model_ref (Optional[ort.InferenceSession]): Cheaper pieces model to screen the frame with first, see screen_pieces.
+        screen_margin (float): How far below zero a candidate move still escalates to piece_model_ref.
+
+    Returns:
+        tuple: The frame and the update payload of a detected move, or None.
+    """
+    return await detection_executor.run(
+        compute_payload, piece_model_ref, video_ref, corners_ref, board_id, trace, screen_model_ref, screen_margin
+    )
 
-    # Get the correct board instance
+def compute_payload(piece_model_ref: ort.InferenceSession,
+                    video_ref: np.ndarray,
+                    corners_ref: np.ndarray,
+                    board_id: int,
+                    trace: Optional[LatencyTrace] = None,
+                    screen_model_ref: Optional[ort.InferenceSession] = None,
+                    screen_margin: float = SCREEN_MARGIN):
+    keypoints, centers_3d, boundary_3d = get_board_geometry(corners_ref, video_ref)
+
+    # Frames the screening model sees no candidate move on do not need the full model
+    moves_pairs_ref = None
+    if screen_model_ref is not None:
+        boxes, scores = detect_pieces(screen_model_ref, video_ref, keypoints)
+        moves_pairs_ref = get_moves_pairs(storage.boards[board_id].chess_board)
+        has_candidate = screen_pieces(moves_pairs_ref, boxes, scores, centers_3d, boundary_3d, screen_margin)
+        if trace is not None:
+            trace.mark("screen")
+        if not has_candidate:
+            return video_ref, None
+
+    boxes, scores = detect_pieces(piece_model_ref, video_ref, keypoints)
+    del piece_model_ref  # Free memory
+    if trace is not None:
+        trace.mark("detect")
+
+    payload = score_pieces(board_id, boxes, scores, centers_3d, boundary_3d, trace, moves_pairs_ref)
+
+    # draw_points(video_ref, centers)
+    # draw_polygon(video_ref, boundary)
+    # draw_boxes_with_scores(video_ref, boxes, scores)
+
+    return video_ref, payload
+
+
+def get_board_geometry(corners_ref: np.ndarray, video_ref: np.ndarray) -> tuple:
+    """
+    Computes the board keypoints and the square centers and boundary the detected pieces are mapped to.
+
+    Args:
+        corners_ref (np.ndarray): The labeled board corners.
+        video_ref (np.ndarray): A video frame, only its size is used.
+
+    Returns:
+        tuple: The keypoints, the 3D square centers and the 3D board boundary.
+    """
+    keypoints = extract_xy_from_labeled_corners(corners_ref, video_ref)
+    _, _, centers_3d, boundary_3d = find_centers_and_boundary(corners_ref, video_ref)
+    return keypoints, centers_3d, boundary_3d
+
+
+def screen_pieces(moves_pairs_ref: list,
+                  boxes: np.ndarray,
+                  scores: np.ndarray,
+                  centers_3d: np.ndarray,
+                  boundary_3d: np.ndarray,
+                  margin: float = SCREEN_MARGIN) -> bool:
+    """
+    Checks the pieces detected by a cheap screening pass for a move worth running the full model for.
+
+    The detections are scored like score_pieces does, without its update throttling and without
+    changing the board. Anything positive or within the margin of positive counts as a candidate.
+
+    Args:
+        moves_pairs_ref (list): Move pairs of the current position, see get_moves_pairs.
+        boxes (np.ndarray): Bounding boxes of the detected pieces.
+        scores (np.ndarray): Class scores of the detected pieces.
+        centers_3d (np.ndarray): Square centers, see get_board_geometry.
+        boundary_3d (np.ndarray): Board boundary, see get_board_geometry.
+        margin (float): How far below zero the best move may score and still be a candidate.
+
+    Returns:
+        bool: True if the frame has a positive or ambiguous candidate move.
+    """
+    update = get_update(scores, get_squares(boxes, centers_3d, boundary_3d))
+    state = update_state(np.zeros((64, 12)), update)
+    best_score1, _, _, _, _ = process_state(state, moves_pairs_ref, set())
+    return best_score1 > -margin
+
+
+def score_pieces(board_id: int,
+                 boxes: np.ndarray,
+                 scores: np.ndarray,
+                 centers_3d: np.ndarray,
+                 boundary_3d: np.ndarray,
+                 trace: Optional[LatencyTrace] = None,
+                 moves_pairs_ref: Optional[list] = None):
+    """
+    Maps the detected pieces to squares and plays the move they show, if any, on the board.
+
+    Args:
+        board_id (int): ID of the board the pieces were detected on.
+        boxes (np.ndarray): Bounding boxes of the detected pieces.
+        scores (np.ndarray): Class scores of the detected pieces.
+        centers_3d (np.ndarray): Square centers, see get_board_geometry.
+        boundary_3d (np.ndarray): Board boundary, see get_board_geometry.
+        trace (Optional[LatencyTrace]): Trace of the frame, the stages are marked on it.
+        moves_pairs_ref (Optional[list]): Move pairs of the current position if screening already got them.
+
+    Returns:
+        tuple: The update payload and the best move of a detected move, or None.
+    """
+    # Get the correct board instance, the throttling and greedy move state are kept per board
     game_ref = storage.boards[board_id]    
-    moves_pairs_ref: list = get_moves_pairs(game_ref.chess_board)
+    if moves_pairs_ref is None:
+        moves_pairs_ref = get_moves_pairs(game_ref.chess_board)
+        if trace is not None:
+            trace.mark("moves")
 
     # Internal state variables
-    centers = None
-    boundary = None
-    centers_3d = None
-    boundary_3d = None
-    state = None
+    state = np.zeros((64, 12))
     payload = None
-    keypoints = None
     possible_moves = set()
     
     last_move = game_ref.move_history[-1] if game_ref.move_history else None
-    
-    if centers is None:
-        keypoints = extract_xy_from_labeled_corners(corners_ref, video_ref)
-        centers, boundary, centers_3d, boundary_3d = find_centers_and_boundary(corners_ref, video_ref)
-        state = np.zeros((64, 12))
-        possible_moves = set()
-
-    boxes, scores = await detect(piece_model_ref, video_ref, keypoints)
-    del piece_model_ref  # Free memory
-    
 
     squares = get_squares(boxes, centers_3d, boundary_3d)
     
     update = np.zeros((64, 12))  # Default update
-    if time.time() - last_update_time >= 0.5:
+    if time.time() - game_ref.last_update_time >= 0.5:
         update = get_update(scores, squares)
-        last_update_time = time.time()
+        game_ref.last_update_time = time.time()
 
     # Update state
     state = update_state(state, update)
+    if trace is not None:
+        trace.mark("squares")
 
     # Get best moves
     best_score1, best_score2, best_joint_score, best_move, best_moves = process_state(
@@ -67,6 +181,8 @@ async def get_payload(piece_model_ref: ort.InferenceSession,
     )
 
     end_time = time.time()
+    if trace is not None:
+        trace.mark("state")
 
     has_move = False
     if best_moves is not None:
@@ -76,11 +192,12 @@ async def get_payload(piece_model_ref: ort.InferenceSession,
             game_ref.chess_board.push_san(move_str)
             last_move = game_ref.chess_board.peek().uci()
             possible_moves.clear()
-            greedy_move_to_time = {}  # Reset for greedy moves
+            game_ref.greedy_move_to_time = {}  # Reset for greedy moves
 
     has_greedy_move = False
     if best_move is not None and not has_move and best_score1 > 0:
         move_str = best_move["sans"][0]
+        greedy_move_to_time = game_ref.greedy_move_to_time
 
         if move_str not in greedy_move_to_time:
             greedy_move_to_time[move_str] = end_time
@@ -93,18 +210,13 @@ async def get_payload(piece_model_ref: ort.InferenceSession,
         if has_greedy_move:
             game_ref.chess_board.push_san(move_str)
             last_move = game_ref.chess_board.peek().uci()
-            greedy_move_to_time = {move_str: greedy_move_to_time[move_str]}  # Preserve last move time
+            game_ref.greedy_move_to_time = {move_str: greedy_move_to_time[move_str]}  # Preserve last move time
 
     if has_move or has_greedy_move:
         greedy = has_greedy_move
         payload = make_update_payload(game_ref.chess_board, greedy), best_move
 
-    # draw_points(video_ref, centers)
-    # draw_polygon(video_ref, boundary)
-    # draw_boxes_with_scores(video_ref, boxes, scores)
-    
-
-    return video_ref, payload
+    return payload
 
 
 
@@ -163,85 +275,62 @@ def process_state(state: np.ndarray, moves_pairs: list, possible_moves: set) ->
     return best_score1, best_score2, best_joint_score, best_move, best_moves
 
 
-def get_squares(boxes: tf.Tensor, centers3D: tf.Tensor, boundary3D: tf.Tensor) -> tf.Tensor:
+def get_squares(boxes: np.ndarray, centers3D: np.ndarray, boundary3D: np.ndarray) -> np.ndarray:
     """
     Given the boxes, centers, and boundary, computes the square for each box by 
     determining the index of the minimum distance between box centers and the provided centers.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 6) representing N 3D boxes. Each box is 
-                            represented by its (xmin, ymin, zmin, xmax, ymax, zmax).
-        centers3D (tf.Tensor): A tensor of shape (M, 3) representing M 3D centers.
-        boundary3D (tf.Tensor): A tensor of shape (1, 4, 2) representing boundary coordinates for the boxes.
+        boxes (np.ndarray): An array of shape (N, 4) representing N boxes as [left, top, right, bottom].
+        centers3D (np.ndarray): An array of shape (1, 64, 2) representing the centers of the squares.
+        boundary3D (np.ndarray): An array of shape (1, 4, 2) representing boundary coordinates for the boxes.
 
     Returns:
-        tf.Tensor: A tensor of shape (N,) representing the square (index) for each box based on the distance to centers3D.
+        np.ndarray: An array of shape (N,) representing the square (index) for each box based on the distance to centers3D.
     """
-    with tf.device('/CPU:0'):
-        # Get the box centers
-        box_centers_3D = tf.expand_dims(get_bbox_centers(boxes), 1)
-
-        # Calculate distances
-        dist = tf.reduce_sum(tf.square(box_centers_3D - centers3D), axis=2)
-
-        # Get squares by finding the index of minimum distances
-        squares = tf.argmin(dist, axis=1)
-
-        # Shift the boundary3D tensor
-        shifted_boundary_3D = tf.concat([
-            tf.slice(boundary3D, [0, 1, 0], [1, 3, 2]),
-            tf.slice(boundary3D, [0, 0, 0], [1, 1, 2]),
-        ], axis=1)
-
-        n_boxes = tf.shape(box_centers_3D)[0]
-
-        # Calculate a, b, c, and d tensors
-        a = tf.squeeze(tf.subtract(
-            tf.slice(boundary3D, [0, 0, 0], [1, 4, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 0], [1, 4, 1])
-        ), axis=2)
-
-        b = tf.squeeze(tf.subtract(
-            tf.slice(boundary3D, [0, 0, 1], [1, 4, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 1], [1, 4, 1])
-        ), axis=2)
-
-        c = tf.squeeze(tf.subtract(
-            tf.slice(box_centers_3D, [0, 0, 0], [n_boxes, 1, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 0], [1, 4, 1])
-        ), axis=2)
-
-        d = tf.squeeze(tf.subtract(
-            tf.slice(box_centers_3D, [0, 0, 1], [n_boxes, 1, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 1], [1, 4, 1])
-        ), axis=2)
-
-        # Calculate determinant
-        det = tf.subtract(tf.multiply(a, d), tf.multiply(b, c))
-
-        # Apply tf.where condition for negative det values
-        # Determinant is negative for all values so new_squares isn't used
-        new_squares = tf.where(
-            tf.reduce_any(tf.less(det, 0), axis=1),  # Check if any det < 0 along axis 1
-            tf.constant(-1, dtype=squares.dtype),    # Replace with -1
-            squares                                   # Otherwise, keep original squares
-        )
-
-        return squares
-
-def get_update(scores_tensor: tf.Tensor, squares: tf.Tensor) -> np.ndarray:
+    # Get the box centers
+    box_centers_3D = np.expand_dims(get_bbox_centers(boxes), 1)
+
+    # Calculate distances
+    dist = np.sum(np.square(box_centers_3D - centers3D), axis=2)
+
+    # Get squares by finding the index of minimum distances
+    squares = np.argmin(dist, axis=1)
+
+    # Shift the boundary3D array
+    shifted_boundary_3D = np.concatenate([boundary3D[:, 1:4], boundary3D[:, 0:1]], axis=1)
+
+    # Calculate a, b, c, and d arrays
+    a = boundary3D[:, :, 0] - shifted_boundary_3D[:, :, 0]
+    b = boundary3D[:, :, 1] - shifted_boundary_3D[:, :, 1]
+    c = box_centers_3D[:, :, 0] - shifted_boundary_3D[:, :, 0]
+    d = box_centers_3D[:, :, 1] - shifted_boundary_3D[:, :, 1]
+
+    # Calculate determinant
+    det = a * d - b * c
+
+    # Apply np.where condition for negative det values
+    # Determinant is negative for all values so new_squares isn't used
+    new_squares = np.where(
+        np.any(det < 0, axis=1),  # Check if any det < 0 along axis 1
+        -1,                       # Replace with -1
+        squares                   # Otherwise, keep original squares
+    )
+
+    return squares
+
+def get_update(scores: np.ndarray, squares: np.ndarray) -> np.ndarray:
     """
-    Given a tensor of scores and squares, this function groups the scores based on the square indices,
+    Given an array of scores and squares, this function groups the scores based on the square indices,
     and computes the maximum value for each group to update the state.
 
     Args:
-        scores_tensor (tf.Tensor): A tensor of shape (N, 12) containing scores for each box.
-        squares (tf.Tensor): A tensor of shape (N,) containing square indices for each box.
+        scores (np.ndarray): An array of shape (N, 12) containing scores for each box.
+        squares (np.ndarray): An array of shape (N,) containing square indices for each box.
 
     Returns:
         np.ndarray: An array of shape (64, 12) where each row corresponds to the maximum score for that square.
     """
-    scores = scores_tensor.numpy()
     update = np.zeros((64, 12))
 
     grouped = {i: [] for i in range(64)}
@@ -0,0 +1,168 @@
+import asyncio
+import numpy as np
+import onnxruntime as ort
+import logic.api.services.board_storage as storage
+
+from typing import Optional
+from logic.api.entity.latency import LatencyTrace
+from logic.machine_learning.board_state.map_pieces import SCREEN_MARGIN, get_board_geometry, score_pieces, screen_pieces
+from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores
+from logic.machine_learning.utilities.bound_session import BoundSession
+from logic.machine_learning.utilities.move import get_moves_pairs
+from logic.machine_learning.utilities.preprocess import get_input
+from logic.machine_learning.utilities.stage_pipeline import StagePipeline
+
+
+class PipelineFrame:
+    """ A frame on its way through the PayloadPipeline, with what every stage hands to the next. """
+
+    def __init__(
+        self,
+        frame: np.ndarray,
+        trace: Optional[LatencyTrace],
+        bound_session: BoundSession,
+        screen_session: Optional[BoundSession] = None
+    ):
+        self.frame = frame
+        self.trace = trace
+        self.bound_session = bound_session
+        self.screen_session = screen_session
+        self.frame_height, self.frame_width, _ = frame.shape
+        self.crop = None
+        self.screen_crop = None
+        self.board = None
+        self.prediction = None
+
+    def mark(self, stage: str) -> None:
+        """ Mark a stage on the trace of the frame, if it has one. """
+        if self.trace is not None:
+            self.trace.mark(stage)
+
+
+class PayloadPipeline:
+    """
+    Detects the moves of a board with preprocessing, inference and scoring of consecutive frames overlapped.
+
+    Runs the same steps as compute_payload in board_state/map_pieces.py, split into the stages of a
+    StagePipeline: while frame N is in the pieces model, frame N+1 is letterboxed into the model input
+    and frame N-1 is mapped to squares and scored against the legal moves. The moves come out in
+    frame order, scoring runs one frame at a time just like compute_payload.
+
+    Every frame in flight has a bound session of its own, so preprocessing never writes into an
+    input the model is still reading and scoring never reads outputs the next run overwrites.
+
+    With a screening model the inference stage runs that instead, and the scoring stage only runs
+    the full model on the frames screen_pieces finds a candidate move on. Both inputs are prepared
+    up front, the frame itself is not kept past preprocessing.
+    """
+
+    def __init__(
+        self,
+        piece_model_ref: ort.InferenceSession,
+        corners_ref: np.ndarray,
+        board_id: int,
+        depth: int = 3,
+        screen_model_ref: Optional[ort.InferenceSession] = None,
+        screen_margin: float = SCREEN_MARGIN
+    ):
+        """
+        Initialize the pipeline and start its stages.
+
+        Args:
+            piece_model_ref (ort.InferenceSession): ONNX model for detecting chess pieces.
+            corners_ref (np.ndarray): The labeled board corners.
+            board_id (int): ID of the board the frames belong to.
+            depth (int): Maximum number of frames in flight, one per stage keeps every stage busy.
+            screen_model_ref (Optional[ort.InferenceSession]): Cheaper pieces model to screen every frame with first.
+            screen_margin (float): How far below zero a candidate move still escalates to piece_model_ref.
+        """
+        self.corners_ref = corners_ref
+        self.board_id = board_id
+        self.screen_margin = screen_margin
+        self.bound_sessions = [BoundSession(piece_model_ref) for _ in range(depth)]
+        self.screen_sessions = [None] * depth
+        if screen_model_ref is not None:
+            self.screen_sessions = [BoundSession(screen_model_ref) for _ in range(depth)]
+        self.submitted = 0
+        self.geometry_key = None
+        self.geometry = None
+        self.pipeline = StagePipeline(
+            [("preprocess", self._preprocess), ("infer", self._infer), ("score", self._score)],
+            depth, name=f"board-{board_id}"
+        )
+
+    async def submit(self, frame: np.ndarray, trace: Optional[LatencyTrace] = None) -> "asyncio.Future":
+        """
+        Put a frame into the pipeline, waiting while it is full.
+
+        Args:
+            frame (np.ndarray): The video frame, read by the preprocessing stage only.
+            trace (Optional[LatencyTrace]): Trace of the frame, the stages are marked on it.
+
+        Returns:
+            asyncio.Future: Resolves to the update payload of a detected move, or None, see score_pieces. Raises
+                FrameOverwrittenError if the frame is a view into a frame ring that was overwritten before preprocessing.
+        """
+        # A bound session is free again once the frame that used it depth frames ago has left the pipeline
+        slot = self.submitted % len(self.bound_sessions)
+        item = PipelineFrame(frame, trace, self.bound_sessions[slot], self.screen_sessions[slot])
+        future = await self.pipeline.submit(item)
+        self.submitted += 1
+        return future
+
+    def close(self) -> None:
+        """ Stop the stages after the frames in flight. """
+        self.pipeline.close()
+
+    def _get_geometry(self, frame: np.ndarray) -> tuple:
+        """ Get the board geometry, it only changes with the frame size. """
+        if self.geometry_key != frame.shape:
+            self.geometry = get_board_geometry(self.corners_ref, frame)
+            self.geometry_key = frame.shape
+        return self.geometry
+
+    def _preprocess(self, item: PipelineFrame) -> PipelineFrame:
+        keypoints, centers_3d, boundary_3d = self._get_geometry(item.frame)
+        _, width, height, padding, roi = get_input(item.frame, keypoints, buffer=item.bound_session.input_buffer)
+        item.crop = (width, height, padding, roi)
+        if item.screen_session is not None:
+            _, width, height, padding, roi = get_input(item.frame, keypoints, buffer=item.screen_session.input_buffer)
+            item.screen_crop = (width, height, padding, roi)
+        item.board = (centers_3d, boundary_3d)
+        item.frame = None
+        item.mark("preprocess")
+        return item
+
+    def _infer(self, item: PipelineFrame) -> PipelineFrame:
+        if item.screen_session is not None:
+            item.prediction = item.screen_session.run()[0]
+            item.mark("screen")
+        else:
+            item.prediction = item.bound_session.run()[0]
+            item.mark("detect")
+        return item
+
+    def _decode(self, item: PipelineFrame, bound_session: BoundSession, crop: tuple) -> tuple:
+        """ Get the boxes and scores of the prediction of a frame. """
+        width, height, padding, roi = crop
+        boxes, scores = get_boxes_and_scores(
+            item.prediction, width, height, item.frame_width, item.frame_height, padding, roi, bound_session.input_size
+        )
+        item.prediction = None
+        return boxes, scores
+
+    def _score(self, item: PipelineFrame):
+        centers_3d, boundary_3d = item.board
+        moves_pairs_ref = None
+        if item.screen_session is not None:
+            boxes, scores = self._decode(item, item.screen_session, item.screen_crop)
+            # Moves are only played by this stage, the position cannot change until the frame is scored
+            moves_pairs_ref = get_moves_pairs(storage.boards[self.board_id].chess_board)
+            if not screen_pieces(moves_pairs_ref, boxes, scores, centers_3d, boundary_3d, self.screen_margin):
+                return None
+            # Escalations are rare, the full model runs right here instead of going around the pipeline again
+            item.prediction = item.bound_session.run()[0]
+            item.mark("detect")
+
+        boxes, scores = self._decode(item, item.bound_session, item.crop)
+        return score_pieces(self.board_id, boxes, scores, centers_3d, boundary_3d, item.trace, moves_pairs_ref)
@@ -0,0 +1,71 @@
+import unittest
+import chess
+import numpy as np
+import logic.api.services.board_storage as storage
+from logic.api.entity.board import Board
+from logic.machine_learning.board_state.map_pieces import SCREEN_MARGIN, score_pieces, screen_pieces
+from logic.machine_learning.utilities.constants import LABEL_MAP
+from logic.machine_learning.utilities.move import get_moves_pairs
+
+# Square centers of a 480x288 board in chess square order, a1 bottom left, and its boundary
+CENTERS_3D = np.array(
+    [[(chess.square_file(square) * 60 + 30, (7 - chess.square_rank(square)) * 36 + 18) for square in chess.SQUARES]],
+    dtype=np.float32
+)
+BOUNDARY_3D = np.array([[[0, 0], [480, 0], [480, 288], [0, 288]]], dtype=np.float32)
+
+def detect(board: chess.Board) -> tuple:
+    """ Boxes and scores of every piece of a position, detected with full confidence on its square. """
+    boxes, scores = [], []
+    for square, piece in board.piece_map().items():
+        x, y = CENTERS_3D[0, square]
+        # get_bbox_centers puts the piece a third of the box width above the bottom
+        boxes.append([x - 10, y - 20, x + 10, y + 20 / 3])
+        scores.append(np.eye(12)[LABEL_MAP[piece.symbol()]])
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4), np.array(scores, dtype=np.float32).reshape(-1, 12)
+
+class TestScreenPieces(unittest.TestCase):
+    """ Unit tests for the screen_pieces function. """
+
+    def setUp(self) -> None:
+        self.moves_pairs = get_moves_pairs(chess.Board())
+
+    def test_unchanged_position_is_not_a_candidate(self) -> None:
+        """ Test that the position the board is in scores far below the margin. """
+        self.assertFalse(screen_pieces(self.moves_pairs, *detect(chess.Board()), CENTERS_3D, BOUNDARY_3D))
+
+    def test_played_move_is_a_candidate(self) -> None:
+        """ Test that the position after a legal move escalates. """
+        board = chess.Board()
+        board.push_san("e4")
+        self.assertTrue(screen_pieces(self.moves_pairs, *detect(board), CENTERS_3D, BOUNDARY_3D))
+
+    def test_margin_admits_near_misses(self) -> None:
+        """ Test that a best move just below zero escalates within the margin only. """
+        # Without any detection every move scores 1 - 0.6 on its empty from square and -0.6 on its to square
+        no_pieces = (np.zeros((0, 4), dtype=np.float32), np.zeros((0, 12), dtype=np.float32))
+        self.assertTrue(screen_pieces(self.moves_pairs, *no_pieces, CENTERS_3D, BOUNDARY_3D, SCREEN_MARGIN))
+        self.assertFalse(screen_pieces(self.moves_pairs, *no_pieces, CENTERS_3D, BOUNDARY_3D, 0.1))
+
+class TestScorePieces(unittest.TestCase):
+    """ Unit tests for the score_pieces function. """
+
+    def setUp(self) -> None:
+        self.boards = storage.boards
+        storage.boards = {board_id: Board(board_id, lazy_open=True) for board_id in (1, 2)}
+
+    def tearDown(self) -> None:
+        storage.boards = self.boards
+
+    def test_state_is_kept_per_board(self) -> None:
+        """ Test that scoring a frame of one board neither throttles nor resets the other board. """
+        storage.boards[2].greedy_move_to_time = {"e4": 1.0}
+        no_pieces = (np.zeros((0, 4), dtype=np.float32), np.zeros((0, 12), dtype=np.float32))
+
+        score_pieces(1, *no_pieces, CENTERS_3D, BOUNDARY_3D)
+        self.assertGreater(storage.boards[1].last_update_time, 0)
+        self.assertEqual(storage.boards[2].last_update_time, 0)
+        self.assertEqual(storage.boards[2].greedy_move_to_time, {"e4": 1.0})
+
+if __name__ == "__main__":
+    unittest.main()
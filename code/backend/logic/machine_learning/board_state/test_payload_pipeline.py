@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import unittest
+import numpy as np
+import logic.api.services.board_storage as storage
+from types import SimpleNamespace
+from unittest import mock
+from logic.api.entity.board import Board
+from logic.api.entity.shared_frame_ring import FrameOverwrittenError, SharedFrameRing
+from logic.machine_learning.board_state import map_pieces, payload_pipeline
+from logic.machine_learning.board_state.payload_pipeline import PayloadPipeline
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+KEYPOINTS = np.array([[60, 40], [420, 40], [420, 250], [60, 250]], dtype=np.float32)
+GEOMETRY = (KEYPOINTS, np.zeros((1, 64, 2), dtype=np.float32), np.zeros((1, 4, 2), dtype=np.float32))
+
+class MarkerSession:
+    """ Session stand-in that detects one piece whose class score is the value at the center of its input. """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.runs = 0
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="images", shape=[1, 3, MODEL_HEIGHT, MODEL_WIDTH], type="tensor(float16)")]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name="output0", shape=[1, 16, 2], type="tensor(float)")]
+
+    def run(self, output_names, input_feed):
+        self.runs += 1
+        marker = float(input_feed["images"][0, 0, MODEL_HEIGHT // 2, MODEL_WIDTH // 2])
+        threading.Event().wait(self.delay)
+        prediction = np.zeros((1, 16, 2), dtype=np.float32)
+        prediction[0, :4, 0] = [MODEL_WIDTH / 2, MODEL_HEIGHT / 2, 20, 30]
+        prediction[0, 4 + int(marker * 255) % 12, 0] = marker
+        return [prediction]
+
+def score_detections(board_id, boxes, scores, centers_3d, boundary_3d, trace=None, moves_pairs_ref=None):
+    """ score_pieces stand-in whose payload is everything it was given about the detections. """
+    return board_id, boxes.tolist(), scores.tolist()
+
+def make_frames(count: int) -> list:
+    """ Frames filled with a different value each, which ends up as the piece score. """
+    return [np.full((360, 640, 3), 120 + 9 * index, dtype=np.uint8) for index in range(count)]
+
+class TracingPipeline(PayloadPipeline):
+    """ Pipeline that fails a frame whose bound session is still used by a frame in flight. """
+
+    def __init__(self, *args, **kwargs):
+        self.in_flight = set()
+        self.reused = 0
+        super().__init__(*args, **kwargs)
+
+    def _preprocess(self, item):
+        if id(item.bound_session) in self.in_flight:
+            self.reused += 1
+        self.in_flight.add(id(item.bound_session))
+        return super()._preprocess(item)
+
+    def _score(self, item):
+        try:
+            return super()._score(item)
+        finally:
+            self.in_flight.discard(id(item.bound_session))
+
+@mock.patch.object(payload_pipeline, "score_pieces", score_detections)
+@mock.patch.object(map_pieces, "score_pieces", score_detections)
+@mock.patch.object(payload_pipeline, "get_board_geometry", lambda corners, frame: GEOMETRY)
+@mock.patch.object(map_pieces, "get_board_geometry", lambda corners, frame: GEOMETRY)
+class TestPayloadPipeline(unittest.TestCase):
+    """ Unit tests for the PayloadPipeline class. """
+
+    def run_pipeline(self, pipeline: PayloadPipeline, frames: list) -> list:
+        """ Submit the frames and get their payloads in submission order. """
+        async def main() -> list:
+            futures = [await pipeline.submit(frame) for frame in frames]
+            return [await future for future in futures]
+        try:
+            return asyncio.run(main())
+        finally:
+            pipeline.close()
+
+    def test_same_payloads_as_serial(self) -> None:
+        """ Test that the pipelined path gives the payloads of compute_payload, in frame order. """
+        session = MarkerSession()
+        frames = make_frames(8)
+        expected = [map_pieces.compute_payload(session, frame, None, 1)[1] for frame in frames]
+
+        payloads = self.run_pipeline(PayloadPipeline(session, None, 1), frames)
+        self.assertEqual(payloads, expected)
+        self.assertEqual(len({str(payload) for payload in payloads}), len(frames))
+
+    def test_slot_is_not_reused_in_flight(self) -> None:
+        """ Test that a bound session is only given to a new frame once the frame that used it has been scored. """
+        pipeline = TracingPipeline(MarkerSession(delay=0.02), None, 1, depth=2)
+        frames = make_frames(8)
+        payloads = self.run_pipeline(pipeline, frames)
+
+        self.assertEqual(pipeline.reused, 0)
+        # Every frame was inferred on its own input, not one overwritten by a later frame
+        markers = [max(max(scores) for scores in payload[2]) for payload in payloads]
+        np.testing.assert_allclose(markers, [frame[0, 0, 0] / 255 for frame in frames], atol=1e-3)
+
+    def test_overwritten_frame_fails_alone(self) -> None:
+        """ Test that a ring frame overwritten before it was letterboxed fails its future, not the frames after it. """
+        ring = SharedFrameRing((360, 640, 3), slots=2)
+        frames = make_frames(3)
+        for sequence, frame in enumerate(frames[:2], start=1):
+            ring.write(frame, sequence, 0.0)
+        views = [ring.read(1)[0], ring.read(2)[0]]
+        ring.write(frames[2], 3, 0.0)
+        pipeline = PayloadPipeline(MarkerSession(), None, 1)
+
+        async def main() -> list:
+            futures = [await pipeline.submit(view) for view in views]
+            return await asyncio.gather(*futures, return_exceptions=True)
+        try:
+            results = asyncio.run(main())
+        finally:
+            pipeline.close()
+
+        self.assertIsInstance(results[0], FrameOverwrittenError)
+        self.assertEqual(results[1], map_pieces.compute_payload(MarkerSession(), frames[1], None, 1)[1])
+        del views, results
+        ring.unlink()
+
+    def test_cascade_escalates_candidates_only(self) -> None:
+        """ Test that the full model only runs on the frames screening finds a candidate move on. """
+        boards = storage.boards
+        storage.boards = {1: Board(1, lazy_open=True)}
+        screened = []
+
+        def screen_markers(moves_pairs_ref, boxes, scores, centers_3d, boundary_3d, margin):
+            screened.append((len(moves_pairs_ref), margin))
+            return scores.max() > 0.6
+
+        full, screen = MarkerSession(), MarkerSession()
+        try:
+            with mock.patch.object(payload_pipeline, "screen_pieces", screen_markers):
+                payloads = self.run_pipeline(PayloadPipeline(full, None, 1, screen_model_ref=screen, screen_margin=0.3), make_frames(8))
+        finally:
+            storage.boards = boards
+
+        # Frames 4 to 7 have markers above 0.6
+        self.assertEqual([payload is not None for payload in payloads], [False] * 4 + [True] * 4)
+        self.assertEqual((screen.runs, full.runs), (8, 4))
+        # Move pairs of the starting position, 20 moves with 20 replies each
+        self.assertEqual(screened, [(400, 0.3)] * 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,112 +1,152 @@
 
 import numpy as np
-import tensorflow as tf
 
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
 from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, MARKER_DIAMETER
 
-def process_boxes_and_scores(boxes: tf.Tensor, scores: tf.Tensor) -> np.ndarray:
+# Anchors scoring at most this on every class are not decoded. Non-max suppression only keeps boxes
+# scoring above 0.1, and on a square with no other box a dropped anchor moves its scores in get_update
+# by less than the floor.
+SCORE_FLOOR = 0.05
+
+def process_boxes_and_scores(boxes: np.ndarray, scores: np.ndarray) -> np.ndarray:
     """
     Processes bounding boxes and scores to apply non-max suppression (NMS),
     extract centers of selected boxes, and concatenate them with their class indices.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (num_boxes, 4), representing bounding box coordinates [x_min, y_min, x_max, y_max].
-        scores (tf.Tensor): A tensor of shape (num_boxes, num_classes), representing the classification scores for each box.
+        boxes (np.ndarray): An array of shape (num_boxes, 4), representing bounding box coordinates [x_min, y_min, x_max, y_max].
+        scores (np.ndarray): An array of shape (num_boxes, num_classes), representing the classification scores for each box.
 
     Returns:
         np.ndarray: A NumPy array containing the centers of the selected bounding boxes and their corresponding class indices.
     """
-    max_scores: tf.Tensor = tf.reduce_max(scores, axis=1)
-    argmax_scores: tf.Tensor = tf.argmax(scores, axis=1)
-    nms: tf.Tensor = tf.image.non_max_suppression(boxes, max_scores, max_output_size=100, iou_threshold=0.3, score_threshold=0.1)
+    max_scores: np.ndarray = np.max(scores, axis=1)
+    argmax_scores: np.ndarray = np.argmax(scores, axis=1)
+    nms: np.ndarray = non_max_suppression(boxes, max_scores, max_output_size=100, iou_threshold=0.3, score_threshold=0.1)
     
     # Use get_centers function to get the centers from the selected boxes
-    centers_bbox: tf.Tensor = get_centers_of_bbox(tf.gather(boxes, nms, axis=0))
+    centers_bbox: np.ndarray = get_centers_of_bbox(boxes[nms])
 
     # Gather the class indices of the selected boxes and expand dimensions
-    class_indices: tf.Tensor = tf.expand_dims(tf.gather(argmax_scores, nms, axis=0), axis=1)
+    class_indices: np.ndarray = argmax_scores[nms, np.newaxis]
 
     # Cast cls to float16 (ensure it's compatible with centers)
-    class_indices: tf.Tensor = tf.cast(class_indices, dtype=tf.float16)
+    class_indices = class_indices.astype(np.float16)
 
     # Concatenate the centers with the class indices
-    res: tf.Tensor = tf.concat([centers_bbox, class_indices], axis=1)
-
-    res_array: np.ndarray = res.numpy()
+    res_array: np.ndarray = np.concatenate([centers_bbox, class_indices], axis=1)
     
     return res_array
 
-def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width: int, video_height: int, padding: Tuple[int, int, int, int], roi: Tuple[int, int]
-) -> Tuple[tf.Tensor, tf.Tensor]:
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    max_output_size: int,
+    iou_threshold: float,
+    score_threshold: float
+) -> np.ndarray:
+    """
+    Greedily selects boxes by descending score, removing boxes that overlap a selected box too much.
+
+    Matches tf.image.non_max_suppression: boxes need a score above score_threshold, a box is removed
+    when its IoU with a selected box is above iou_threshold and ties are broken by the lower index.
+
+    Args:
+        boxes (np.ndarray): An array of shape (num_boxes, 4) with two opposite corners of each box.
+        scores (np.ndarray): An array of shape (num_boxes,) with the score of each box.
+        max_output_size (int): Maximum number of boxes to select.
+        iou_threshold (float): Overlap above which a box is removed.
+        score_threshold (float): Score a box needs to be considered.
+
+    Returns:
+        np.ndarray: Indices of the selected boxes, by descending score.
+    """
+    candidates = np.flatnonzero(scores > score_threshold)
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    candidate_boxes = boxes[candidates]
+    x1 = np.minimum(candidate_boxes[:, 0], candidate_boxes[:, 2])
+    y1 = np.minimum(candidate_boxes[:, 1], candidate_boxes[:, 3])
+    x2 = np.maximum(candidate_boxes[:, 0], candidate_boxes[:, 2])
+    y2 = np.maximum(candidate_boxes[:, 1], candidate_boxes[:, 3])
+    areas = (x2 - x1) * (y2 - y1)
+
+    selected: List[int] = []
+    suppressed = np.zeros(candidates.size, dtype=bool)
+    for i in range(candidates.size):
+        if suppressed[i]:
+            continue
+        selected.append(candidates[i])
+        if len(selected) == max_output_size:
+            break
+
+        # Overlap with the lower scored candidates, compared without dividing by the union
+        rest = slice(i + 1, None)
+        intersection = (
+            np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0) *
+            np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        )
+        union = areas[i] + areas[rest] - intersection
+        suppressed[rest] |= intersection > iou_threshold * union
+
+    return np.array(selected, dtype=np.int64)
+
+def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width: int, video_height: int, padding: Tuple[int, int, int, int], roi: Tuple[int, int],
+                         input_size: Tuple[int, int] = (MODEL_WIDTH, MODEL_HEIGHT), score_floor: float = SCORE_FLOOR, top_k: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
     """
     This function processes predictions to extract bounding boxes and their associated scores.
 
+    Only the anchors whose best class score is above score_floor are decoded, most anchors of a frame
+    score close to zero on every class. The kept anchors stay in anchor order.
+
     Args:
-        preds: The predictions array with shape (batch_size, num_boxes, num_predictions).
+        preds: The predictions array with shape (1, 4 + num_classes, num_anchors).
         width: The width to scale the bounding box coordinates to.
         height: The height to scale the bounding box coordinates to.
         video_width: The width of the video for further scaling.
         video_height: The height of the video for further scaling.
         padding: The padding to adjust the bounding boxes.
         roi: The region of interest, which is added to the bounding box coordinates.
+        input_size: Width and height of the model input the predictions are in, see InputBuffer in utilities/preprocess.py.
+        score_floor: Best class score an anchor needs to be decoded, 0 decodes every anchor.
+        top_k: Maximum number of anchors to decode, the best scored ones. None keeps every anchor above the floor.
 
     Returns:
-        A tuple containing the bounding boxes and scores as Tensor2D tensors.
-    """
-    
-    # Transpose preds to match the desired shape
-    preds_t = np.transpose(preds, (0, 2, 1))  # Shape: (batch_size, num_predictions, num_boxes)
-    
-    # Extract width (w) and height (h) of the boxes
-    w = preds_t[:, :, 2:3]  
-    h = preds_t[:, :, 3:4]  
-    
-    # Convert xc, yc, w, h to l, t, r, b (left, top, right, bottom)
-    l = preds_t[:, :, 0:1] - (w / 2)  # Left
-    t = preds_t[:, :, 1:2] - (h / 2)  # Top
-    r = l + w  # Right
-    b = t + h  # Bottom
-
-    # Apply padding to the bounding box coordinates
-    l -= padding[0]
-    r -= padding[0]
-    t -= padding[2]
-    b -= padding[2]
-
-    # Scale the bounding box coordinates to the target size
-    l *= (width / (MODEL_WIDTH - padding[0] - padding[1]))
-    r *= (width / (MODEL_WIDTH - padding[0] - padding[1]))
-    t *= (height / (MODEL_HEIGHT - padding[2] - padding[3]))
-    b *= (height / (MODEL_HEIGHT - padding[2] - padding[3]))
-
-    # Add ROI (Region of Interest)
-    l += roi[0]
-    r += roi[0]
-    t += roi[1]
-    b += roi[1]
-
-    # Scale based on video size
-    l *= (MODEL_WIDTH / video_width)
-    r *= (MODEL_WIDTH / video_width)
-    t *= (MODEL_HEIGHT / video_height)
-    b *= (MODEL_HEIGHT / video_height)
-    
-    # Concatenate the left, top, right, and bottom coordinates to form the bounding boxes
-    boxes = np.concatenate([l, t, r, b], axis=2) 
-
-    # Extract the scores (assuming score is in the 5th element onward)
-    scores = preds_t[:, :, 4:] 
+        A tuple containing the bounding boxes and scores as float32 arrays of shape (num_boxes, 4) and (num_boxes, num_classes).
 
-    # Squeeze to remove unnecessary dimensions (if any)
-    boxes = np.squeeze(boxes, axis=0)
-    scores = np.squeeze(scores, axis=0)
+    Raises:
+        ValueError: If top_k is not a positive integer.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError("Top k must be a positive integer.")
+
+    preds = preds[0]  # Shape: (4 + num_classes, num_anchors)
+
+    # Select the anchors before decoding anything
+    max_scores = preds[4:].max(axis=0)
+    keep = np.flatnonzero(max_scores > score_floor) if score_floor > 0 else np.arange(preds.shape[1])
+    if top_k is not None and keep.size > top_k:
+        keep = np.sort(keep[np.argpartition(-max_scores[keep], top_k - 1)[:top_k]])
+    selected = preds[:, keep].astype(np.float32)
+
+    # Padding, scaling to the crop, the ROI offset and scaling to the video fold into one scale and offset per axis
+    input_width, input_height = input_size
+    scale_x = width / (input_width - padding[0] - padding[1])
+    scale_y = height / (input_height - padding[2] - padding[3])
+    video_x = MODEL_WIDTH / video_width
+    video_y = MODEL_HEIGHT / video_height
+    scale = np.array([scale_x * video_x, scale_y * video_y] * 2, dtype=np.float32)[:, np.newaxis]
+    offset = np.array([
+        (roi[0] - padding[0] * scale_x) * video_x, (roi[1] - padding[2] * scale_y) * video_y
+    ] * 2, dtype=np.float32)[:, np.newaxis]
 
-    # Convert to TensorFlow tensors
-    boxes_tf = tf.convert_to_tensor(boxes, dtype=tf.float32)
-    scores_tf = tf.convert_to_tensor(scores, dtype=tf.float32)
+    # Convert xc, yc, w, h to l, t, r, b (left, top, right, bottom)
+    left_top = selected[0:2] - selected[2:4] / 2
+    boxes = np.concatenate([left_top, left_top + selected[2:4]]) * scale + offset
 
-    return boxes_tf, scores_tf
+    return np.ascontiguousarray(boxes.T), np.ascontiguousarray(selected[4:].T)
 
 
 def get_bbox(points: List[Tuple[float, float]]) -> Dict[str, float]:
@@ -148,7 +188,7 @@ def get_bbox(points: List[Tuple[float, float]]) -> Dict[str, float]:
     return bbox
 
 
-def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
+def get_centers_of_bbox(boxes: np.ndarray) -> np.ndarray:
     """
     Calculates the center coordinates of bounding boxes.
 
@@ -158,15 +198,15 @@ def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
     for consistency with the model's data type.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 4), where each row represents 
+        boxes (np.ndarray): An array of shape (N, 4), where each row represents 
                             a bounding box with the format [left, top, right, bottom].
 
     Returns:
-        tf.Tensor: A tensor of shape (N, 2), where each row contains the center 
+        np.ndarray: An array of shape (N, 2), where each row contains the center 
                    coordinates [cx, cy] of the corresponding bounding box.
     """
     # Ensure boxes are of type float16 (as your model is using float16)
-    boxes = tf.cast(boxes, dtype=tf.float16)
+    boxes = boxes.astype(np.float16)
 
     # Extract left, top, right, and bottom coordinates
     l = boxes[:, 0:1]
@@ -178,34 +218,34 @@ def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
     cx = (l + r) / 2
     cy = (t + b) / 2
 
-    centers = tf.concat([cx, cy], axis=1)
+    centers = np.concatenate([cx, cy], axis=1)
     
     return centers
 
 
-def get_bbox_centers(boxes: tf.Tensor) -> tf.Tensor:
+def get_bbox_centers(boxes: np.ndarray) -> np.ndarray:
     """
     Calculates the center coordinates (cx, cy) of bounding boxes.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 4), where each row represents 
+        boxes (np.ndarray): An array of shape (N, 4), where each row represents 
                            a bounding box in the format [left, top, right, bottom].
 
     Returns:
-        tf.Tensor: A tensor of shape (N, 2), where each row contains the center 
+        np.ndarray: An array of shape (N, 2), where each row contains the center 
                    coordinates [cx, cy] of the corresponding bounding box.
     """
-    # Slice the boxes tensor to get l, r, and b
-    l = tf.cast(boxes[:, 0:1], tf.float32)  # Ensure l is float32
-    r = tf.cast(boxes[:, 2:3], tf.float32)  # Ensure r is float32
-    b = tf.cast(boxes[:, 3:4], tf.float32)  # Ensure b is float32
+    # Slice the boxes array to get l, r, and b
+    l = boxes[:, 0:1].astype(np.float32)  # Ensure l is float32
+    r = boxes[:, 2:3].astype(np.float32)  # Ensure r is float32
+    b = boxes[:, 3:4].astype(np.float32)  # Ensure b is float32
 
     # Calculate the center coordinates
     cx = (l + r) / 2
     cy = b - (r - l) / 3
 
     # Concatenate cx and cy to get the box centers
-    box_centers = tf.concat([cx, cy], axis=1)
+    box_centers = np.concatenate([cx, cy], axis=1)
 
     return box_centers
 
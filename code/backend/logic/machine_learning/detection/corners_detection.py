@@ -6,9 +6,26 @@ from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
 from logic.machine_learning.maths.quad_transformation import get_quads, score_quad, perspective_transform, clamp, euclidean_distance
 from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, get_center_of_set_of_points, process_boxes_and_scores, get_xy
 from logic.machine_learning.utilities.preprocess import get_input
+from logic.machine_learning.utilities.bound_session import get_bound_session
+from logic.machine_learning.utilities.detection_executor import detection_executor
 
 
 async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.InferenceSession, pieces: List[dict]) -> List[List[float]]:
+    """
+    Runs predict_xcorners in the detection executor, keeping the event loop free.
+
+    Parameters:
+    - frame: A reference to the video data.
+    - corners_model_ref: A reference to the corner detection model used to predict the corners of the pieces.
+    - pieces: A list of detected chess pieces, each containing information about their bounding box and class.
+
+    Returns:
+    - preds: A list of predicted x_corner positions
+    """
+    return await detection_executor.run(predict_xcorners, frame, corners_model_ref, pieces)
+
+
+def predict_xcorners(frame: np.ndarray, corners_model_ref: ort.InferenceSession, pieces: List[dict]) -> List[List[float]]:
     """
     Processes a video reference using a corners detection model to predict x_corners pieces in the video.
 
@@ -23,20 +40,17 @@ async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.Inference
     video_height, video_width, _ = frame.shape
 
     # Extract the keypoints (coordinates of the chess pieces) from the pieces list.
-    keypoints: List[List[float]] = [[x[0], x[1]] for x in pieces]
+    keypoints: List[List[float]] = [[float(x[0]), float(x[1])] for x in pieces]
 
     # Prepare the input image for the x_corner detection model
-    image4d, width, height, padding, roi = get_input(frame, keypoints)
+    bound_session = get_bound_session(corners_model_ref)
+    image4d, width, height, padding, roi = get_input(frame, keypoints, buffer=bound_session.input_buffer)
 
     # Run the ONNX model directly, skipping the predict_xcorners wrapper
-    model_inputs = corners_model_ref.get_inputs()
-    
-    x_corner_predictions = corners_model_ref.run(
-        output_names=None,
-        input_feed={model_inputs[0].name: image4d})[0]
+    x_corner_predictions = bound_session.run()[0]
 
     # Extract boxes and scores from predictions
-    boxes, scores = get_boxes_and_scores(x_corner_predictions, width, height, video_width, video_height, padding, roi)
+    boxes, scores = get_boxes_and_scores(x_corner_predictions, width, height, video_width, video_height, padding, roi, bound_session.input_size)
 
     del x_corner_predictions 
     del image4d 
@@ -0,0 +1,202 @@
+import time
+import cv2
+import numpy as np
+
+from typing import List, Optional, Tuple
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+from logic.machine_learning.detection.bbox_scores import get_bbox
+
+
+def get_board_roi(keypoints: List[Tuple[float, float]], frame_shape: Tuple[int, ...], padding_ratio: int = 12) -> List[int]:
+    """
+    Computes the region of interest of the board in frame coordinates.
+
+    Args:
+        keypoints (List[Tuple[float, float]]): The board corners in model coordinates (MODEL_WIDTH x MODEL_HEIGHT).
+        frame_shape (Tuple[int, ...]): Shape of the video frame (height, width, channels).
+        padding_ratio (int): Factor to compute padding around the board. Defaults to 12.
+
+    Returns:
+        List[int]: The region of interest in the format [xmin, ymin, xmax, ymax].
+    """
+    frame_height, frame_width = frame_shape[:2]
+    bbox = get_bbox(keypoints)
+    pad_x = bbox['width'] / padding_ratio
+    pad_y = bbox['height'] / padding_ratio
+
+    return [
+        max(int(frame_width * (bbox['xmin'] - pad_x) / MODEL_WIDTH), 0),
+        max(int(frame_height * (bbox['ymin'] - pad_y) / MODEL_HEIGHT), 0),
+        min(int(frame_width * (bbox['xmax'] + pad_x) / MODEL_WIDTH), frame_width),
+        min(int(frame_height * (bbox['ymax'] + pad_y) / MODEL_HEIGHT), frame_height)
+    ]
+
+
+class MotionGate:
+    """
+    Decides which frames are worth running the pieces model on.
+
+    The board region is converted to a small grayscale image and compared with the previous frame
+    (to detect motion) and with the last inferred frame (to detect a change). While the board is
+    static nothing is inferred apart from a slow heartbeat, which also waits for motion to stop.
+    When motion stops after a change, the next frame is inferred immediately and inference
+    continues at `active_interval` for `settle_time` seconds so that greedy moves can be confirmed.
+    """
+
+    def __init__(
+        self,
+        downscale_width: int = 96,
+        pixel_threshold: int = 25,
+        area_threshold: float = 0.005,
+        active_interval: float = 0.5,
+        settle_time: float = 3.0,
+        idle_interval: float = 5.0
+    ):
+        """
+        Args:
+            downscale_width (int): Width of the grayscale image the difference is computed on.
+            pixel_threshold (int): Grayscale difference for a pixel to count as changed.
+            area_threshold (float): Fraction of changed pixels for the board to count as changed.
+            active_interval (float): Seconds between inferences while the board is settling.
+            settle_time (float): Seconds to keep inferring after motion has stopped.
+            idle_interval (float): Seconds between heartbeat inferences on a static board.
+        """
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.active_interval = active_interval
+        self.settle_time = settle_time
+        self.idle_interval = idle_interval
+
+        self.roi: Optional[List[int]] = None
+        self.previous: Optional[np.ndarray] = None
+        self.last_inferred: Optional[np.ndarray] = None
+        self.last_inference_time = float('-inf')
+        self.settle_until = float('-inf')
+        self.pending_change = False
+        self.frames_seen = 0
+        self.frames_inferred = 0
+
+    def set_roi(self, roi: Optional[List[int]]) -> None:
+        """
+        Sets the board region the gate looks at and forgets the previous frames.
+
+        Args:
+            roi (Optional[List[int]]): Region in the format [xmin, ymin, xmax, ymax], or None for the whole frame.
+        """
+        self.roi = roi
+        self.previous = None
+        self.last_inferred = None
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Crops the frame to the board region and converts it to a small grayscale image.
+
+        Args:
+            frame (np.ndarray): The video frame in BGR format.
+
+        Returns:
+            np.ndarray: The downscaled grayscale board image.
+        """
+        if self.roi is not None:
+            frame = frame[self.roi[1]:self.roi[3], self.roi[0]:self.roi[2]]
+
+        height, width = frame.shape[:2]
+        downscale_height = max(int(self.downscale_width * height / width), 1)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (self.downscale_width, downscale_height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def _changed(self, a: np.ndarray, b: Optional[np.ndarray]) -> bool:
+        """
+        Checks whether enough pixels differ between two downscaled images.
+        """
+        if b is None or a.shape != b.shape:
+            return True
+        changed_pixels = np.count_nonzero(cv2.absdiff(a, b) > self.pixel_threshold)
+        return changed_pixels > self.area_threshold * a.size
+
+    def should_infer(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Decides whether the pieces model should run on this frame.
+
+        Args:
+            frame (np.ndarray): The video frame in BGR format.
+            now (Optional[float]): Current time in seconds, defaults to time.time().
+
+        Returns:
+            bool: True if the frame should be inferred.
+        """
+        now = time.time() if now is None else now
+        small = self._downscale(frame)
+        moving = self._changed(small, self.previous)
+        self.previous = small
+        self.frames_seen += 1
+
+        infer = False
+        since_last = now - self.last_inference_time
+
+        if moving:
+            # Wait for the motion to stop, the frame is likely blurred or occluded
+            self.pending_change = True
+        elif self.pending_change or self._changed(small, self.last_inferred):
+            self.pending_change = False
+            self.settle_until = now + self.settle_time
+            infer = True
+        elif now < self.settle_until and since_last >= self.active_interval:
+            infer = True
+
+        if since_last >= self.idle_interval and not moving:
+            infer = True
+
+        if infer:
+            self._mark_inferred(small, now)
+
+        return infer
+
+    def hold(self, frame: np.ndarray) -> None:
+        """
+        Records a frame that must not be inferred (e.g. the board is occluded).
+
+        The change is remembered so that inference resumes as soon as the board is free.
+
+        Args:
+            frame (np.ndarray): The video frame in BGR format.
+        """
+        self.previous = self._downscale(frame)
+        self.pending_change = True
+        self.frames_seen += 1
+
+    def retry(self) -> None:
+        """
+        Makes the next still frame inferred again, e.g. when the frame let through could not be inferred.
+        """
+        self.pending_change = True
+
+    def force(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Records a frame that must be inferred regardless of motion, and starts settling.
+
+        Args:
+            frame (np.ndarray): The video frame in BGR format.
+            now (Optional[float]): Current time in seconds, defaults to time.time().
+
+        Returns:
+            bool: Always True.
+        """
+        now = time.time() if now is None else now
+        small = self._downscale(frame)
+        self.previous = small
+        self.pending_change = False
+        self.settle_until = now + self.settle_time
+        self.frames_seen += 1
+        self._mark_inferred(small, now)
+        return True
+
+    def _mark_inferred(self, small: np.ndarray, now: float) -> None:
+        """
+        Remembers the frame the pieces model last ran on.
+        """
+        self.last_inferred = small
+        self.last_inference_time = now
+        self.frames_inferred += 1
@@ -0,0 +1,177 @@
+import time
+import cv2
+import numpy as np
+
+from typing import List, Optional, Tuple
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+# Skin color range in the YCrCb color space
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+
+class OcclusionDetector:
+    """
+    Detects when a hand (or arm) is over the board.
+
+    A pixel counts as occluding when it is skin colored and differs from a reference image of the
+    unoccluded board. Both conditions are required so that wooden boards do not trigger the
+    detector. The skin pixels must also form one blob larger than a piece and the square it left
+    that crosses the board boundary, as a hand reaching in does, so that moving a skin-toned piece
+    does not trigger it either. Only pixels inside the board boundary polygon are considered.
+    """
+
+    def __init__(
+        self,
+        downscale_width: int = 128,
+        foreground_threshold: int = 30,
+        skin_area_threshold: float = 0.04,
+        foreground_area_threshold: float = 0.2,
+        background_rate: float = 0.1,
+        max_occlusion_time: float = 10.0
+    ):
+        """
+        Args:
+            downscale_width (int): Width of the image the segmentation is computed on.
+            foreground_threshold (int): Grayscale difference from the reference for a pixel to be foreground.
+            skin_area_threshold (float): Fraction of the board a skin colored foreground blob crossing the boundary must cover
+                for the board to be occluded. A square is about 1.6% of the board.
+            foreground_area_threshold (float): Fraction of foreground pixels that means the board is occluded, skin or not (e.g. sleeves).
+            background_rate (float): How quickly the reference image follows unoccluded frames.
+            max_occlusion_time (float): Seconds after which a lasting occlusion is assumed to be a scene change and the reference is reset.
+        """
+        self.downscale_width = downscale_width
+        self.foreground_threshold = foreground_threshold
+        self.skin_area_threshold = skin_area_threshold
+        self.foreground_area_threshold = foreground_area_threshold
+        self.background_rate = background_rate
+        self.max_occlusion_time = max_occlusion_time
+
+        self.roi: Optional[List[int]] = None
+        self.mask: Optional[np.ndarray] = None
+        self.mask_area = 0
+        self.border: Optional[np.ndarray] = None
+        self.background: Optional[np.ndarray] = None
+        self.occluded = False
+        self.occluded_since = 0.0
+        self.cleared = False
+
+    def set_boundary(self, boundary: List[Tuple[float, float]], frame_shape: Tuple[int, ...]) -> None:
+        """
+        Sets the board boundary polygon and resets the reference image.
+
+        Args:
+            boundary (List[Tuple[float, float]]): Boundary polygon in model coordinates, as returned by find_centers_and_boundary.
+            frame_shape (Tuple[int, ...]): Shape of the video frame (height, width, channels).
+        """
+        frame_height, frame_width = frame_shape[:2]
+        polygon = np.array(
+            [[x * frame_width / MODEL_WIDTH, y * frame_height / MODEL_HEIGHT] for x, y in boundary],
+            dtype=np.float32
+        )
+
+        xmin, ymin = np.maximum(np.floor(polygon.min(axis=0)).astype(int), 0)
+        xmax, ymax = np.ceil(polygon.max(axis=0)).astype(int)
+        xmax, ymax = min(xmax, frame_width), min(ymax, frame_height)
+        self.roi = [int(xmin), int(ymin), int(xmax), int(ymax)]
+
+        # Rasterize the polygon at the downscaled resolution
+        scale = self.downscale_width / max(xmax - xmin, 1)
+        mask_height = max(int((ymax - ymin) * scale), 1)
+        self.mask = np.zeros((mask_height, self.downscale_width), dtype=np.uint8)
+        scaled_polygon = ((polygon - [xmin, ymin]) * scale).astype(np.int32)
+        cv2.fillPoly(self.mask, [scaled_polygon], 255)
+        # Outermost pixels of the polygon, a hand reaching over the board crosses them
+        inner = cv2.erode(self.mask, np.ones((3, 3), dtype=np.uint8), borderType=cv2.BORDER_CONSTANT, borderValue=0)
+        self.mask = self.mask.astype(bool)
+        self.border = self.mask & ~inner.astype(bool)
+        self.mask_area = max(int(np.count_nonzero(self.mask)), 1)
+
+        self.background = None
+        self.occluded = False
+        self.cleared = False
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Crops the frame to the board and resizes it to the mask size.
+        """
+        if self.roi is not None:
+            frame = frame[self.roi[1]:self.roi[3], self.roi[0]:self.roi[2]]
+        if self.mask is not None:
+            size = (self.mask.shape[1], self.mask.shape[0])
+        else:
+            height, width = frame.shape[:2]
+            size = (self.downscale_width, max(int(self.downscale_width * height / width), 1))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Updates the occlusion state with a new frame.
+
+        After the call, `cleared` is True only for the first frame after an occlusion ended,
+        which is when a high-priority inference should be run.
+
+        Args:
+            frame (np.ndarray): The video frame in BGR format.
+            now (Optional[float]): Current time in seconds, defaults to time.time().
+
+        Returns:
+            bool: True if the board is occluded.
+        """
+        now = time.time() if now is None else now
+        small = self._downscale(frame)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        mask = self.mask if self.mask is not None else np.ones(gray.shape, dtype=bool)
+        mask_area = self.mask_area if self.mask is not None else gray.size
+        border = self.border if self.border is not None else self._get_frame_border(gray.shape)
+
+        if self.background is None:
+            self.background = gray
+            self.occluded = False
+            self.cleared = False
+            return False
+
+        foreground = (np.abs(gray - self.background) > self.foreground_threshold) & mask
+        skin = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb), SKIN_LOWER, SKIN_UPPER).astype(bool)
+
+        foreground_ratio = np.count_nonzero(foreground) / mask_area
+        occluded = (
+            foreground_ratio > self.foreground_area_threshold or
+            self._has_hand(foreground & skin, border, self.skin_area_threshold * mask_area)
+        )
+
+        if occluded and not self.occluded:
+            self.occluded_since = now
+        if occluded and now - self.occluded_since > self.max_occlusion_time:
+            # Nothing has left the board for a long time, the scene itself has changed
+            self.background = gray
+            occluded = False
+
+        self.cleared = self.occluded and not occluded
+        self.occluded = occluded
+
+        if not occluded:
+            cv2.accumulateWeighted(gray, self.background, self.background_rate)
+
+        return occluded
+
+    @staticmethod
+    def _has_hand(skin_foreground: np.ndarray, border: np.ndarray, min_area: float) -> bool:
+        """
+        Checks whether a skin colored foreground blob larger than min_area pixels reaches the border.
+        """
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(skin_foreground.astype(np.uint8), connectivity=8)
+        if count <= 1:
+            return False
+        crossing = np.unique(labels[border])
+        crossing = crossing[crossing > 0]
+        return bool(np.any(stats[crossing, cv2.CC_STAT_AREA] > min_area))
+
+    @staticmethod
+    def _get_frame_border(shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Gets the outermost pixels of an image, the border when no boundary polygon is set.
+        """
+        border = np.ones(shape[:2], dtype=bool)
+        border[1:-1, 1:-1] = False
+        return border
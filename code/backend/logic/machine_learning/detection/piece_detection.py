@@ -4,9 +4,25 @@ from typing import Tuple
 
 from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, process_boxes_and_scores
 from logic.machine_learning.utilities.preprocess import get_input
+from logic.machine_learning.utilities.bound_session import get_bound_session
+from logic.machine_learning.utilities.detection_executor import detection_executor
 
 
 async def run_pieces_model(frame, pieces_model_ref):
+    """
+    Runs predict_pieces in the detection executor, keeping the event loop free.
+
+    Parameters:
+    - frame: A single video frame (image).
+    - pieces_model_ref: ONNX InferenceSession for piece detection.
+
+    Returns:
+    - pieces: A list of detected chess pieces as (x, y, pieceTypeIndex).
+    """
+    return await detection_executor.run(predict_pieces, frame, pieces_model_ref)
+
+
+def predict_pieces(frame, pieces_model_ref):
     """
     Processes a video frame using the given pieces detection model to predict chess pieces.
 
@@ -20,17 +36,15 @@ async def run_pieces_model(frame, pieces_model_ref):
     
     frame_height, frame_width, _ = frame.shape
 
-    # Prepare the input tensor
-    image4d, width, height, padding, roi = get_input(frame)
-
-    # Prepare input dict for inference
-    inputs = {pieces_model_ref.get_inputs()[0].name: image4d}
+    # Prepare the input tensor in the bound input buffer
+    bound_session = get_bound_session(pieces_model_ref)
+    image4d, width, height, padding, roi = get_input(frame, buffer=bound_session.input_buffer)
 
     # Run model
-    pieces_prediction = pieces_model_ref.run(None, inputs)
+    pieces_prediction = bound_session.run()
 
     # Process prediction
-    boxes, scores = get_boxes_and_scores(pieces_prediction[0], width, height, frame_width, frame_height, padding, roi)
+    boxes, scores = get_boxes_and_scores(pieces_prediction[0], width, height, frame_width, frame_height, padding, roi, bound_session.input_size)
 
     # Final filtering/postprocessing
     pieces = process_boxes_and_scores(boxes, scores)
@@ -46,6 +60,21 @@ async def run_pieces_model(frame, pieces_model_ref):
 
 
 async def detect(pieces_model_ref: ort.InferenceSession, video_ref: np.ndarray, keypoints: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs detect_pieces in the detection executor, keeping the event loop free.
+
+    Args:
+        pieces_model_ref (onnxruntime.InferenceSession): The ONNX model session used for detecting chess pieces.
+        video_ref (np.ndarray): The input video frame as a NumPy array with shape (height, width, channels).
+        keypoints (np.ndarray): The keypoints for the video frame, typically used for identifying regions of interest.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The bounding boxes and scores of the detected pieces, see detect_pieces.
+    """
+    return await detection_executor.run(detect_pieces, pieces_model_ref, video_ref, keypoints)
+
+
+def detect_pieces(pieces_model_ref: ort.InferenceSession, video_ref: np.ndarray, keypoints: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """
     Detects the pieces in a video frame and returns the bounding boxes and their associated scores using an ONNX model.
 
@@ -64,11 +93,11 @@ async def detect(pieces_model_ref: ort.InferenceSession, video_ref: np.ndarray,
     """
     frame_height, frame_width, _ = video_ref.shape
 
-    image4d, width, height, padding, roi = get_input(video_ref, keypoints)
-    inputs = {pieces_model_ref.get_inputs()[0].name: image4d} 
+    bound_session = get_bound_session(pieces_model_ref)
+    image4d, width, height, padding, roi = get_input(video_ref, keypoints, buffer=bound_session.input_buffer)
 
-    pieces_prediction = pieces_model_ref.run(None, inputs)
-    boxes, scores = get_boxes_and_scores(pieces_prediction[0], width, height, frame_width, frame_height, padding, roi)
+    pieces_prediction = bound_session.run()
+    boxes, scores = get_boxes_and_scores(pieces_prediction[0], width, height, frame_width, frame_height, padding, roi, bound_session.input_size)
     
     del pieces_prediction
     del image4d  
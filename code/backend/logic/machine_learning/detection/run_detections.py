@@ -3,11 +3,29 @@ import onnxruntime as ort
 
 from typing import List, Dict, Tuple, Optional
 from logic.machine_learning.utilities.constants import CORNER_KEYS
-from logic.machine_learning.detection.corners_detection import run_xcorners_model, find_board_corners_from_xcorners, assign_labels_to_board_corners, scale_xy_board_corners, extract_xy_from_labeled_corners
-from logic.machine_learning.detection.piece_detection import run_pieces_model
+from logic.machine_learning.detection.corners_detection import predict_xcorners, find_board_corners_from_xcorners, assign_labels_to_board_corners, scale_xy_board_corners, extract_xy_from_labeled_corners
+from logic.machine_learning.detection.piece_detection import predict_pieces
+from logic.machine_learning.utilities.detection_executor import detection_executor
 from logic.machine_learning.maths.warp import get_inv_transform, transform_centers, transform_boundary
+from logic.api.entity.latency import LatencyTrace
 
-async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.InferenceSession, xcorners_model_ref: ort.InferenceSession) -> Optional[np.ndarray]: 
+async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.InferenceSession, xcorners_model_ref: ort.InferenceSession, trace: Optional[LatencyTrace] = None) -> Optional[np.ndarray]: 
+    """
+    Runs detect_board_corners in the detection executor, keeping the event loop free.
+
+    Args:
+        video_ref (np.ndarray): The input video frame.
+        pieces_model_ref (ort.InferenceSession): ONNX model for detecting chess pieces.
+        xcorners_model_ref (ort.InferenceSession): ONNX model for detecting x_corners.
+        trace (Optional[LatencyTrace]): Trace of the frame, the model stages are marked on it.
+
+    Returns:
+        Optional[np.ndarray]: The labeled board corners, or None if detection fails.
+    """
+    return await detection_executor.run(detect_board_corners, video_ref, pieces_model_ref, xcorners_model_ref, trace)
+
+
+def detect_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.InferenceSession, xcorners_model_ref: ort.InferenceSession, trace: Optional[LatencyTrace] = None) -> Optional[np.ndarray]: 
     """
     Detects corners on a chessboard using ONNX models.
 
@@ -15,6 +33,7 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
         video_ref (np.ndarray): The input video frame.
         pieces_model_ref (ort.InferenceSession): ONNX model for detecting chess pieces.
         xcorners_model_ref (ort.InferenceSession): ONNX model for detecting x_corners.
+        trace (Optional[LatencyTrace]): Trace of the frame, the model stages are marked on it.
 
     Returns:
         Optional[np.ndarray]: Processed frame with centers visualized, or None if detection fails.
@@ -24,7 +43,9 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
     # We extract the top 16 predicted pieces for both black and white players
     # Pieces is on the format [x, y, pieceTypeIndex]
     
-    pieces: List[List[int]] = await run_pieces_model(video_ref, pieces_model_ref)
+    pieces: List[List[int]] = predict_pieces(video_ref, pieces_model_ref)
+    if trace is not None:
+        trace.mark("corners_pieces")
 
     # Metadata of model tells us white pieces index range from 0-5 
     # while black pieces index from 6-11
@@ -36,7 +57,9 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
         return None
 
     # Extracts the top 49 predicted x_corners for the chess board (inner 7x7 grid)
-    x_corners: List[List[int]] = await run_xcorners_model(video_ref, xcorners_model_ref, pieces)
+    x_corners: List[List[int]] = predict_xcorners(video_ref, xcorners_model_ref, pieces)
+    if trace is not None:
+        trace.mark("corners_xcorners")
 
     if len(x_corners) < 5:
         print("Not enough x_corners")
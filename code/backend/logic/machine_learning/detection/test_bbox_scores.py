@@ -0,0 +1,125 @@
+import importlib.util
+import unittest
+import numpy as np
+from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, non_max_suppression, process_boxes_and_scores
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+# Crop of a 1280x720 frame, letterboxed into the model input
+CROP = dict(width=900, height=500, video_width=1280, video_height=720, padding=(10, 14, 20, 30), roi=(200, 120))
+
+def make_predictions(anchors: int = 2835, classes: int = 12, seed: int = 0) -> np.ndarray:
+    """ Predictions like the pieces model gives: a few anchors scoring high, the rest close to zero. """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, [MODEL_WIDTH, MODEL_HEIGHT], size=(anchors, 2))
+    sizes = rng.uniform(5, 60, size=(anchors, 2))
+    scores = rng.uniform(0, 0.02, size=(anchors, classes))
+    hits = rng.choice(anchors, 64, replace=False)
+    scores[hits, rng.integers(0, classes, 64)] = rng.uniform(0.05, 1, 64)
+    return np.concatenate([centers, sizes, scores], axis=1).T[np.newaxis].astype(np.float16)
+
+def decode_all(preds: np.ndarray) -> np.ndarray:
+    """ Boxes of every anchor, decoded step by step in float64. """
+    xc, yc, w, h = preds[0, :4].astype(np.float64)
+    padding, roi = CROP["padding"], CROP["roi"]
+    x = lambda v: ((v - padding[0]) * CROP["width"] / (MODEL_WIDTH - padding[0] - padding[1]) + roi[0]) * MODEL_WIDTH / CROP["video_width"]
+    y = lambda v: ((v - padding[2]) * CROP["height"] / (MODEL_HEIGHT - padding[2] - padding[3]) + roi[1]) * MODEL_HEIGHT / CROP["video_height"]
+    return np.stack([x(xc - w / 2), y(yc - h / 2), x(xc + w / 2), y(yc + h / 2)], axis=1)
+
+# Boxes with two opposite corners each, scored so that every rule of the suppression decides one box
+NMS_BOXES = np.array([
+    [0, 0, 10, 10],     # 0: best box
+    [10, 10, 0, 0],     # 1: box 0 with the other corners, tied score, removed by the lower index rule
+    [0, 0, 5, 10],      # 2: IoU with box 0 exactly 0.5, kept
+    [0, 0, 6, 10],      # 3: IoU with box 0 0.6, removed
+    [20, 20, 30, 30],   # 4: tied with box 0, apart from everything
+    [40, 40, 50, 50],   # 5: score exactly at the score threshold, left out
+    [60, 60, 70, 70],   # 6: score just above the score threshold
+    [80, 80, 90, 90],   # 7: score below the score threshold
+], dtype=np.float32)
+NMS_SCORES = np.array([0.9, 0.9, 0.7, 0.8, 0.9, 0.25, 0.26, 0.1], dtype=np.float32)
+NMS_IOU_THRESHOLD = 0.5
+NMS_SCORE_THRESHOLD = 0.25
+
+class TestNonMaxSuppression(unittest.TestCase):
+    """ Unit tests for the non_max_suppression function. """
+
+    def select(self, max_output_size: int) -> list:
+        return non_max_suppression(NMS_BOXES, NMS_SCORES, max_output_size, NMS_IOU_THRESHOLD, NMS_SCORE_THRESHOLD).tolist()
+
+    def test_selects_by_score_then_index(self) -> None:
+        """ Test ties, IoU exactly at the threshold and the score threshold on fixed boxes. """
+        self.assertEqual(self.select(10), [0, 4, 2, 6])
+
+    def test_max_output_size_truncates_the_selection(self) -> None:
+        """ Test that only the best max_output_size boxes are selected. """
+        self.assertEqual(self.select(3), [0, 4, 2])
+        self.assertEqual(self.select(1), [0])
+
+    def test_no_box_above_the_score_threshold(self) -> None:
+        """ Test that nothing is selected when no score is above the threshold. """
+        selected = non_max_suppression(NMS_BOXES, NMS_SCORES, 10, NMS_IOU_THRESHOLD, 0.9)
+
+        self.assertEqual(selected.size, 0)
+        self.assertEqual(selected.dtype, np.int64)
+
+    @unittest.skipUnless(importlib.util.find_spec("tensorflow"), "TensorFlow is not installed")
+    def test_matches_tensorflow(self) -> None:
+        """ Test that the selection matches tf.image.non_max_suppression on the fixed boxes. """
+        import tensorflow as tf
+
+        for max_output_size in (1, 3, 10):
+            expected = tf.image.non_max_suppression(
+                NMS_BOXES, NMS_SCORES, max_output_size, NMS_IOU_THRESHOLD, NMS_SCORE_THRESHOLD
+            ).numpy().tolist()
+            self.assertEqual(self.select(max_output_size), expected)
+
+class TestGetBoxesAndScores(unittest.TestCase):
+    """ Unit tests for the get_boxes_and_scores function. """
+
+    def test_decodes_the_anchors_above_the_floor(self) -> None:
+        """ Test that the kept anchors are decoded like every anchor is without a floor, in anchor order. """
+        preds = make_predictions()
+        boxes, scores = get_boxes_and_scores(preds, **CROP)
+        keep = np.flatnonzero(preds[0, 4:].max(axis=0) > 0.05)
+
+        self.assertEqual(boxes.dtype, np.float32)
+        self.assertEqual(scores.shape, (keep.size, 12))
+        np.testing.assert_allclose(boxes, decode_all(preds)[keep], atol=1e-3)
+        np.testing.assert_array_equal(scores, preds[0, 4:, keep].astype(np.float32))
+
+        all_boxes, _ = get_boxes_and_scores(preds, **CROP, score_floor=0)
+        self.assertEqual(len(all_boxes), preds.shape[2])
+        np.testing.assert_array_equal(all_boxes[keep], boxes)
+
+    def test_top_k_keeps_the_best_anchors(self) -> None:
+        """ Test that top_k keeps the best scored anchors, still in anchor order. """
+        preds = make_predictions()
+        _, scores = get_boxes_and_scores(preds, **CROP, top_k=10)
+        max_scores = preds[0, 4:].max(axis=0).astype(np.float32)
+
+        self.assertEqual(len(scores), 10)
+        np.testing.assert_array_equal(np.sort(scores.max(axis=1)), np.sort(max_scores)[-10:])
+
+    def test_top_k_must_be_positive(self) -> None:
+        """ Test that a top_k below 1 is refused instead of reaching argpartition. """
+        for top_k in (0, -1):
+            with self.assertRaises(ValueError):
+                get_boxes_and_scores(make_predictions(), **CROP, top_k=top_k)
+
+    def test_detections_do_not_depend_on_the_floor(self) -> None:
+        """ Test that non-max suppression finds the same detections with and without the floor. """
+        preds = make_predictions(seed=1)
+        expected = process_boxes_and_scores(*get_boxes_and_scores(preds, **CROP, score_floor=0))
+        np.testing.assert_array_equal(process_boxes_and_scores(*get_boxes_and_scores(preds, **CROP)), expected)
+
+    def test_no_anchor_above_the_floor(self) -> None:
+        """ Test that a frame without detections gives empty arrays the callers can handle. """
+        preds = make_predictions()
+        preds[0, 4:] = 0
+        boxes, scores = get_boxes_and_scores(preds, **CROP)
+
+        self.assertEqual((boxes.shape, scores.shape), ((0, 4), (0, 12)))
+        self.assertEqual(process_boxes_and_scores(boxes, scores).shape, (0, 3))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from logic.machine_learning.detection.motion_gate import MotionGate, get_board_roi
+
+def make_board(height: int = 240, width: int = 320, square: int = 20) -> np.ndarray:
+    """ Checkerboard frame in BGR format. """
+    rows, cols = np.indices((height, width)) // square
+    gray = np.where((rows + cols) % 2 == 0, 200, 60).astype(np.uint8)
+    return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+
+def with_piece(frame: np.ndarray, x: int, y: int, size: int = 40) -> np.ndarray:
+    """ Copy of a frame with a bright square, a piece or a hand at (x, y). """
+    frame = frame.copy()
+    frame[y:y + size, x:x + size] = 255
+    return frame
+
+class TestMotionGate(unittest.TestCase):
+    """ Unit tests for the MotionGate class. """
+
+    def setUp(self) -> None:
+        self.gate = MotionGate()
+        self.board = make_board()
+
+    def run_frames(self, frames: list, start: float, step: float = 0.1) -> list:
+        """ Feeds frames at a fixed rate and returns the decisions. """
+        return [self.gate.should_infer(frame, start + i * step) for i, frame in enumerate(frames)]
+
+    def test_infers_once_motion_stops_after_a_change(self) -> None:
+        """ Test that a change is inferred on the first still frame, not while it happens. """
+        self.assertEqual(self.run_frames([self.board, self.board], 0.0), [False, True])
+
+        moved = with_piece(self.board, 100, 100)
+        self.assertEqual(self.run_frames([moved, moved], 0.2), [False, True])
+
+    def test_settles_then_only_sends_heartbeats(self) -> None:
+        """ Test active_interval inferences while settling and idle_interval inferences after. """
+        self.run_frames([self.board, self.board], 0.0)
+
+        decisions = self.run_frames([self.board] * 100, 0.2)
+        inferred = [round(0.2 + i * 0.1, 1) for i, infer in enumerate(decisions) if infer]
+
+        # Settling before 3.1 after the inference at 0.1, then a heartbeat 5 seconds after the last one
+        self.assertEqual(inferred, [0.6, 1.1, 1.6, 2.1, 2.6, 7.6])
+
+    def test_heartbeat_waits_while_the_board_moves(self) -> None:
+        """ Test that no frame is inferred while the board keeps moving, however long. """
+        self.run_frames([self.board, self.board], 0.0)
+
+        moving = [with_piece(self.board, 20 + (i % 2) * 120, 100) for i in range(100)]
+        self.assertFalse(any(self.run_frames(moving, 4.0)))
+        self.assertTrue(self.gate.should_infer(moving[-1], 14.0))
+
+    def test_hold_infers_when_the_board_is_free(self) -> None:
+        """ Test that a held frame makes the next still frame inferred. """
+        self.run_frames([self.board, self.board], 0.0)
+        self.run_frames([self.board] * 40, 0.2)
+
+        self.gate.hold(self.board)
+        self.assertTrue(self.gate.should_infer(self.board, 4.5))
+
+    def test_force_infers_and_starts_settling(self) -> None:
+        """ Test that a forced frame counts as inferred and settling follows it. """
+        self.assertTrue(self.gate.force(self.board, 0.0))
+        self.assertEqual(self.run_frames([self.board] * 6, 0.1), [False, False, False, False, True, False])
+        self.assertEqual(self.gate.frames_inferred, 2)
+        self.assertEqual(self.gate.frames_seen, 7)
+
+    def test_roi_ignores_motion_outside_the_board(self) -> None:
+        """ Test that changes outside the region of interest are not motion. """
+        self.gate.set_roi([0, 0, 160, 240])
+        self.run_frames([self.board, self.board], 0.0)
+
+        outside = with_piece(self.board, 200, 100)
+        self.assertEqual(self.run_frames([outside, outside], 0.2), [False, False])
+
+class TestGetBoardRoi(unittest.TestCase):
+    """ Unit tests for the get_board_roi function. """
+
+    def test_pads_and_clips_to_the_frame(self) -> None:
+        """ Test that the padded corners are scaled to the frame and kept inside it. """
+        keypoints = [(0, 0), (480, 0), (480, 288), (0, 288)]
+        self.assertEqual(get_board_roi(keypoints, (576, 960, 3)), [0, 0, 960, 576])
+
+        keypoints = [(120, 72), (360, 72), (360, 216), (120, 216)]
+        self.assertEqual(get_board_roi(keypoints, (576, 960, 3)), [200, 120, 760, 456])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from logic.machine_learning.detection.occlusion import OcclusionDetector
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+# Board boundary in model coordinates, frames have the model size so it is also in frame coordinates
+BOUNDARY = [(120, 72), (360, 72), (360, 216), (120, 216)]
+SQUARE_WIDTH, SQUARE_HEIGHT = 30, 18
+SKIN = (140, 170, 220)
+SLEEVE = (0, 0, 0)
+
+def make_board(height: int = MODEL_HEIGHT, width: int = MODEL_WIDTH, square: int = 24) -> np.ndarray:
+    """ Checkerboard frame in BGR format. """
+    rows, cols = np.indices((height, width)) // square
+    gray = np.where((rows + cols) % 2 == 0, 200, 60).astype(np.uint8)
+    return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+
+def with_patch(frame: np.ndarray, color: tuple, x: int, y: int, width: int, height: int) -> np.ndarray:
+    """ Copy of a frame with a colored rectangle. """
+    frame = frame.copy()
+    frame[y:y + height, x:x + width] = color
+    return frame
+
+class TestOcclusionDetector(unittest.TestCase):
+    """ Unit tests for the OcclusionDetector class. """
+
+    def setUp(self) -> None:
+        self.board = make_board()
+        self.detector = OcclusionDetector()
+        self.detector.set_boundary(BOUNDARY, self.board.shape)
+        self.assertFalse(self.detector.update(self.board, 0.0))
+
+    def test_hand_occludes_and_clears(self) -> None:
+        """ Test that a skin colored hand occludes the board and that only the next free frame is cleared. """
+        hand = with_patch(self.board, SKIN, 200, 150, 40, 100)
+
+        self.assertTrue(self.detector.update(hand, 1.0))
+        self.assertFalse(self.detector.cleared)
+        self.assertFalse(self.detector.update(self.board, 2.0))
+        self.assertTrue(self.detector.cleared)
+        self.assertFalse(self.detector.update(self.board, 3.0))
+        self.assertFalse(self.detector.cleared)
+
+    def test_large_foreground_occludes_without_skin(self) -> None:
+        """ Test that a sleeve covering much of the board occludes it. """
+        sleeve = with_patch(self.board, SLEEVE, 120, 72, 120, 144)
+
+        self.assertTrue(self.detector.update(sleeve, 1.0))
+
+    def test_small_change_does_not_occlude(self) -> None:
+        """ Test that a dark piece moved onto a light square is not an occlusion. """
+        piece = with_patch(self.board, SLEEVE, 200, 100, 20, 20)
+
+        self.assertFalse(self.detector.update(piece, 1.0))
+
+    def test_skin_toned_piece_does_not_occlude(self) -> None:
+        """ Test that moving a skin toned piece, inside the board or onto an edge square, is not an occlusion. """
+        inside = with_patch(self.board, SKIN, 210, 108, SQUARE_WIDTH, SQUARE_HEIGHT)
+        edge = with_patch(inside, SKIN, 120, 126, SQUARE_WIDTH, SQUARE_HEIGHT)
+
+        self.assertFalse(self.detector.update(inside, 1.0))
+        self.assertFalse(self.detector.update(edge, 2.0))
+
+    def test_skin_blob_inside_the_board_does_not_occlude(self) -> None:
+        """ Test that a large skin colored blob that does not cross the boundary is not a hand. """
+        blob = with_patch(self.board, SKIN, 180, 100, 3 * SQUARE_WIDTH, 3 * SQUARE_HEIGHT)
+
+        self.assertFalse(self.detector.update(blob, 1.0))
+
+    def test_static_skin_tone_does_not_occlude(self) -> None:
+        """ Test that a skin toned board is part of the reference and does not occlude. """
+        wooden = with_patch(self.board, SKIN, 120, 72, 240, 144)
+        self.detector.set_boundary(BOUNDARY, wooden.shape)
+        self.detector.update(wooden, 0.0)
+
+        self.assertFalse(self.detector.update(wooden, 1.0))
+
+    def test_ignores_hands_outside_the_boundary(self) -> None:
+        """ Test that a hand next to the board is not an occlusion. """
+        hand = with_patch(self.board, SKIN, 380, 100, 80, 80)
+
+        self.assertFalse(self.detector.update(hand, 1.0))
+
+    def test_lasting_occlusion_resets_the_reference(self) -> None:
+        """ Test that an occlusion lasting longer than max_occlusion_time becomes the new reference. """
+        changed = with_patch(self.board, SKIN, 200, 150, 40, 100)
+
+        self.assertTrue(self.detector.update(changed, 1.0))
+        self.assertTrue(self.detector.update(changed, 10.0))
+        self.assertFalse(self.detector.update(changed, 11.5))
+        self.assertFalse(self.detector.update(changed, 12.0))
+
+if __name__ == "__main__":
+    unittest.main()
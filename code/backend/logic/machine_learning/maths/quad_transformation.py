@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.spatial import Delaunay
 from typing import List, Tuple
 
 x = list(range(7))
@@ -18,6 +17,9 @@ def get_quads(x_corners: List[List[Tuple[float, float]]]) -> List[List[List[Tupl
     Returns:
         A list of lists of lists, where each inner list of lists represents a quad.
     """
+    # SciPy takes half a second to import and is only needed while looking for the corners
+    from scipy.spatial import Delaunay
+
     points: np.ndarray = np.array(x_corners)
     delaunay = Delaunay(points)
     triangles: np.ndarray = delaunay.simplices
@@ -1,5 +1,4 @@
 import numpy as np
-import tensorflow as tf
 
 from typing import List, Tuple
 from logic.machine_learning.utilities.constants import SQUARE_SIZE, BOARD_SIZE
@@ -186,8 +185,8 @@ def transform_boundary(inv_transform: np.ndarray):
     Returns:
     - boundary (List[List[float]]): A list of 4 points (in [x, y]) representing the transformed boundary 
       corners of the chessboard in the distorted space.
-    - boundary3D (tf.Tensor): A 3D tensor (shape: [1, 4, 2]) containing the same boundary points 
-      as a TensorFlow tensor, which can be directly used for further processing (e.g., masks or overlays).
+    - boundary3D (np.ndarray): A float32 array (shape: [1, 4, 2]) containing the same boundary points,
+      which can be directly used for further processing (e.g., masks or overlays).
     """
 
     # Define a slightly expanded square around the 8x8 grid in perfect square space
@@ -201,7 +200,7 @@ def transform_boundary(inv_transform: np.ndarray):
     # Apply inverse perspective transformation to map to distorted input space
     boundary = perspective_transform(warped_boundary, inv_transform)
 
-    # Convert to a TensorFlow 3D tensor for further operations (e.g., masking in TF)
-    boundary3D = tf.expand_dims(tf.convert_to_tensor(boundary, dtype=tf.float32), axis=0)
+    # Convert to a 3D array for further operations (e.g., masking)
+    boundary3D = np.expand_dims(np.asarray(boundary, dtype=np.float32), axis=0)
 
     return boundary, boundary3D
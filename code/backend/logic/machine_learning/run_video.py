@@ -1,73 +1,243 @@
-import time, cv2, onnxruntime as ort
-from typing import Optional
-from logic.machine_learning.detection.run_detections import get_board_corners
-from logic.machine_learning.board_state.map_pieces import get_payload
+import os, time, cv2, onnxruntime as ort
+from typing import Awaitable, Callable, Optional, Tuple
+from logic.api.entity.frame_grabber import FrameReader
+from logic.api.entity.latency import LatencyTrace
+from logic.api.entity.shared_frame_ring import FrameOverwrittenError
+from logic.machine_learning.detection.run_detections import get_board_corners, find_centers_and_boundary
+from logic.machine_learning.detection.corners_detection import extract_xy_from_labeled_corners
+from logic.machine_learning.detection.motion_gate import MotionGate, get_board_roi
+from logic.machine_learning.detection.occlusion import OcclusionDetector
+from logic.machine_learning.board_state.map_pieces import SCREEN_MARGIN, get_payload
+from logic.machine_learning.board_state.payload_pipeline import PayloadPipeline
 from logic.machine_learning.utilities.move import get_moves_pairs
+from logic.machine_learning.utilities.constants import PIECES_MODEL_PATH, XCORNERS_MODEL_PATH
+from logic.machine_learning.utilities.wrap_model import get_variant_path
+from logic.machine_learning.utilities.model_variants import resolve_model_variant
+from logic.machine_learning.utilities.model_registry import model_registry
+from logic.machine_learning.utilities.model_cache import ModelCache
 import logic.api.services.board_storage as storage
 from logic.api.services import board_storage
 import asyncio
 
+# Model variant of utilities/model_variants.py, models without that variant load the full model
+MODEL_VARIANT = "full"
+
+# Load the uint8 input variants made by utilities/wrap_model.py and feed them raw frames
+UINT8_INPUT = False
+
+# Run the pieces model of all boards in shared batches, needs the --dynamic-batch variant of the model
+PIECES_BATCHING = False
+PIECES_MAX_BATCH = 8
+PIECES_MAX_WAIT = 0.005
+
+# Overlap preprocessing, inference and scoring of consecutive frames, up to this many frames in flight per board
+PIPELINED = False
+PIPELINE_DEPTH = 3
+
+# Screen every frame with the low_res pieces model and only run the full model on candidate moves
+CASCADE = False
+CASCADE_MARGIN = SCREEN_MARGIN
+
+# Load the graph-optimized models of utilities/model_cache.py from this directory, None parses the ONNX files every start
+MODEL_CACHE_DIR: Optional[str] = os.path.join(os.path.dirname(PIECES_MODEL_PATH), "cache")
+
+# Report detected moves through this coroutine function instead of BoardService.send_move, set in detector processes
+MOVE_SINK: Optional[Callable[[int, str, LatencyTrace], Awaitable[None]]] = None
+
 async def process_video(
     piece_model_session: ort.InferenceSession,
     corner_ort_session: ort.InferenceSession,
-    video: cv2.VideoCapture,
-    board_id: int
+    video: FrameReader,
+    board_id: int,
+    screen_session: Optional[ort.InferenceSession] = None
 ) -> None:
 
     cap = video 
-    if not cap.isOpened():
+    if not cap.is_opened():
         print("Error: Cannot open camera.")
         return
 
-    frame_counter = 0
     board_corners_ref: Optional[list] = None
-    from logic.api.services.board_service import BoardService
+    motion_gate = MotionGate()
+    occlusion_detector = OcclusionDetector()
+    pipeline: Optional[PayloadPipeline] = None
+    # Results of the pipelined frames in frame order, None ends the reporting task
+    pending: "asyncio.Queue[Optional[Tuple[asyncio.Future, LatencyTrace]]]" = asyncio.Queue(PIPELINE_DEPTH)
+    reporter: Optional[asyncio.Task] = None
 
+    loop = asyncio.get_running_loop()
     while True:
-        ok, frame = cap.read()
+        # Wait for the next frame without holding up the other tasks of the loop
+        ok, frame = await loop.run_in_executor(None, cap.read)
         if not ok:
             print("Error: Could not read frame.")
             break
 
-        if frame_counter % 5 == 0:
-            if board_corners_ref is None:
+        # Time from capture until the detector picked up the frame
+        trace = LatencyTrace(cap.last_capture_time)
+        trace.mark("wait")
+
+        if board_corners_ref is None:
+            try:
                 board_corners_ref = await get_board_corners(
-                    frame, piece_model_session, corner_ort_session
+                    frame, piece_model_session, corner_ort_session, trace
                 )
-                if board_corners_ref is None:
-                    print("Corners not found.")
-                    continue
-
-            # Check if the board_id is registered before proceeding
-            boards = board_storage.boards
-            if board_id in boards:
-                frame, payload = await get_payload(
-                    piece_model_session, frame, board_corners_ref, board_id
+            except FrameOverwrittenError:
+                # The frame was a view into a frame ring and the grabber came around to it, try the next one
+                continue
+            if board_corners_ref is None:
+                print("Corners not found.")
+                continue
+            keypoints = extract_xy_from_labeled_corners(board_corners_ref, frame)
+            motion_gate.set_roi(get_board_roi(keypoints, frame.shape))
+            _, boundary, _, _ = find_centers_and_boundary(board_corners_ref, frame)
+            occlusion_detector.set_boundary(boundary, frame.shape)
+            trace.mark("corners")
+            if PIPELINED:
+                pipeline = PayloadPipeline(
+                    piece_model_session, board_corners_ref, board_id, PIPELINE_DEPTH, screen_session, CASCADE_MARGIN
                 )
-                if payload:
-                    move = payload[1]["sans"][0]
-                    print(f"Detected move: {move}")
-                                        
-                    boards = storage.boards
-                    board_service = BoardService()
-                    await board_service.send_move(board_id, move)
-                    
+                reporter = asyncio.create_task(report_pipelined(board_id, pending, motion_gate.retry))
+
+        # Skip the pieces model while a hand is over the board
+        if occlusion_detector.update(frame):
+            motion_gate.hold(frame)
+            continue
+
+        # Infer right away when the hand has left, otherwise only when the board changed
+        if occlusion_detector.cleared:
+            motion_gate.force(frame)
+        elif not motion_gate.should_infer(frame):
+            continue
+        trace.mark("gate")
+
+        # Check if the board_id is registered before proceeding
+        if board_id not in board_storage.boards:
+            continue
+
+        if pipeline is not None:
+            # Raise what stopped the reporting, like the serial path does
+            if reporter.done():
+                reporter.result()
+            # Waits only while the pipeline is full, the next frame is read as this one is being detected
+            await pending.put((await pipeline.submit(frame, trace), trace))
+            continue
 
-            # cv2.imshow("Chess Board Detection", cv2.resize(frame, (1280, 720)))
-            # cv2.waitKey(1)
+        try:
+            frame, payload = await get_payload(
+                piece_model_session, frame, board_corners_ref, board_id, trace, screen_session, CASCADE_MARGIN
+            )
+        except FrameOverwrittenError:
+            motion_gate.retry()
+            continue
+        await report_payload(board_id, payload, trace)
 
-        frame_counter += 1
+        # cv2.imshow("Chess Board Detection", cv2.resize(frame, (1280, 720)))
+        # cv2.waitKey(1)
 
+    if reporter is not None:
+        await pending.put(None)
+        await reporter
+        pipeline.close()
     cap.release()
     # cv2.destroyAllWindows()
 
-async def prepare_to_run_video(board_id: int, video: cv2.VideoCapture):
-    piece_session  = ort.InferenceSession("resources/models/480M_leyolo_pieces.onnx")
-    corner_session = ort.InferenceSession("resources/models/480L_leyolo_xcorners.onnx")
+async def report_pipelined(board_id: int, pending: asyncio.Queue, on_overwritten: Callable[[], None]) -> None:
+    """ Report the results of the pipelined frames of a board in the order the frames were submitted.
+    on_overwritten is called for the frames the grabber overwrote before they were letterboxed. """
+    while True:
+        entry = await pending.get()
+        if entry is None:
+            return
+        result, trace = entry
+        try:
+            payload = await result
+        except FrameOverwrittenError:
+            on_overwritten()
+            continue
+        await report_payload(board_id, payload, trace)
+
+async def report_payload(board_id: int, payload: Optional[tuple], trace: LatencyTrace) -> None:
+    """ Send the move of a payload to the clients and record the latency of the frame, and of the move if there is one. """
+    from logic.api.services.board_service import BoardService
+
+    # Every inferred frame counts as a frame, the broadcast of a move is not part of that
+    result_seconds = trace.elapsed()
+    if payload:
+        move = payload[1]["sans"][0]
+        print(f"Detected move: {move}")
+
+        if MOVE_SINK is not None:
+            await MOVE_SINK(board_id, move, trace)
+        else:
+            board_service = BoardService()
+            await board_service.send_move(board_id, move, trace)
+
+    board = board_storage.boards.get(board_id)
+    if board is not None:
+        board.latency.record(trace, "frame", result_seconds)
+        if payload:
+            board.latency.record_total("move", trace.elapsed())
+
+def get_model_paths() -> Tuple[str, str]:
+    """ Paths of the pieces and xcorners models selected by the flags above. """
+    pieces_path = get_variant_path(resolve_model_variant(PIECES_MODEL_PATH, MODEL_VARIANT), UINT8_INPUT, PIECES_BATCHING)
+    xcorners_path = get_variant_path(resolve_model_variant(XCORNERS_MODEL_PATH, MODEL_VARIANT), UINT8_INPUT)
+    return pieces_path, xcorners_path
 
-    await process_video(piece_session, corner_session, video, board_id)
+def get_screen_model_path() -> Optional[str]:
+    """ Path of the low_res pieces model of the cascade, None without cascade or when that variant was not made. """
+    if not CASCADE:
+        return None
+    screen_path = get_variant_path(resolve_model_variant(PIECES_MODEL_PATH, "low_res"), UINT8_INPUT)
+    return None if screen_path == get_variant_path(PIECES_MODEL_PATH, UINT8_INPUT) else screen_path
 
+def use_model_cache() -> None:
+    """ Let the registry load the models through the cache of MODEL_CACHE_DIR, unless it was given one already. """
+    if MODEL_CACHE_DIR and model_registry.cache is None:
+        model_registry.set_cache(ModelCache(MODEL_CACHE_DIR))
 
-# quick manual test
+def preload_models() -> None:
+    """ Load and warm up the sessions of the selected models before the detectors start. """
+    use_model_cache()
+    for model_path in [*get_model_paths(), get_screen_model_path()]:
+        if model_path is not None:
+            model_registry.get_session(model_path)
+
+async def prepare_to_run_video(board_id: int, video: FrameReader, on_ready: Optional[Callable[[], None]] = None):
+    pieces_path, xcorners_path = get_model_paths()
+    use_model_cache()
+
+    # Every board shares the sessions of the process-wide registry
+    if PIECES_BATCHING:
+        piece_session = model_registry.get_batched_session(pieces_path, PIECES_MAX_BATCH, PIECES_MAX_WAIT)
+    else:
+        piece_session = model_registry.get_session(pieces_path)
+    corner_session = model_registry.get_session(xcorners_path)
+    screen_path = get_screen_model_path()
+    screen_session = model_registry.get_session(screen_path) if screen_path else None
+
+    # The registry hands out warmed-up sessions, the first frame of the board runs at full speed
+    if on_ready is not None:
+        on_ready()
+    await process_video(piece_session, corner_session, video, board_id, screen_session)
+
+
+# quick manual test on recorded footage:
+# python -m logic.machine_learning.run_video path/to/video.mp4 [--fast] [--uint8] [--pipelined] [--cascade] [--variant int8_static]
 if __name__ == "__main__":
-    asyncio.run(prepare_to_run_video())
+    import sys
+    import logic.machine_learning.run_video as run_video
+    from logic.api.entity.board import Board
+    from logic.api.entity.frame_source import VideoFileFrameSource
+
+    # The detector imports this file as a module, not as __main__
+    run_video.UINT8_INPUT = "--uint8" in sys.argv
+    run_video.PIPELINED = "--pipelined" in sys.argv
+    run_video.CASCADE = "--cascade" in sys.argv
+    if "--variant" in sys.argv:
+        run_video.MODEL_VARIANT = sys.argv[sys.argv.index("--variant") + 1]
+
+    replay_source = VideoFileFrameSource(sys.argv[1], realtime="--fast" not in sys.argv)
+    board_storage.boards = {1: Board(1, replay_source)}
+    asyncio.run(board_storage.boards[1].camera.detector.run())
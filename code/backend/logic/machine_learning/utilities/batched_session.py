@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+import numpy as np
+import onnxruntime as ort
+
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+
+class BatchedSession:
+    """
+    Session stand-in that batches the runs of all boards into one call of a shared session.
+
+    Every board's detector thread calls run as it would on an InferenceSession and blocks until
+    its result is ready. A worker thread waits up to max_wait after the first pending request for
+    more requests, stacks up to max_batch inputs, runs them at once and scatters the outputs back.
+
+    The model needs a dynamic batch dimension, see utilities/wrap_model.py --dynamic-batch.
+    """
+
+    def __init__(self, session: ort.InferenceSession, max_batch: int = 8, max_wait: float = 0.005):
+        """
+        Initialize the batched session and start its worker thread.
+
+        Args:
+            session (ort.InferenceSession): Session of a model with a dynamic batch dimension.
+            max_batch (int): Maximum number of requests run together.
+            max_wait (float): Seconds to wait for more requests after the first one.
+
+        Raises:
+            ValueError: If the model has a fixed batch size, or max_batch or max_wait are invalid.
+        """
+        if isinstance(session.get_inputs()[0].shape[0], int):
+            raise ValueError("Model must have a dynamic batch dimension, see wrap_model.py --dynamic-batch.")
+        if not isinstance(max_batch, int) or max_batch < 1:
+            raise ValueError("Max batch must be a positive integer.")
+        if max_wait < 0:
+            raise ValueError("Max wait must not be negative.")
+
+        self.session = session
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests: "queue.Queue[Optional[Tuple[Dict[str, np.ndarray], Future]]]" = queue.Queue()
+        # Requests are only queued while open, so none end up behind the worker's stop signal
+        self.lock = threading.Lock()
+        self.closed = False
+        self.batches = 0
+        self.batched_requests = 0
+        self.thread = threading.Thread(target=self._batch_loop, daemon=True)
+        self.thread.start()
+
+    def get_inputs(self) -> list:
+        """ Inputs of the model, as InferenceSession.get_inputs. """
+        return self.session.get_inputs()
+
+    def get_outputs(self) -> list:
+        """ Outputs of the model, as InferenceSession.get_outputs. """
+        return self.session.get_outputs()
+
+    def run(self, output_names: Optional[List[str]], input_feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        """
+        Run one request of batch size 1 as part of the next batch, blocking until it is done.
+
+        Args:
+            output_names (Optional[List[str]]): Must be None, all outputs are returned.
+            input_feed (Dict[str, np.ndarray]): Inputs by name, with a batch size of 1.
+
+        Returns:
+            List[np.ndarray]: Outputs of this request, with a batch size of 1.
+
+        Raises:
+            RuntimeError: If the session was closed.
+        """
+        if output_names is not None:
+            raise ValueError("Batched sessions always return all outputs.")
+
+        future: Future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Batched session is closed.")
+            self.requests.put((input_feed, future))
+        return future.result()
+
+    def close(self) -> None:
+        """ Stop the worker thread after the pending requests. Later runs raise RuntimeError. """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(None)
+        self.thread.join()
+
+    def get_stats(self) -> dict:
+        """ Get the number of batches run and their mean size. """
+        return {
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "mean_batch": self.batched_requests / self.batches if self.batches else 0.0
+        }
+
+    def _collect(self, first: Tuple[Dict[str, np.ndarray], Future]) -> Tuple[list, bool]:
+        """ Collect more requests until the batch is full or max_wait has passed. """
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, False
+            batch.append(request)
+        return batch, True
+
+    def _batch_loop(self) -> None:
+        """ Run batches until closed. """
+        running = True
+        while running:
+            first = self.requests.get()
+            if first is None:
+                break
+            batch, running = self._collect(first)
+
+            try:
+                names = batch[0][0].keys()
+                feed = {name: np.concatenate([input_feed[name] for input_feed, _ in batch]) for name in names}
+                outputs = self.session.run(None, feed)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+            for i, (_, future) in enumerate(batch):
+                future.set_result([output[i:i + 1] for output in outputs])
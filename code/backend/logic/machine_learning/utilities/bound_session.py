@@ -0,0 +1,111 @@
+import threading
+import numpy as np
+import onnxruntime as ort
+
+from typing import List
+from logic.machine_learning.utilities.preprocess import InputBuffer
+
+# NumPy types of the ONNX Runtime tensor types the models use
+_TENSOR_TYPES = {
+    "tensor(float16)": np.float16,
+    "tensor(float)": np.float32,
+    "tensor(uint8)": np.uint8,
+    "tensor(int64)": np.int64
+}
+
+
+class BoundSession:
+    """
+    Runs a model session on preallocated input and output arrays through IO binding.
+
+    The input buffer is what get_input writes the frame into and the outputs are written in place
+    on every run, so a frame is inferred without allocating arrays or looking up the model inputs.
+    Both are overwritten by the next run and must be consumed before that.
+
+    Session stand-ins such as BatchedSession cannot bind memory, those are run with the input
+    buffer as a plain feed instead.
+    """
+
+    def __init__(self, session: ort.InferenceSession):
+        """
+        Initialize the bound session and bind its buffers.
+
+        Args:
+            session (ort.InferenceSession): The model session, or a stand-in with the same run method.
+        """
+        self.session = session
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        uint8 = model_input.type == "tensor(uint8)"
+        # NHWC for the uint8 models of utilities/wrap_model.py, NCHW otherwise
+        height, width = model_input.shape[1:3] if uint8 else model_input.shape[2:4]
+        if isinstance(width, int) and isinstance(height, int):
+            self.input_buffer = InputBuffer(uint8, width, height)
+        else:
+            self.input_buffer = InputBuffer(uint8)
+        self.input_size = (self.input_buffer.width, self.input_buffer.height)
+        self.output_names = [output.name for output in session.get_outputs()]
+        self.binding = None
+        self.outputs: List[np.ndarray] = []
+
+        if not isinstance(session, ort.InferenceSession):
+            return
+
+        # Dynamic dimensions are batch dimensions here, the detectors run one frame at a time
+        self.outputs = [
+            np.empty([dim if isinstance(dim, int) else 1 for dim in output.shape], dtype=_TENSOR_TYPES[output.type])
+            for output in session.get_outputs()
+        ]
+        image4d = self.input_buffer.image4d
+        self.binding = session.io_binding()
+        self.binding.bind_input(self.input_name, "cpu", 0, image4d.dtype, image4d.shape, image4d.ctypes.data)
+        for name, output in zip(self.output_names, self.outputs):
+            self.binding.bind_output(name, "cpu", 0, output.dtype, output.shape, output.ctypes.data)
+
+    def run(self) -> List[np.ndarray]:
+        """
+        Run the model on the current content of the input buffer.
+
+        Returns:
+            List[np.ndarray]: The outputs of the model, reused by the next run.
+        """
+        if self.binding is None:
+            return self.session.run(None, {self.input_name: self.input_buffer.image4d})
+
+        self.session.run_with_iobinding(self.binding)
+        return self.outputs
+
+
+_bound = threading.local()
+
+def get_bound_session(session: ort.InferenceSession) -> BoundSession:
+    """
+    Get the bound session of a model session for the calling thread.
+
+    Bound sessions are kept per thread so that sessions shared between boards never see a half
+    written input or have their outputs overwritten by another board.
+
+    Args:
+        session (ort.InferenceSession): The model session.
+
+    Returns:
+        BoundSession: The bound session to prepare the input in and run.
+    """
+    bound = _bound.__dict__.setdefault("by_session", {})
+    if id(session) not in bound:
+        bound[id(session)] = BoundSession(session)
+    return bound[id(session)]
+
+
+def warm_up(session: ort.InferenceSession, runs: int = 2) -> None:
+    """
+    Run a session on a blank input a few times, so the first frame of a board is not the one that
+    pays for allocating the memory arena and preparing the kernels.
+
+    Args:
+        session (ort.InferenceSession): The model session.
+        runs (int): Number of runs.
+    """
+    bound_session = get_bound_session(session)
+    for _ in range(runs):
+        bound_session.run()
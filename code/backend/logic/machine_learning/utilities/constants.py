@@ -1,6 +1,8 @@
 START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 MODEL_WIDTH = 480
 MODEL_HEIGHT = 288
+PIECES_MODEL_PATH = "resources/models/480M_leyolo_pieces.onnx"
+XCORNERS_MODEL_PATH = "resources/models/480L_leyolo_xcorners.onnx"
 MARKER_RADIUS = 25
 MARKER_DIAMETER = 2 * MARKER_RADIUS
 CORNER_KEYS = ["h1", "a1", "a8", "h8"]
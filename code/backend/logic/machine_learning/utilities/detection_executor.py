@@ -0,0 +1,86 @@
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class DetectionExecutor:
+    """
+    Thread pool that runs the CPU-bound detection stages off the event loop.
+
+    Model runs, NumPy post-processing and python-chess move search block for tens of milliseconds.
+    The detection coroutines hand that work to this pool and await it, so the loop that runs them
+    keeps serving websockets and broadcasting moves in the meantime.
+
+    Every worker keeps its own bound sessions, see utilities/bound_session.py, so boards running
+    on different workers never share input or output buffers.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Initialize the executor. The pool is started on first use.
+
+        Args:
+            max_workers (int): Number of stages that may run at the same time.
+
+        Raises:
+            ValueError: If max_workers is not a positive integer.
+        """
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.set_max_workers(max_workers)
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """
+        Set the number of stages that may run at the same time. Stages already running finish on the old pool.
+
+        Args:
+            max_workers (int): Number of worker threads.
+
+        Raises:
+            ValueError: If max_workers is not a positive integer.
+        """
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError("Max workers must be a positive integer.")
+
+        with self.lock:
+            if self.pool is not None and max_workers != self.max_workers:
+                self.pool.shutdown(wait=False)
+                self.pool = None
+            self.max_workers = max_workers
+
+    def get_pool(self) -> ThreadPoolExecutor:
+        """ Get the thread pool, starting it if needed. """
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="detection")
+            return self.pool
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function in the pool and wait for its result without blocking the event loop.
+
+        Args:
+            func (Callable[..., Any]): The blocking function.
+            *args (Any): Positional arguments of the function.
+            **kwargs (Any): Keyword arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_pool(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """ Stop the pool after the stages that are running. """
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+                self.pool = None
+
+
+# Shared by all boards of the process
+detection_executor = DetectionExecutor()
@@ -0,0 +1,166 @@
+"""
+Cache of graph-optimized models in ONNX Runtime's ORT format, so a restart skips parsing and optimizing the ONNX files.
+
+An entry is keyed by the content of the model, the ONNX Runtime version, the options that change the
+optimized graph and the CPU. Optimizations at the "all" level lay out tensors for the instruction set
+of the host, so a cache is only valid on the machine that made it. A missing or unreadable entry is
+made again on the next load, while the session is created anyway.
+
+Run from the backend folder to fill the cache before the detectors start:
+  python -m logic.machine_learning.utilities.model_cache
+  python -m logic.machine_learning.utilities.model_cache resources/models/480M_leyolo_pieces_low_res.onnx
+"""
+import argparse
+import glob
+import hashlib
+import os
+import platform
+import re
+import time
+import onnxruntime as ort
+
+from typing import Optional, Tuple
+from logic.machine_learning.utilities.session_profile import SessionProfile
+
+EXECUTION_PROVIDERS = ["CPUExecutionProvider"]
+
+# Hex digits of the model hash and of the key in the name of a cached model
+HASH_LENGTH = 16
+
+
+def get_cpu_signature() -> str:
+    """ Get the CPU model of the host, the machine type where it cannot be read. """
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return f"{platform.machine()} {platform.processor()}"
+
+
+class ModelCache:
+    """ Directory of graph-optimized ORT format models, see the module docstring. """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the cache. The directory is created when the first entry is written.
+
+        Args:
+            directory (str): Directory of the cached models.
+        """
+        self.directory = directory
+
+    def get_key(self, model_path: str, profile: SessionProfile) -> str:
+        """
+        Get the key of the cached model of a model file loaded with a session profile.
+
+        Thread counts and memory options do not change the optimized graph and are not part of the key.
+
+        Args:
+            model_path (str): Path of the ONNX model.
+            profile (SessionProfile): Tuning options of the session.
+
+        Returns:
+            str: Hex digest of everything the optimized model depends on.
+        """
+        return self._get_key(self.get_model_hash(model_path), profile)
+
+    def get_model_hash(self, model_path: str) -> str:
+        """
+        Get the hash of the content of a model file.
+
+        Args:
+            model_path (str): Path of the ONNX model.
+
+        Returns:
+            str: Hex digest of the model file.
+        """
+        digest = hashlib.sha256()
+        with open(model_path, "rb") as model_file:
+            for chunk in iter(lambda: model_file.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_path(self, model_path: str, profile: SessionProfile) -> str:
+        """ Get the path of the cached model, e.g. "cache/480M_leyolo_pieces.<model hash>.<key>.ort". """
+        model_hash = self.get_model_hash(model_path)
+        return self._get_path(model_path, model_hash, self._get_key(model_hash, profile))
+
+    def _get_key(self, model_hash: str, profile: SessionProfile) -> str:
+        """ Get the key of a model with a known hash, see get_key. """
+        digest = hashlib.sha256(model_hash.encode())
+        for part in (ort.__version__, profile.graph_optimization, ",".join(EXECUTION_PROVIDERS), get_cpu_signature()):
+            digest.update(b"\0" + part.encode())
+        return digest.hexdigest()
+
+    def _get_path(self, model_path: str, model_hash: str, key: str) -> str:
+        """ Get the path of a cached model from the hash of the model and its key. """
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.directory, f"{name}.{model_hash[:HASH_LENGTH]}.{key[:HASH_LENGTH]}.ort")
+
+    def load(self, model_path: str, profile: SessionProfile) -> Tuple[ort.InferenceSession, bool]:
+        """
+        Create a session of a model from its cached optimized model, writing that first if there is none.
+
+        Args:
+            model_path (str): Path of the ONNX model.
+            profile (SessionProfile): Tuning options of the session.
+
+        Returns:
+            Tuple[ort.InferenceSession, bool]: The session and whether it was loaded from the cache.
+        """
+        model_hash = self.get_model_hash(model_path)
+        cached_path = self._get_path(model_path, model_hash, self._get_key(model_hash, profile))
+        if os.path.exists(cached_path):
+            try:
+                return ort.InferenceSession(cached_path, sess_options=profile.to_session_options(), providers=EXECUTION_PROVIDERS), True
+            except Exception as error:
+                print(f"Dropping unreadable cached model {cached_path}: {error}")
+                os.remove(cached_path)
+
+        # Optimizing the model is part of creating the session, it only has to be saved on the way
+        os.makedirs(self.directory, exist_ok=True)
+        partial_path = f"{cached_path}.{os.getpid()}.partial"
+        options = profile.to_session_options()
+        options.optimized_model_filepath = partial_path
+        options.add_session_config_entry("session.save_model_format", "ORT")
+        session = ort.InferenceSession(model_path, sess_options=options, providers=EXECUTION_PROVIDERS)
+
+        if os.path.exists(partial_path):
+            os.replace(partial_path, cached_path)
+            self._remove_stale(model_path, model_hash)
+        return session, False
+
+    def _remove_stale(self, model_path: str, model_hash: str) -> None:
+        """
+        Remove the cached models of older versions of a model.
+
+        Entries of the same model with other keys (another optimization level, ONNX Runtime version
+        or CPU sharing the directory) stay.
+        """
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        entry = re.compile(re.escape(name) + rf"\.([0-9a-f]{{{HASH_LENGTH}}})\.[0-9a-f]{{{HASH_LENGTH}}}\.ort")
+        for path in glob.glob(os.path.join(glob.escape(self.directory), f"{glob.escape(name)}.*.ort")):
+            match = entry.fullmatch(os.path.basename(path))
+            if match is not None and match.group(1) != model_hash[:HASH_LENGTH]:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    from logic.machine_learning.utilities.constants import PIECES_MODEL_PATH, XCORNERS_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Write the graph-optimized ORT format models the detectors load at startup.")
+    parser.add_argument("models", nargs="*", default=[PIECES_MODEL_PATH, XCORNERS_MODEL_PATH], help="Paths of the ONNX models")
+    parser.add_argument("--cache-dir", default=os.path.join(os.path.dirname(PIECES_MODEL_PATH), "cache"))
+    parser.add_argument("--graph-optimization", default="all", help="Graph optimization level the detectors load with")
+    args = parser.parse_args()
+
+    cache = ModelCache(args.cache_dir)
+    profile = SessionProfile(graph_optimization=args.graph_optimization)
+    for model_path in args.models:
+        start = time.perf_counter()
+        _, hit = cache.load(model_path, profile)
+        state = "already cached" if hit else "cached"
+        print(f"{model_path} -> {cache.get_path(model_path, profile)} ({state}, {1000 * (time.perf_counter() - start):.0f} ms)")
@@ -0,0 +1,215 @@
+import atexit
+import os
+import threading
+import time
+import onnxruntime as ort
+
+from typing import Dict, List, Optional
+from logic.machine_learning.utilities.batched_session import BatchedSession
+from logic.machine_learning.utilities.bound_session import warm_up
+from logic.machine_learning.utilities.model_cache import ModelCache
+from logic.machine_learning.utilities.session_profile import SessionProfile
+
+
+def get_rss_mb() -> Optional[float]:
+    """
+    Get the current resident memory of this process.
+
+    Returns:
+        Optional[float]: Resident memory in MB, or None if it cannot be read on this platform.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of ONNX Runtime sessions, so every model is loaded once instead of once per board.
+
+    InferenceSession.run may be called from several threads at once. With a pool size above one,
+    each request for a model gets the next session of a small round-robin pool, which spreads the
+    boards over a few sessions when a single one becomes a bottleneck.
+
+    Every session is warmed up before it is handed out. With a model cache, sessions are created
+    from the graph-optimized models of utilities/model_cache.py.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 1,
+        profile: Optional[SessionProfile] = None,
+        cache: Optional[ModelCache] = None,
+        warm_up_runs: int = 2
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            pool_size (int): Number of sessions loaded per model.
+            profile (Optional[SessionProfile]): Tuning options of the sessions, defaults to SessionProfile().
+            cache (Optional[ModelCache]): Cache of optimized models, None loads the ONNX files directly.
+            warm_up_runs (int): Runs on a blank input before a session is handed out.
+
+        Raises:
+            ValueError: If the pool size is not a positive integer.
+        """
+        self.set_pool_size(pool_size)
+        self.set_profile(profile or SessionProfile())
+        self.set_cache(cache)
+        self.warm_up_runs = warm_up_runs
+        self.sessions: Dict[str, List[ort.InferenceSession]] = {}
+        self.cached: Dict[str, bool] = {}
+        self.load_seconds: Dict[str, float] = {}
+        self.handed_out: Dict[str, int] = {}
+        self.memory: Dict[str, Optional[float]] = {}
+        self.batched: Dict[str, BatchedSession] = {}
+        self.lock = threading.Lock()
+
+    def set_pool_size(self, pool_size: int) -> None:
+        """
+        Set the number of sessions loaded per model. Models that are already loaded keep their pool.
+
+        Args:
+            pool_size (int): Number of sessions per model.
+
+        Raises:
+            ValueError: If the pool size is not a positive integer.
+        """
+        if not isinstance(pool_size, int) or pool_size < 1:
+            raise ValueError("Pool size must be a positive integer.")
+
+        self.pool_size = pool_size
+
+    def set_profile(self, profile: SessionProfile) -> None:
+        """
+        Set the tuning options of the sessions. Models that are already loaded keep their options.
+
+        Args:
+            profile (SessionProfile): Tuning options of the sessions.
+        """
+        self.profile = profile
+
+    def set_cache(self, cache: Optional[ModelCache]) -> None:
+        """
+        Set the cache of optimized models. Models that are already loaded are not reloaded.
+
+        Args:
+            cache (Optional[ModelCache]): The cache, None loads the ONNX files directly.
+        """
+        self.cache = cache
+
+    def get_session(self, model_path: str) -> ort.InferenceSession:
+        """
+        Get a shared session of a model, loading the model on first use.
+
+        Args:
+            model_path (str): Path of the ONNX model.
+
+        Returns:
+            ort.InferenceSession: A session that may be used from any thread.
+        """
+        key = os.path.abspath(model_path)
+        with self.lock:
+            if key not in self.sessions:
+                self._load(key)
+
+            pool = self.sessions[key]
+            session = pool[self.handed_out[key] % len(pool)]
+            self.handed_out[key] += 1
+            return session
+
+    def get_batched_session(self, model_path: str, max_batch: int = 8, max_wait: float = 0.005) -> BatchedSession:
+        """
+        Get the batched session of a model, which runs the requests of all boards together.
+
+        The batching options are taken from the first call for a model.
+
+        Args:
+            model_path (str): Path of an ONNX model with a dynamic batch dimension.
+            max_batch (int): Maximum number of requests run together.
+            max_wait (float): Seconds to wait for more requests after the first one.
+
+        Returns:
+            BatchedSession: The shared batched session.
+        """
+        key = os.path.abspath(model_path)
+        session = self.get_session(key)
+        with self.lock:
+            if key not in self.batched:
+                self.batched[key] = BatchedSession(session, max_batch, max_wait)
+            return self.batched[key]
+
+    def _load(self, key: str) -> None:
+        """ Load and warm up the session pool of a model and record what it took. Called with the lock held. """
+        rss_before = get_rss_mb()
+        start = time.perf_counter()
+        pool = []
+        cached = []
+        for _ in range(self.pool_size):
+            if self.cache is not None:
+                session, hit = self.cache.load(key, self.profile)
+            else:
+                session, hit = ort.InferenceSession(key, sess_options=self.profile.to_session_options()), False
+            warm_up(session, self.warm_up_runs)
+            pool.append(session)
+            cached.append(hit)
+        rss_after = get_rss_mb()
+
+        self.sessions[key] = pool
+        self.cached[key] = cached[0]
+        self.load_seconds[key] = time.perf_counter() - start
+        self.handed_out[key] = 0
+        self.memory[key] = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+
+    def get_memory_report(self) -> Dict[str, dict]:
+        """
+        Report the loaded models.
+
+        Returns:
+            Dict[str, dict]: Per model file name: number of sessions, number of users, size on disk,
+                the resident memory the process grew by while loading it (None if unknown), whether it
+                came from the model cache, the milliseconds loading and warming it up took and the
+                batching counters if the model is batched.
+        """
+        with self.lock:
+            report = {}
+            for key, pool in self.sessions.items():
+                report[os.path.basename(key)] = {
+                    "sessions": len(pool),
+                    "users": self.handed_out[key],
+                    "file_mb": os.path.getsize(key) / 2**20,
+                    "load_rss_mb": self.memory[key],
+                    "from_cache": self.cached[key],
+                    "load_ms": 1000 * self.load_seconds[key]
+                }
+                if key in self.batched:
+                    report[os.path.basename(key)]["batching"] = self.batched[key].get_stats()
+            return report
+
+    def clear(self) -> None:
+        """ Drop all sessions and stop the batching workers. Boards that still hold a plain session keep using it. """
+        with self.lock:
+            for batched in self.batched.values():
+                batched.close()
+            self.batched = {}
+            self.sessions = {}
+            self.handed_out = {}
+            self.memory = {}
+            self.cached = {}
+            self.load_seconds = {}
+
+
+# Shared by all boards of the process
+model_registry = ModelRegistry()
+
+# Let the batching workers finish their batch, a daemon thread still inside ONNX Runtime aborts the interpreter on exit
+atexit.register(model_registry.clear)
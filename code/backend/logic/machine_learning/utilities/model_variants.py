@@ -0,0 +1,349 @@
+"""
+Model variants and the tool that converts the exported float16 models into them.
+
+  full          the exported float16 model
+  simplified    the model simplified with onnx-simplifier, only shipped for the pieces model
+  float32       float32 weights and compute, for CPUs without native float16 arithmetic
+  int8_dynamic  int8 weights, activations quantized at run time
+  int8_static   int8 weights and activations, activation ranges calibrated on frames
+  low_res       the full model on a LOW_RES_SIZE input, the screening pass of the cascade in run_video.py
+
+Every variant keeps the float16 input and outputs of the full model, so the rest of the pipeline and
+utilities/wrap_model.py work on all of them. Compare the variants with benchmark_variants.py on the
+target machine before picking one, the speed and accuracy trade differs a lot between CPUs.
+
+Run from the backend folder:
+  python -m logic.machine_learning.utilities.model_variants resources/models/480M_leyolo_pieces.onnx --variant int8_static --calibration path/to/video.mp4
+  python -m logic.machine_learning.utilities.model_variants resources/models/480M_leyolo_pieces.onnx --variant low_res
+"""
+import argparse
+import os
+import numpy as np
+from typing import List, Optional, TYPE_CHECKING
+
+# onnx and the quantization tooling are only needed by the converter, the detectors just look up model paths here
+if TYPE_CHECKING:
+    import onnx
+
+MODEL_VARIANTS = {
+    "full": "",
+    "simplified": "_simplified",
+    "float32": "_float32",
+    "int8_dynamic": "_int8_dynamic",
+    "int8_static": "_int8_static",
+    "low_res": "_low_res"
+}
+
+# Input width and height of the low_res variant, multiples of the largest head stride with the aspect ratio of the full input
+LOW_RES_SIZE = (320, 192)
+
+# Nodes of the detection head, which decodes boxes and scores and loses the most accuracy when quantized
+DETECTION_HEAD = "/model.42/"
+
+def get_model_variant_path(model_path: str, variant: str) -> str:
+    """
+    Get the path of a variant of a model.
+
+    Args:
+        model_path (str): Path of the full model, e.g. "resources/models/480M_leyolo_pieces.onnx".
+        variant (str): One of MODEL_VARIANTS.
+
+    Returns:
+        str: Path of the variant, e.g. "resources/models/480M_leyolo_pieces_int8_static.onnx".
+
+    Raises:
+        ValueError: If the variant is unknown.
+    """
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Model variant must be one of {list(MODEL_VARIANTS)}.")
+
+    root, extension = os.path.splitext(model_path)
+    return f"{root}{MODEL_VARIANTS[variant]}{extension}"
+
+def resolve_model_variant(model_path: str, variant: str) -> str:
+    """
+    Get the path of a variant of a model, falling back to the full model when the variant was not made.
+
+    Args:
+        model_path (str): Path of the full model.
+        variant (str): One of MODEL_VARIANTS.
+
+    Returns:
+        str: Path of the model to load.
+    """
+    variant_path = get_model_variant_path(model_path, variant)
+    if os.path.exists(variant_path):
+        return variant_path
+
+    print(f"No {variant} variant of {os.path.basename(model_path)}, using the full model.")
+    return model_path
+
+def convert_to_float32(model: "onnx.ModelProto") -> "onnx.ModelProto":
+    """
+    Convert a float16 model to float32 compute, keeping its float16 input and outputs.
+
+    Args:
+        model (onnx.ModelProto): Model with float16 weights.
+
+    Returns:
+        onnx.ModelProto: Model with float32 weights, with a Cast after its input and before its outputs.
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    converted = onnx.ModelProto()
+    converted.CopyFrom(model)
+    graph = converted.graph
+
+    for initializer in graph.initializer:
+        if initializer.data_type == TensorProto.FLOAT16:
+            initializer.CopyFrom(numpy_helper.from_array(numpy_helper.to_array(initializer).astype(np.float32), initializer.name))
+
+    for node in graph.node:
+        for attribute in node.attribute:
+            if node.op_type == "Cast" and attribute.name == "to" and attribute.i == TensorProto.FLOAT16:
+                attribute.i = TensorProto.FLOAT
+            if node.op_type == "Constant" and attribute.name == "value" and attribute.t.data_type == TensorProto.FLOAT16:
+                attribute.t.CopyFrom(numpy_helper.from_array(numpy_helper.to_array(attribute.t).astype(np.float32)))
+
+    initializers = {initializer.name for initializer in graph.initializer}
+    for graph_input in graph.input:
+        if graph_input.name in initializers or graph_input.type.tensor_type.elem_type != TensorProto.FLOAT16:
+            continue
+        name = f"{graph_input.name}_float32"
+        for node in graph.node:
+            for i, node_input in enumerate(node.input):
+                if node_input == graph_input.name:
+                    node.input[i] = name
+        graph.node.insert(0, helper.make_node("Cast", [graph_input.name], [name], to=TensorProto.FLOAT))
+
+    for graph_output in graph.output:
+        if graph_output.type.tensor_type.elem_type != TensorProto.FLOAT16:
+            continue
+        name = f"{graph_output.name}_float32"
+        for node in graph.node:
+            for i, node_output in enumerate(node.output):
+                if node_output == graph_output.name:
+                    node.output[i] = name
+            for i, node_input in enumerate(node.input):
+                if node_input == graph_output.name:
+                    node.input[i] = name
+        graph.node.append(helper.make_node("Cast", [name], [graph_output.name], to=TensorProto.FLOAT16))
+
+    # The inferred shapes still carry float16 types, they are inferred again on load
+    del graph.value_info[:]
+
+    onnx.checker.check_model(converted)
+    return converted
+
+def convert_to_low_resolution(model: "onnx.ModelProto", width: int, height: int) -> "onnx.ModelProto":
+    """
+    Change the input size of a model, the convolutions work on any size but the exported detection head does not.
+
+    The head decodes boxes with anchor points and strides for every cell of the feature maps of the
+    exported input size, those and the reshapes to the number of cells are made again for the new size.
+
+    Args:
+        model (onnx.ModelProto): Model with an NCHW input.
+        width (int): New input width, a multiple of the largest stride.
+        height (int): New input height, a multiple of the largest stride.
+
+    Returns:
+        onnx.ModelProto: Model with the new input size.
+
+    Raises:
+        ValueError: If the head does not decode boxes the way the exported models do.
+    """
+    import onnx
+    from onnx import numpy_helper
+
+    converted = onnx.ModelProto()
+    converted.CopyFrom(model)
+    graph = converted.graph
+    input_dims = graph.input[0].type.tensor_type.shape.dim
+    output_dims = graph.output[0].type.tensor_type.shape.dim
+    cell_count = output_dims[2].dim_value
+
+    head_inputs = {name for node in graph.node if node.name.startswith(DETECTION_HEAD) for name in node.input}
+    anchors = strides = None
+    for initializer in graph.initializer:
+        if initializer.name in head_inputs and list(initializer.dims) == [1, 2, cell_count]:
+            anchors = initializer
+        elif initializer.name in head_inputs and list(initializer.dims) == [1, cell_count]:
+            strides = initializer
+    if anchors is None or strides is None:
+        raise ValueError("The detection head has no anchor points and strides to resize.")
+
+    def get_anchors(width: int, height: int, levels: List[float]) -> tuple:
+        """ Anchor points in the middle of every feature map cell and their strides, level by level. """
+        points, point_strides = [], []
+        for stride in levels:
+            ys, xs = np.meshgrid(np.arange(height // stride), np.arange(width // stride), indexing="ij")
+            points.append(np.stack([xs.ravel(), ys.ravel()]) + 0.5)
+            point_strides.append(np.full(xs.size, stride))
+        return np.concatenate(points, axis=1)[np.newaxis], np.concatenate(point_strides)[np.newaxis]
+
+    old_anchors, old_strides = numpy_helper.to_array(anchors), numpy_helper.to_array(strides)
+    levels = list(dict.fromkeys(old_strides.ravel().tolist()))
+    expected_anchors, expected_strides = get_anchors(input_dims[3].dim_value, input_dims[2].dim_value, levels)
+    if not (np.array_equal(expected_anchors, old_anchors) and np.array_equal(expected_strides, old_strides)):
+        raise ValueError("The anchor points of the detection head are not laid out the way they are made again.")
+    if width % max(levels) or height % max(levels):
+        raise ValueError(f"The input size must be a multiple of {int(max(levels))}.")
+
+    new_anchors, new_strides = get_anchors(width, height, levels)
+    anchors.CopyFrom(numpy_helper.from_array(new_anchors.astype(old_anchors.dtype), anchors.name))
+    strides.CopyFrom(numpy_helper.from_array(new_strides.astype(old_strides.dtype), strides.name))
+    new_cell_count = new_anchors.shape[2]
+
+    # Reshapes of the head to the number of cells
+    for initializer in graph.initializer:
+        if initializer.name in head_inputs and initializer.data_type == onnx.TensorProto.INT64:
+            shape = numpy_helper.to_array(initializer)
+            if shape.ndim == 1 and cell_count in shape:
+                shape = np.where(shape == cell_count, new_cell_count, shape)
+                initializer.CopyFrom(numpy_helper.from_array(shape.astype(np.int64), initializer.name))
+
+    input_dims[2].dim_value = height
+    input_dims[3].dim_value = width
+    output_dims[2].dim_value = new_cell_count
+    # The inferred shapes are those of the old size, they are inferred again on load
+    del graph.value_info[:]
+
+    onnx.checker.check_model(converted)
+    return converted
+
+def get_calibration_frames(video_path: Optional[str] = None, frame_count: int = 32) -> List[np.ndarray]:
+    """
+    Get preprocessed model inputs to calibrate or benchmark with.
+
+    Args:
+        video_path (Optional[str]): Recorded video of a board, frames are spread over the whole video.
+            Defaults to synthetic boards, which exercise the models but say little about accuracy.
+        frame_count (int): Number of frames.
+
+    Returns:
+        List[np.ndarray]: Float16 NCHW model inputs.
+
+    Raises:
+        FileNotFoundError: If the video cannot be opened.
+    """
+    import cv2
+    from logic.api.entity.frame_source import VideoFileFrameSource
+    from logic.api.entity.synthetic_frame_source import SyntheticFrameSource
+    from logic.machine_learning.utilities.preprocess import get_input
+
+    step = 1
+    if video_path is not None:
+        source = VideoFileFrameSource(video_path, realtime=False)
+    else:
+        moves = ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "O-O", "Be7"]
+        source = SyntheticFrameSource(moves, fps=10, move_interval=0.5, realtime=False)
+
+    if not source.open():
+        raise FileNotFoundError(f"Could not open {source.describe()}.")
+    if video_path is not None:
+        step = max(int(source.capture.get(cv2.CAP_PROP_FRAME_COUNT)) // frame_count, 1)
+
+    frames = []
+    index = 0
+    while len(frames) < frame_count:
+        success, frame = source.read()
+        if not success:
+            break
+        if index % step == 0:
+            frames.append(get_input(frame)[0].copy())
+        index += 1
+    source.release()
+    return frames
+
+def convert_model_file(
+    model_path: str,
+    variant: str,
+    calibration_video: Optional[str] = None,
+    calibration_frames: int = 32,
+    quantize_head: bool = False
+) -> str:
+    """
+    Write a variant of a model file next to it.
+
+    Args:
+        model_path (str): Path of the full float16 model.
+        variant (str): "float32", "int8_dynamic", "int8_static" or "low_res".
+        calibration_video (Optional[str]): Recorded video to calibrate int8_static on, see get_calibration_frames.
+        calibration_frames (int): Number of frames to calibrate on.
+        quantize_head (bool): Also quantize the detection head.
+
+    Returns:
+        str: Path of the variant.
+
+    Raises:
+        ValueError: If the variant is not made by conversion.
+    """
+    import onnx
+    import tempfile
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if variant not in ("float32", "int8_dynamic", "int8_static", "low_res"):
+        raise ValueError("Only the float32, int8_dynamic, int8_static and low_res variants are made by conversion.")
+
+    output_path = get_model_variant_path(model_path, variant)
+    if variant == "low_res":
+        onnx.save(convert_to_low_resolution(onnx.load(model_path), *LOW_RES_SIZE), output_path)
+        return output_path
+
+    float32_model = convert_to_float32(onnx.load(model_path))
+    if variant == "float32":
+        onnx.save(float32_model, output_path)
+        return output_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        float32_path = os.path.join(directory, "float32.onnx")
+        prepared_path = os.path.join(directory, "prepared.onnx")
+        onnx.save(float32_model, float32_path)
+        quant_pre_process(float32_path, prepared_path, skip_symbolic_shape=True)
+
+        excluded = []
+        if not quantize_head:
+            excluded = [node.name for node in onnx.load(prepared_path).graph.node if node.name.startswith(DETECTION_HEAD)]
+
+        if variant == "int8_dynamic":
+            quantize_dynamic(prepared_path, output_path, weight_type=QuantType.QInt8, nodes_to_exclude=excluded)
+            return output_path
+
+        input_name = float32_model.graph.input[0].name
+        frames = get_calibration_frames(calibration_video, calibration_frames)
+
+        class CalibrationReader(CalibrationDataReader):
+            """ Feeds the calibration frames to the quantizer. """
+
+            def __init__(self):
+                self.frames = iter(frames)
+
+            def get_next(self) -> Optional[dict]:
+                frame = next(self.frames, None)
+                return None if frame is None else {input_name: frame}
+
+        quantize_static(
+            prepared_path, output_path, CalibrationReader(),
+            quant_format=QuantFormat.QOperator, per_channel=True,
+            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+            nodes_to_exclude=excluded
+        )
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the float16 ONNX models to float32, int8 or low resolution variants.")
+    parser.add_argument("models", nargs="+", help="Paths of the full float16 models")
+    parser.add_argument("--variant", choices=["float32", "int8_dynamic", "int8_static", "low_res"], default="int8_static")
+    parser.add_argument("--calibration", help="Recorded video to calibrate int8_static on, synthetic boards otherwise")
+    parser.add_argument("--calibration-frames", type=int, default=32)
+    parser.add_argument("--quantize-head", action="store_true", help="Also quantize the detection head")
+    args = parser.parse_args()
+
+    for model_path in args.models:
+        output_path = convert_model_file(model_path, args.variant, args.calibration, args.calibration_frames, args.quantize_head)
+        print(f"{model_path} -> {output_path}")
@@ -1,8 +1,8 @@
 import cv2
 import numpy as np
-import tensorflow as tf
 
 from typing import Tuple, List, Dict, Optional
+from logic.api.entity.shared_frame_ring import FrameOverwrittenError, RingFrame
 from logic.machine_learning.detection.bbox_scores import get_bbox
 from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
 
@@ -41,20 +41,60 @@ def preprocess_image(image: np.ndarray) -> np.ndarray:
     #Ensuring consistent input range, as many models are trained with inputs in the [0, 1] range.
     
 
+class InputBuffer:
+    """
+    Preallocated model input that get_input writes the letterboxed frame into.
+
+    The float16 CHW tensor and the uint8 resize targets are reused from frame to frame, so
+    preprocessing does not allocate full-frame arrays once the buffer is warm. The returned
+    image4d is overwritten by the next call and must be consumed before that.
+
+    Models wrapped by utilities/wrap_model.py normalize inside the graph, for those the buffer
+    holds the raw letterboxed frame as uint8 HWC instead. The low_res variant of
+    utilities/model_variants.py takes a smaller input than MODEL_WIDTH x MODEL_HEIGHT.
+    """
+
+    def __init__(self, uint8: bool = False, width: int = MODEL_WIDTH, height: int = MODEL_HEIGHT):
+        self.uint8 = uint8
+        self.width = width
+        self.height = height
+        if uint8:
+            self.image4d = np.zeros((1, height, width, 3), dtype=np.uint8)
+        else:
+            self.image4d = np.zeros((1, 3, height, width), dtype=np.float16)
+        self.resized: Dict[Tuple[int, int], np.ndarray] = {}
+        self.padding: Optional[List[int]] = None
+
+    def get_resized(self, width: int, height: int) -> np.ndarray:
+        """ Get the uint8 HWC target of a resize to the given size. """
+        key = (width, height)
+        if key not in self.resized:
+            self.resized[key] = np.empty((height, width, 3), dtype=np.uint8)
+        return self.resized[key]
+
+
+# Normalized float16 value of every uint8 pixel value
+_NORMALIZE_LUT = (np.arange(256) / 255.0).astype(np.float16)
 
 def get_input(
     video_ref: np.ndarray, 
     keypoints: Optional[np.ndarray] = None, 
-    padding_ratio: int = 12
+    padding_ratio: int = 12,
+    buffer: Optional[InputBuffer] = None
 ) -> Tuple[int, int, Optional[np.ndarray]]:
     """
     Processes the input video frame by extracting the region of interest (ROI),
     resizing it to match the model's input dimensions, and applying necessary padding.
 
+    The crop is a view of the frame, the resize writes into a reused uint8 buffer and a lookup
+    table writes normalized CHW float16 straight into the letterboxed model input, so there is
+    a single pass over the pixels after the resize.
+
     Args:
         video_ref (np.ndarray): Input video frame represented as a NumPy array of shape (height, width, channels).
         keypoints (Optional[np.ndarray]): Array of keypoints used to determine the bounding box (ROI). Defaults to None.
         padding_ratio (int): Factor to compute padding around the detected bounding box. Defaults to 12.
+        buffer (Optional[InputBuffer]): Buffer to write the input into, see BoundSession in utilities/bound_session.py. Defaults to a new buffer.
 
     Returns:
         Tuple[np.ndarray, int, int, List[int], List[int]]:
@@ -63,6 +103,9 @@ def get_input(
             - height (int): Height of the cropped video region.
             - padding (List[int]): Padding applied as [left, right, top, bottom].
             - roi (List[int]): Coordinates of the region of interest in the format [xmin, ymin, xmax, ymax].
+
+    Raises:
+        FrameOverwrittenError: If the frame is a view into a frame ring whose slot was written again while it was resized.
     """
 
     video_height, video_width, _ = video_ref.shape
@@ -101,28 +144,47 @@ def get_input(
     # Cropping
     video_ref = video_ref[roi[1]:roi[3], roi[0]:roi[2], :]
     
-    # Resizing
+    # Resizing to the input size of the model
+    if buffer is None:
+        buffer = InputBuffer()
     height, width, _ = video_ref.shape
     ratio = height / width
-    desired_ratio = MODEL_HEIGHT / MODEL_WIDTH
-    resize_height = MODEL_HEIGHT
-    resize_width = MODEL_WIDTH
+    desired_ratio = buffer.height / buffer.width
+    resize_height = buffer.height
+    resize_width = buffer.width
     if ratio > desired_ratio:
-        resize_width = int(MODEL_HEIGHT / ratio)
+        resize_width = int(buffer.height / ratio)
     else:
-        resize_height = int(MODEL_WIDTH * ratio)
+        resize_height = int(buffer.width * ratio)
     
-    video_ref = tf.image.resize(video_ref, [resize_height, resize_width])
+    resized = buffer.get_resized(resize_width, resize_height)
+    cv2.resize(video_ref, (resize_width, resize_height), dst=resized, interpolation=cv2.INTER_LINEAR)
+
+    # The frame is not read past the resize, a view into a frame ring must still hold the frame by now
+    if isinstance(video_ref, RingFrame) and not video_ref.is_current():
+        raise FrameOverwrittenError(video_ref.sequence)
     
     # Padding
-    dx = MODEL_WIDTH - video_ref.shape[1]
-    dy = MODEL_HEIGHT - video_ref.shape[0]
+    dx = buffer.width - resize_width
+    dy = buffer.height - resize_height
     pad_right = dx // 2
     pad_left = dx - pad_right
     pad_bottom = dy // 2
     pad_top = dy - pad_bottom
     padding = [pad_left, pad_right, pad_top, pad_bottom]
 
-    image4d = preprocess_image(video_ref.numpy())
+    # The borders only need clearing when the letterbox changes, the image area is overwritten below
+    if padding != buffer.padding:
+        buffer.image4d.fill(0)
+        buffer.padding = padding
+
+    if buffer.uint8:
+        # The model normalizes by itself
+        buffer.image4d[0, pad_top:pad_top + resize_height, pad_left:pad_left + resize_width] = resized
+    else:
+        # Normalize to [0, 1] with a lookup table and convert HWC to CHW in one pass, straight into the model input
+        target = buffer.image4d[0, :, pad_top:pad_top + resize_height, pad_left:pad_left + resize_width]
+        for channel in range(3):
+            np.take(_NORMALIZE_LUT, resized[:, :, channel], out=target[channel], mode="clip")
     
-    return image4d, width, height, padding, roi
+    return buffer.image4d, width, height, padding, roi
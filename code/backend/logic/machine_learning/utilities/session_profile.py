@@ -0,0 +1,180 @@
+import os
+import cv2
+import onnxruntime as ort
+
+from typing import Optional
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL
+}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+}
+
+
+class SessionProfile:
+    """
+    Tuning options of the ONNX Runtime sessions.
+
+    The defaults of ONNX Runtime give every session as many busy-waiting intra-op threads as the
+    host has cores, which oversubscribes the CPU as soon as several boards infer at the same time.
+    """
+
+    def __init__(
+        self,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        execution_mode: str = "sequential",
+        graph_optimization: str = "all",
+        cpu_mem_arena: bool = True,
+        mem_pattern: bool = True,
+        allow_spinning: bool = False
+    ):
+        """
+        Initialize the session profile.
+
+        Args:
+            intra_op_threads (int): Threads used inside one operator, 0 lets ONNX Runtime use all cores.
+            inter_op_threads (int): Threads running independent operators, only used in parallel mode.
+            execution_mode (str): "sequential" or "parallel" execution of independent operators.
+            graph_optimization (str): "disabled", "basic", "extended" or "all".
+            cpu_mem_arena (bool): Keep freed tensors in an arena for reuse instead of returning them to the system.
+            mem_pattern (bool): Plan the memory of fixed shape inputs once and reuse the plan.
+            allow_spinning (bool): Let idle pool threads busy-wait for work, faster for a single board but
+                it takes cores away from the others.
+
+        Raises:
+            ValueError: If a thread count is negative or a mode or level is unknown.
+        """
+        if intra_op_threads < 0 or inter_op_threads < 0:
+            raise ValueError("Thread counts must not be negative.")
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Execution mode must be one of {list(EXECUTION_MODES)}.")
+        if graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(f"Graph optimization must be one of {list(GRAPH_OPTIMIZATION_LEVELS)}.")
+
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.execution_mode = execution_mode
+        self.graph_optimization = graph_optimization
+        self.cpu_mem_arena = cpu_mem_arena
+        self.mem_pattern = mem_pattern
+        self.allow_spinning = allow_spinning
+
+    def to_session_options(self) -> ort.SessionOptions:
+        """ Build the ONNX Runtime session options of this profile. """
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = EXECUTION_MODES[self.execution_mode]
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization]
+        options.enable_cpu_mem_arena = self.cpu_mem_arena
+        options.enable_mem_pattern = self.mem_pattern
+        spinning = "1" if self.allow_spinning else "0"
+        options.add_session_config_entry("session.intra_op.allow_spinning", spinning)
+        options.add_session_config_entry("session.inter_op.allow_spinning", spinning)
+        return options
+
+    def to_dict(self) -> dict:
+        """ Summarize the profile. """
+        return dict(vars(self))
+
+
+class ThreadBudget:
+    """ Division of the host's cores between model inference and OpenCV. """
+
+    def __init__(
+        self,
+        cpu_count: int,
+        board_count: int,
+        intra_op_threads: int,
+        opencv_threads: int,
+        allow_spinning: bool,
+        detection_workers: int = 1
+    ):
+        self.cpu_count = cpu_count
+        self.board_count = board_count
+        self.intra_op_threads = intra_op_threads
+        self.opencv_threads = opencv_threads
+        self.allow_spinning = allow_spinning
+        self.detection_workers = detection_workers
+
+    def get_session_profile(self, base: Optional[SessionProfile] = None) -> SessionProfile:
+        """
+        Get the session profile that keeps inference within the budget.
+
+        Args:
+            base (Optional[SessionProfile]): Profile to keep the other options of, defaults to SessionProfile().
+
+        Returns:
+            SessionProfile: The base profile with the thread count and spinning of the budget.
+        """
+        options = (base or SessionProfile()).to_dict()
+        options.update(intra_op_threads=self.intra_op_threads, allow_spinning=self.allow_spinning)
+        return SessionProfile(**options)
+
+    def to_dict(self) -> dict:
+        """ Summarize the budget. """
+        return dict(vars(self))
+
+
+def plan_thread_budget(
+    board_count: int,
+    cpu_count: Optional[int] = None,
+    opencv_fraction: float = 0.25,
+    sessions_per_model: int = 1
+) -> ThreadBudget:
+    """
+    Divide the host's cores between the shared sessions and the boards.
+
+    A part of the cores is left to OpenCV, which resizes, diffs and encodes frames for every board.
+    The boards share the sessions of the model registry, and the runs of all boards on a session use
+    its single intra-op pool. The rest of the cores is therefore divided between the sessions of a
+    model, not between the boards, while the detection executor gets a worker per board so that
+    their runs overlap. Spin-waiting is only allowed when a single board has the host to itself.
+
+    Args:
+        board_count (int): Number of boards running detectors.
+        cpu_count (Optional[int]): Number of cores to plan for. Defaults to the cores of the host.
+        opencv_fraction (float): Share of the cores given to OpenCV's thread pool.
+        sessions_per_model (int): Sessions the model registry loads per model, each with its own intra-op pool.
+
+    Returns:
+        ThreadBudget: The planned thread counts.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    board_count = max(board_count, 1)
+
+    opencv_threads = max(1, int(cpu_count * opencv_fraction))
+    inference_cores = max(1, cpu_count - opencv_threads) if cpu_count > 1 else 1
+    sessions_in_use = min(max(sessions_per_model, 1), board_count, inference_cores)
+    intra_op_threads = max(1, inference_cores // sessions_in_use)
+
+    # One detection worker per board: a board has a single stage in flight and the boards' runs must overlap to share batches
+    return ThreadBudget(
+        cpu_count, board_count, intra_op_threads, opencv_threads,
+        allow_spinning=board_count == 1, detection_workers=board_count
+    )
+
+
+def apply_thread_budget(budget: ThreadBudget) -> None:
+    """
+    Size OpenCV's thread pool, the detection executor and the sessions of the model registry to a budget.
+
+    Only the thread options of the registry's profile change, its other options are kept. Sessions
+    that are already loaded keep their options, so apply the budget before the detectors start.
+
+    Args:
+        budget (ThreadBudget): The budget to apply.
+    """
+    from logic.machine_learning.utilities.model_registry import model_registry
+    from logic.machine_learning.utilities.detection_executor import detection_executor
+
+    cv2.setNumThreads(budget.opencv_threads)
+    detection_executor.set_max_workers(budget.detection_workers)
+    model_registry.set_profile(budget.get_session_profile(model_registry.profile))
@@ -0,0 +1,107 @@
+import asyncio
+import queue
+import threading
+
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+# Passed down the stages to stop their threads
+_STOP = object()
+
+
+class StagePipeline:
+    """
+    Runs items through a chain of blocking stages, one thread per stage, with bounded queues in between.
+
+    While an item is in the second stage the next one is already in the first, so the stages of
+    consecutive items overlap instead of leaving the CPU idle in one stage while another waits.
+    ONNX Runtime, OpenCV and most NumPy calls release the GIL, which lets the stages run side by side.
+
+    Every stage handles its items one at a time in the order they came in, so results come out in
+    submission order. At most depth items are in the pipeline at once, submit waits for one to
+    leave before it lets the next in.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable[[Any], Any]]], depth: int = 3, name: str = "pipeline"):
+        """
+        Initialize the pipeline and start the stage threads.
+
+        Args:
+            stages (List[Tuple[str, Callable[[Any], Any]]]): Name and function of every stage, each function gets the result of the previous one.
+            depth (int): Maximum number of items in the pipeline.
+            name (str): Prefix of the thread names.
+
+        Raises:
+            ValueError: If there are no stages or depth is not a positive integer.
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        if not isinstance(depth, int) or depth < 1:
+            raise ValueError("Depth must be a positive integer.")
+
+        self.depth = depth
+        self.queues: List[queue.Queue] = [queue.Queue(maxsize=depth) for _ in stages]
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.threads = []
+        for index, (stage_name, func) in enumerate(stages):
+            output = self.queues[index + 1] if index + 1 < len(stages) else None
+            thread = threading.Thread(
+                target=self._run_stage, args=(func, self.queues[index], output),
+                name=f"{name}-{stage_name}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def _run_stage(self, func: Callable[[Any], Any], source: queue.Queue, output: Optional[queue.Queue]) -> None:
+        """ Pass the items of a stage through its function, the last stage resolves their futures. """
+        while True:
+            entry = source.get()
+            if entry is _STOP:
+                if output is not None:
+                    output.put(_STOP)
+                return
+
+            future, item = entry
+            # Items that failed in an earlier stage only pass through
+            if not future.done():
+                try:
+                    item = func(item)
+                except Exception as error:
+                    future.set_exception(error)
+
+            if output is not None:
+                output.put((future, item))
+            elif not future.done():
+                future.set_result(item)
+
+    async def submit(self, item: Any) -> "asyncio.Future[Any]":
+        """
+        Put an item into the pipeline, waiting while it is full.
+
+        Args:
+            item (Any): Input of the first stage.
+
+        Returns:
+            asyncio.Future[Any]: Resolves to the result of the last stage, or the error of the stage that failed.
+        """
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.depth)
+        await self.slots.acquire()
+
+        future: Future = Future()
+        result = asyncio.wrap_future(future)
+        result.add_done_callback(lambda _: self.slots.release())
+        # Never blocks, there are at most depth items in the pipeline
+        self.queues[0].put((future, item))
+        return result
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the stage threads after the items in the pipeline are done.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for every thread, None waits until they stop.
+        """
+        self.queues[0].put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout)
@@ -0,0 +1,64 @@
+import threading
+import unittest
+import numpy as np
+from types import SimpleNamespace
+from logic.machine_learning.utilities.batched_session import BatchedSession
+
+class FakeSession:
+    """ Session stand-in with a dynamic batch that doubles its input and records the batch sizes. """
+
+    def __init__(self, batch_dim="batch"):
+        self.batch_dim = batch_dim
+        self.batch_sizes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="images", shape=[self.batch_dim, 3], type="tensor(float)")]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name="output0", shape=[self.batch_dim, 3])]
+
+    def run(self, output_names, input_feed):
+        threading.Event().wait(0.01)
+        self.batch_sizes.append(len(input_feed["images"]))
+        return [input_feed["images"] * 2]
+
+class TestBatchedSession(unittest.TestCase):
+    """ Unit tests for the BatchedSession class. """
+
+    def test_fixed_batch_model(self) -> None:
+        """ Test that a model with a fixed batch size is rejected. """
+        with self.assertRaises(ValueError):
+            BatchedSession(FakeSession(batch_dim=1))
+
+    def test_concurrent_requests_are_batched(self) -> None:
+        """ Test that concurrent boards share batches and each gets its own result back. """
+        session = FakeSession()
+        batched = BatchedSession(session, max_batch=4, max_wait=0.05)
+        results = {}
+
+        def board(i: int) -> None:
+            results[i] = batched.run(None, {"images": np.full((1, 3), i, dtype=np.float32)})[0]
+
+        threads = [threading.Thread(target=board, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batched.close()
+
+        for i in range(8):
+            np.testing.assert_array_equal(results[i], np.full((1, 3), 2 * i))
+        self.assertEqual(sum(session.batch_sizes), 8)
+        self.assertLessEqual(max(session.batch_sizes), 4)
+        self.assertLess(len(session.batch_sizes), 8)
+
+    def test_run_after_close_raises(self) -> None:
+        """ Test that a request made after close fails instead of waiting for a worker that has stopped. """
+        batched = BatchedSession(FakeSession())
+        batched.close()
+        with self.assertRaises(RuntimeError):
+            batched.run(None, {"images": np.zeros((1, 3), dtype=np.float32)})
+        batched.close()
+
+if __name__ == "__main__":
+    unittest.main()
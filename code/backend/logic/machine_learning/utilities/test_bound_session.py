@@ -0,0 +1,53 @@
+import threading
+import unittest
+import numpy as np
+import onnxruntime as ort
+from onnx import helper, TensorProto
+from logic.machine_learning.utilities.bound_session import get_bound_session
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+def make_session() -> ort.InferenceSession:
+    """ Session of a model taking a frame like the detection models and returning its channel means. """
+    graph = helper.make_graph(
+        [helper.make_node("ReduceMean", ["images"], ["output0"], axes=[2, 3], keepdims=0)],
+        "channel_means",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT16, [1, 3, MODEL_HEIGHT, MODEL_WIDTH])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT16, [1, 3])]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    return ort.InferenceSession(model.SerializeToString())
+
+class TestBoundSession(unittest.TestCase):
+    """ Unit tests for the BoundSession class. """
+
+    def test_run_matches_session_and_reuses_outputs(self) -> None:
+        """ Test that a bound run gives the outputs of a plain run, in the same arrays every time. """
+        session = make_session()
+        bound_session = get_bound_session(session)
+        bound_session.input_buffer.image4d[0] = np.array([0.25, 0.5, 1.0], dtype=np.float16)[:, None, None]
+
+        outputs = bound_session.run()
+        expected = session.run(None, {"images": bound_session.input_buffer.image4d})
+        np.testing.assert_array_equal(outputs[0], expected[0])
+        self.assertIs(bound_session.run()[0], outputs[0])
+
+    def test_threads_get_their_own_buffers(self) -> None:
+        """ Test that every thread gets its own bound session of a shared session. """
+        session = make_session()
+        bound_sessions = {}
+
+        def board(i: int) -> None:
+            bound_sessions[i] = get_bound_session(session)
+
+        threads = [threading.Thread(target=board, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsNot(bound_sessions[0], bound_sessions[1])
+        self.assertIsNot(bound_sessions[0].input_buffer, bound_sessions[1].input_buffer)
+        self.assertIs(get_bound_session(session), get_bound_session(session))
+
+if __name__ == "__main__":
+    unittest.main()
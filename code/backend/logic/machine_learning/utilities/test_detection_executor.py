@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+import unittest
+from logic.machine_learning.utilities.detection_executor import DetectionExecutor
+
+class TestDetectionExecutor(unittest.TestCase):
+    """ Unit tests for the DetectionExecutor class. """
+
+    def test_invalid_max_workers(self) -> None:
+        """ Test that the number of workers must be a positive integer. """
+        with self.assertRaises(ValueError):
+            DetectionExecutor(0)
+
+    def test_loop_runs_while_stage_blocks(self) -> None:
+        """ Test that other tasks of the loop keep running while a blocking stage runs in the pool. """
+        executor = DetectionExecutor(1)
+        ticks = []
+
+        def stage() -> str:
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        async def ticker() -> None:
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        async def main() -> str:
+            result, _ = await asyncio.gather(executor.run(stage), ticker())
+            return result
+
+        thread_name = asyncio.run(main())
+        executor.shutdown()
+
+        self.assertTrue(thread_name.startswith("detection"))
+        self.assertEqual(len(ticks), 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.2)
+
+if __name__ == "__main__":
+    unittest.main()
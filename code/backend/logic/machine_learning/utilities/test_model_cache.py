@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import onnx
+from unittest import mock
+from onnx import helper, TensorProto
+from logic.machine_learning.utilities.model_cache import ModelCache
+from logic.machine_learning.utilities import model_registry
+from logic.machine_learning.utilities.model_registry import ModelRegistry
+from logic.machine_learning.utilities.session_profile import SessionProfile
+
+def write_model(path: str, scale: float) -> None:
+    """ Write a model that scales an fp16 input like the detection models take, the scale makes models with different content. """
+    graph = helper.make_graph(
+        [helper.make_node("Mul", ["images", "scale"], ["output0"])],
+        "scale",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT16, [1, 3, 4, 4])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT16, [1, 3, 4, 4])],
+        [helper.make_tensor("scale", TensorProto.FLOAT16, [1], np.array([scale], dtype=np.float16).view(np.uint16).tolist())]
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), path)
+
+class TestModelCache(unittest.TestCase):
+    """ Unit tests for the ModelCache class. """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.directory.name, "model.onnx")
+        write_model(self.model_path, 2.0)
+        self.cache = ModelCache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_second_load_comes_from_cache(self) -> None:
+        """ Test that the first load writes the optimized model and the next one loads it. """
+        profile = SessionProfile(intra_op_threads=1)
+        _, first_hit = self.cache.load(self.model_path, profile)
+        session, second_hit = self.cache.load(self.model_path, profile)
+
+        self.assertFalse(first_hit)
+        self.assertTrue(second_hit)
+        self.assertTrue(os.path.exists(self.cache.get_path(self.model_path, profile)))
+        self.assertEqual(os.listdir(self.cache.directory), [os.path.basename(self.cache.get_path(self.model_path, profile))])
+        self.assertEqual(session.get_inputs()[0].shape, [1, 3, 4, 4])
+
+    def test_key_follows_model_and_graph_options(self) -> None:
+        """ Test that a changed model or optimization level misses the cache, thread counts do not. """
+        profile = SessionProfile(intra_op_threads=1)
+        key = self.cache.get_key(self.model_path, profile)
+        self.assertEqual(key, self.cache.get_key(self.model_path, SessionProfile(intra_op_threads=4)))
+        self.assertNotEqual(key, self.cache.get_key(self.model_path, SessionProfile(graph_optimization="basic")))
+
+        self.cache.load(self.model_path, profile)
+        write_model(self.model_path, 3.0)
+        self.assertNotEqual(key, self.cache.get_key(self.model_path, profile))
+        _, hit = self.cache.load(self.model_path, profile)
+        self.assertFalse(hit)
+        # The entry of the old model is gone
+        self.assertEqual(os.listdir(self.cache.directory), [os.path.basename(self.cache.get_path(self.model_path, profile))])
+
+    def test_other_keys_of_the_model_stay(self) -> None:
+        """ Test that entries of the same model with other keys are kept and all of them go when the model changes. """
+        profiles = [SessionProfile(), SessionProfile(graph_optimization="basic")]
+        for profile in profiles:
+            self.cache.load(self.model_path, profile)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+        _, hit = self.cache.load(self.model_path, profiles[0])
+        self.assertTrue(hit)
+
+        # Another model whose name starts the same is not touched either
+        other_path = os.path.join(self.directory.name, "model.v2.onnx")
+        write_model(other_path, 4.0)
+        self.cache.load(other_path, profiles[0])
+
+        write_model(self.model_path, 3.0)
+        self.cache.load(self.model_path, profiles[0])
+        self.assertEqual(
+            sorted(os.listdir(self.cache.directory)),
+            sorted(os.path.basename(self.cache.get_path(path, profiles[0])) for path in (self.model_path, other_path))
+        )
+
+    def test_unreadable_entry_is_made_again(self) -> None:
+        """ Test that a damaged cached model is replaced instead of failing the load. """
+        profile = SessionProfile(intra_op_threads=1)
+        os.makedirs(self.cache.directory)
+        with open(self.cache.get_path(self.model_path, profile), "wb") as damaged:
+            damaged.write(b"not a model")
+
+        _, hit = self.cache.load(self.model_path, profile)
+        self.assertFalse(hit)
+        _, hit = self.cache.load(self.model_path, profile)
+        self.assertTrue(hit)
+
+    def test_registry_reports_cache_and_warm_up(self) -> None:
+        """ Test that the registry loads through the cache and reports where a model came from. """
+        self.cache.load(self.model_path, SessionProfile())
+        registry = ModelRegistry(cache=self.cache)
+        with mock.patch.object(model_registry, "warm_up", wraps=model_registry.warm_up) as warm_up:
+            session = registry.get_session(self.model_path)
+
+        warm_up.assert_called_once_with(session, registry.warm_up_runs)
+        report = registry.get_memory_report()["model.onnx"]
+        self.assertTrue(report["from_cache"])
+        self.assertGreater(report["load_ms"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
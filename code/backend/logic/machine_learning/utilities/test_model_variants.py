@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import helper, numpy_helper, TensorProto
+from logic.machine_learning.utilities.model_variants import convert_to_low_resolution
+
+def make_head(width: int, height: int, stride: int = 32) -> onnx.ModelProto:
+    """ Model with a one level detection head whose zero convolution leaves the anchor points times the strides. """
+    cells = (width // stride) * (height // stride)
+    xs, ys = np.meshgrid(np.arange(width // stride), np.arange(height // stride))
+    anchors = (np.stack([xs.ravel(), ys.ravel()]) + 0.5)[np.newaxis].astype(np.float32)
+    initializers = [
+        numpy_helper.from_array(np.zeros((2, 3, stride, stride), dtype=np.float32), "weights"),
+        numpy_helper.from_array(np.array([1, 2, cells], dtype=np.int64), "shape"),
+        numpy_helper.from_array(anchors, "anchors"),
+        numpy_helper.from_array(np.full((1, cells), stride, dtype=np.float32), "strides")
+    ]
+    graph = helper.make_graph(
+        [
+            helper.make_node("Conv", ["images", "weights"], ["features"], strides=[stride, stride], name="/model.42/Conv"),
+            helper.make_node("Reshape", ["features", "shape"], ["distances"], name="/model.42/Reshape"),
+            helper.make_node("Sub", ["anchors", "distances"], ["centers"], name="/model.42/Sub"),
+            helper.make_node("Mul", ["centers", "strides"], ["output0"], name="/model.42/Mul")
+        ],
+        "head",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, height, width])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, 2, cells])],
+        initializers
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+
+class TestLowResolution(unittest.TestCase):
+    """ Unit tests for the low_res model variant. """
+
+    def test_head_decodes_cells_of_new_size(self) -> None:
+        """ Test that the converted head has an anchor point in the middle of every cell of the smaller input. """
+        model = convert_to_low_resolution(make_head(128, 64), 64, 32)
+        session = ort.InferenceSession(model.SerializeToString())
+
+        self.assertEqual(session.get_inputs()[0].shape, [1, 3, 32, 64])
+        output = session.run(None, {"images": np.zeros((1, 3, 32, 64), dtype=np.float32)})[0]
+        np.testing.assert_array_equal(output, [[[16, 48], [16, 16]]])
+
+    def test_size_must_fit_strides(self) -> None:
+        """ Test that an input size the largest stride does not divide is refused. """
+        with self.assertRaises(ValueError):
+            convert_to_low_resolution(make_head(128, 64), 80, 32)
+
+if __name__ == "__main__":
+    unittest.main()
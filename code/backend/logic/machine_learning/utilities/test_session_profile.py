@@ -0,0 +1,89 @@
+import unittest
+import cv2
+import onnxruntime as ort
+from logic.machine_learning.utilities.detection_executor import detection_executor
+from logic.machine_learning.utilities.model_registry import model_registry
+from logic.machine_learning.utilities.session_profile import SessionProfile, ThreadBudget, apply_thread_budget, plan_thread_budget
+
+class TestSessionProfile(unittest.TestCase):
+    """ Unit tests for the SessionProfile class. """
+
+    def test_invalid_options(self) -> None:
+        """ Test that negative thread counts and unknown modes are rejected. """
+        with self.assertRaises(ValueError):
+            SessionProfile(intra_op_threads=-1)
+        with self.assertRaises(ValueError):
+            SessionProfile(execution_mode="eager")
+        with self.assertRaises(ValueError):
+            SessionProfile(graph_optimization="most")
+
+    def test_session_options(self) -> None:
+        """ Test that every option of the profile ends up in the session options. """
+        options = SessionProfile(
+            intra_op_threads=3, inter_op_threads=2, execution_mode="parallel", graph_optimization="basic",
+            cpu_mem_arena=False, mem_pattern=False, allow_spinning=True
+        ).to_session_options()
+
+        self.assertEqual((options.intra_op_num_threads, options.inter_op_num_threads), (3, 2))
+        self.assertEqual(options.execution_mode, ort.ExecutionMode.ORT_PARALLEL)
+        self.assertEqual(options.graph_optimization_level, ort.GraphOptimizationLevel.ORT_ENABLE_BASIC)
+        self.assertFalse(options.enable_cpu_mem_arena)
+        self.assertFalse(options.enable_mem_pattern)
+        self.assertEqual(options.get_session_config_entry("session.intra_op.allow_spinning"), "1")
+
+class TestThreadBudget(unittest.TestCase):
+    """ Unit tests for plan_thread_budget and the ThreadBudget class. """
+
+    def test_shared_session_gets_the_inference_cores(self) -> None:
+        """ Test that a single shared session gets every inference core and the executor a worker per board. """
+        single = plan_thread_budget(1, cpu_count=8)
+        self.assertEqual((single.opencv_threads, single.intra_op_threads, single.allow_spinning), (2, 6, True))
+
+        few = plan_thread_budget(3, cpu_count=8)
+        self.assertEqual((few.intra_op_threads, few.allow_spinning, few.detection_workers), (6, False, 3))
+
+        many = plan_thread_budget(20, cpu_count=8)
+        self.assertEqual((many.intra_op_threads, many.detection_workers), (6, 20))
+
+    def test_cores_are_shared_by_the_sessions_of_a_model(self) -> None:
+        """ Test that a pool of sessions divides the inference cores, but only the sessions the boards can use. """
+        pooled = plan_thread_budget(4, cpu_count=8, sessions_per_model=2)
+        self.assertEqual((pooled.intra_op_threads, pooled.detection_workers), (3, 4))
+
+        single = plan_thread_budget(1, cpu_count=8, sessions_per_model=2)
+        self.assertEqual(single.intra_op_threads, 6)
+
+        many = plan_thread_budget(4, cpu_count=4, sessions_per_model=8)
+        self.assertEqual(many.intra_op_threads, 1)
+
+    def test_single_core_host(self) -> None:
+        """ Test that a single core is shared rather than split below one thread. """
+        budget = plan_thread_budget(4, cpu_count=1)
+        self.assertEqual((budget.opencv_threads, budget.intra_op_threads), (1, 1))
+
+    def test_profile_keeps_the_base_options(self) -> None:
+        """ Test that the budget only changes the thread options of the profile it is applied to. """
+        base = SessionProfile(intra_op_threads=8, execution_mode="parallel", graph_optimization="extended", cpu_mem_arena=False, mem_pattern=False)
+        profile = ThreadBudget(8, 3, intra_op_threads=2, opencv_threads=2, allow_spinning=False).get_session_profile(base)
+
+        self.assertEqual(profile.to_dict(), {**base.to_dict(), "intra_op_threads": 2, "allow_spinning": False})
+        self.assertEqual(base.intra_op_threads, 8)
+
+    def test_apply_keeps_the_registry_options(self) -> None:
+        """ Test that applying a budget keeps the options configured on the model registry. """
+        profile, workers, opencv_threads = model_registry.profile, detection_executor.max_workers, cv2.getNumThreads()
+        try:
+            model_registry.set_profile(SessionProfile(graph_optimization="basic", mem_pattern=False))
+            apply_thread_budget(plan_thread_budget(2, cpu_count=4))
+
+            self.assertEqual(model_registry.profile.graph_optimization, "basic")
+            self.assertFalse(model_registry.profile.mem_pattern)
+            self.assertEqual(model_registry.profile.intra_op_threads, 3)
+            self.assertEqual(detection_executor.max_workers, 2)
+        finally:
+            model_registry.set_profile(profile)
+            detection_executor.set_max_workers(workers)
+            cv2.setNumThreads(opencv_threads)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+import unittest
+from logic.machine_learning.utilities.stage_pipeline import StagePipeline
+
+class ActiveStages:
+    """ Counts the stages that are running at the same time. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.most_active = 0
+
+    def sleeping(self, seconds: float, tag: str):
+        """ Stage that blocks for a while and records which stage saw the item. """
+        def stage(item: list) -> list:
+            with self.lock:
+                self.active += 1
+                self.most_active = max(self.most_active, self.active)
+            time.sleep(seconds)
+            with self.lock:
+                self.active -= 1
+            return item + [tag]
+        return stage
+
+class TestStagePipeline(unittest.TestCase):
+    """ Unit tests for the StagePipeline class. """
+
+    def test_invalid_depth(self) -> None:
+        """ Test that the depth must be a positive integer. """
+        with self.assertRaises(ValueError):
+            StagePipeline([("stage", lambda item: item)], depth=0)
+
+    def test_stages_overlap_and_keep_order(self) -> None:
+        """ Test that consecutive items go through the stages at the same time and come out in order. """
+        stages = ActiveStages()
+        pipeline = StagePipeline([(tag, stages.sleeping(0.05, tag)) for tag in ("a", "b", "c")], depth=3)
+
+        async def main() -> list:
+            futures = [await pipeline.submit([index]) for index in range(6)]
+            return [await future for future in futures]
+
+        results = asyncio.run(main())
+        pipeline.close(1.0)
+
+        self.assertEqual(results, [[index, "a", "b", "c"] for index in range(6)])
+        # Serially one stage would run at a time, the depth allows at most three
+        self.assertGreater(stages.most_active, 1)
+        self.assertLessEqual(stages.most_active, 3)
+        self.assertFalse(any(thread.is_alive() for thread in pipeline.threads))
+
+    def test_failed_item_does_not_stop_the_pipeline(self) -> None:
+        """ Test that the error of a stage is raised for its item only. """
+        def fail_on_one(item: int) -> int:
+            if item == 1:
+                raise RuntimeError("stage failed")
+            return item * 10
+
+        pipeline = StagePipeline([("fail", fail_on_one), ("add", lambda item: item + 1)], depth=2)
+
+        async def main() -> list:
+            futures = [await pipeline.submit(index) for index in range(3)]
+            return await asyncio.gather(*futures, return_exceptions=True)
+
+        first, second, third = asyncio.run(main())
+        pipeline.close(1.0)
+
+        self.assertEqual(first, 1)
+        self.assertIsInstance(second, RuntimeError)
+        self.assertEqual(third, 21)
+
+if __name__ == "__main__":
+    unittest.main()
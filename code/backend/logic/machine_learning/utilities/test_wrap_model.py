@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import helper, numpy_helper, TensorProto
+from logic.machine_learning.utilities.wrap_model import make_batch_dynamic, wrap_uint8_input
+
+def make_flatten(channels: int = 3, height: int = 4, width: int = 5) -> onnx.ModelProto:
+    """ Model that flattens a float16 NCHW image and adds a constant row, both reshaped with a batch of 1. """
+    size = channels * height * width
+    initializers = [
+        numpy_helper.from_array(np.array([1, size], dtype=np.int64), "flat_shape"),
+        numpy_helper.from_array(np.arange(size, dtype=np.float16), "offsets"),
+        numpy_helper.from_array(np.array([1, size], dtype=np.int64), "offsets_shape")
+    ]
+    graph = helper.make_graph(
+        [
+            helper.make_node("Reshape", ["images", "flat_shape"], ["flat"]),
+            helper.make_node("Reshape", ["offsets", "offsets_shape"], ["offsets_row"]),
+            helper.make_node("Add", ["flat", "offsets_row"], ["output0"])
+        ],
+        "flatten",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT16, [1, channels, height, width])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT16, [1, size])],
+        initializers
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+
+def run(model: onnx.ModelProto, images: np.ndarray) -> np.ndarray:
+    session = ort.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+    return session.run(None, {"images": images})[0]
+
+class TestWrapUint8Input(unittest.TestCase):
+    """ Unit tests for the wrap_uint8_input function. """
+
+    def test_normalizes_nhwc_frames_like_the_python_side(self) -> None:
+        """ Test that a uint8 NHWC frame gives the output of the frame transposed and divided by 255. """
+        model = make_flatten()
+        frame = np.random.default_rng(0).integers(0, 256, (1, 4, 5, 3), dtype=np.uint8)
+
+        wrapped = wrap_uint8_input(model)
+        session = ort.InferenceSession(wrapped.SerializeToString(), providers=["CPUExecutionProvider"])
+
+        self.assertEqual(session.get_inputs()[0].name, "images")
+        self.assertEqual(session.get_inputs()[0].type, "tensor(uint8)")
+        self.assertEqual(session.get_inputs()[0].shape, [1, 4, 5, 3])
+        expected = run(model, (frame.transpose(0, 3, 1, 2) / np.float16(255)).astype(np.float16))
+        np.testing.assert_allclose(session.run(None, {"images": frame})[0], expected, atol=0.05)
+
+    def test_refuses_wrapped_and_non_image_models(self) -> None:
+        """ Test that a model already taking uint8 or without a 4D input is refused. """
+        with self.assertRaises(ValueError):
+            wrap_uint8_input(wrap_uint8_input(make_flatten()))
+
+        model = make_flatten()
+        del model.graph.input[0].type.tensor_type.shape.dim[0]
+        with self.assertRaises(ValueError):
+            wrap_uint8_input(model)
+
+class TestMakeBatchDynamic(unittest.TestCase):
+    """ Unit tests for the make_batch_dynamic function. """
+
+    def test_runs_batches_like_single_frames(self) -> None:
+        """ Test that every frame of a batch gives the output it gives on its own. """
+        model = make_flatten()
+        images = np.random.default_rng(0).random((3, 3, 4, 5)).astype(np.float16)
+
+        dynamic = make_batch_dynamic(model)
+        output = run(dynamic, images)
+
+        self.assertEqual(output.shape, (3, 60))
+        for i in range(3):
+            np.testing.assert_array_equal(output[i:i + 1], run(model, images[i:i + 1]))
+
+    def test_keeps_reshapes_of_constants(self) -> None:
+        """ Test that only the reshape of the input copies the batch dimension. """
+        dynamic = make_batch_dynamic(make_flatten())
+        shapes = {initializer.name: numpy_helper.to_array(initializer).tolist() for initializer in dynamic.graph.initializer}
+
+        self.assertEqual(shapes["flat_shape"], [0, 60])
+        self.assertEqual(shapes["offsets_shape"], [1, 60])
+        self.assertEqual(dynamic.graph.input[0].type.tensor_type.shape.dim[0].dim_param, "batch")
+        self.assertEqual(dynamic.graph.output[0].type.tensor_type.shape.dim[0].dim_param, "batch")
+
+    def test_wraps_a_dynamic_batch_model_for_uint8_frames(self) -> None:
+        """ Test the variant the batched session loads, a dynamic batch model taking uint8 frames. """
+        frames = np.random.default_rng(0).integers(0, 256, (2, 4, 5, 3), dtype=np.uint8)
+
+        wrapped = wrap_uint8_input(make_batch_dynamic(make_flatten()))
+
+        self.assertEqual(run(wrapped, frames).shape, (2, 60))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Wrap the detection models so they take raw uint8 frames, or batches of frames.
+
+The uint8 variant gets a uint8 NHWC input with the same name as the original float16 NCHW input,
+followed by Transpose, Cast and Div nodes that do what the Python side used to do per frame.
+The dynamic batch variant accepts any number of frames per run, for utilities/batched_session.py.
+
+Run from the backend folder:
+  python -m logic.machine_learning.utilities.wrap_model resources/models/480M_leyolo_pieces.onnx resources/models/480L_leyolo_xcorners.onnx
+  python -m logic.machine_learning.utilities.wrap_model resources/models/480M_leyolo_pieces.onnx --dynamic-batch [--no-uint8]
+"""
+import argparse
+import os
+import numpy as np
+from typing import TYPE_CHECKING
+
+# onnx is only needed by the tooling, the detectors just look up model paths here
+if TYPE_CHECKING:
+    import onnx
+
+UINT8_SUFFIX = "_uint8"
+BATCH_SUFFIX = "_batch"
+
+# Operators whose output does not keep the batch as its first axis
+BATCHLESS_OPS = {"Shape", "Size"}
+
+def get_variant_path(model_path: str, uint8: bool = False, dynamic_batch: bool = False) -> str:
+    """
+    Get the path of a wrapped variant of a model.
+
+    Args:
+        model_path (str): Path of the original model, e.g. "resources/models/480M_leyolo_pieces.onnx".
+        uint8 (bool): The variant takes uint8 NHWC input.
+        dynamic_batch (bool): The variant takes any batch size.
+
+    Returns:
+        str: Path of the wrapped model, e.g. "resources/models/480M_leyolo_pieces_uint8_batch.onnx".
+    """
+    root, extension = os.path.splitext(model_path)
+    return f"{root}{UINT8_SUFFIX if uint8 else ''}{BATCH_SUFFIX if dynamic_batch else ''}{extension}"
+
+def wrap_uint8_input(model: "onnx.ModelProto") -> "onnx.ModelProto":
+    """
+    Prepend uint8 NHWC to normalized NCHW conversion to a model.
+
+    Args:
+        model (onnx.ModelProto): Model with a single float or float16 NCHW image input.
+
+    Returns:
+        onnx.ModelProto: The wrapped model. Its input keeps the original name.
+
+    Raises:
+        ValueError: If the model does not have a single 4D float input or is already wrapped.
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    graph = model.graph
+    initializers = {initializer.name for initializer in graph.initializer}
+    inputs = [graph_input for graph_input in graph.input if graph_input.name not in initializers]
+    if len(inputs) != 1:
+        raise ValueError("Model must have a single image input.")
+
+    image_input = inputs[0]
+    tensor_type = image_input.type.tensor_type
+    if tensor_type.elem_type == TensorProto.UINT8:
+        raise ValueError("Model already takes uint8 input.")
+    if tensor_type.elem_type not in (TensorProto.FLOAT, TensorProto.FLOAT16) or len(tensor_type.shape.dim) != 4:
+        raise ValueError("Model input must be a 4D float or float16 tensor.")
+
+    wrapped = onnx.ModelProto()
+    wrapped.CopyFrom(model)
+    graph = wrapped.graph
+    input_name = image_input.name
+    normalized_name = f"{input_name}_normalized"
+
+    # Nodes of the original graph now read the normalized tensor
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == input_name:
+                node.input[i] = normalized_name
+
+    batch, channels, height, width = tensor_type.shape.dim
+    new_input = helper.make_tensor_value_info(
+        input_name,
+        TensorProto.UINT8,
+        [dim.dim_param or dim.dim_value for dim in (batch, height, width, channels)]
+    )
+    scale = numpy_helper.from_array(
+        np.array(255, dtype=np.float16 if tensor_type.elem_type == TensorProto.FLOAT16 else np.float32),
+        f"{input_name}_scale"
+    )
+    prepended = [
+        helper.make_node("Transpose", [input_name], [f"{input_name}_nchw"], perm=[0, 3, 1, 2]),
+        helper.make_node("Cast", [f"{input_name}_nchw"], [f"{input_name}_float"], to=tensor_type.elem_type),
+        helper.make_node("Div", [f"{input_name}_float", scale.name], [normalized_name])
+    ]
+
+    for i, graph_input in enumerate(graph.input):
+        if graph_input.name == input_name:
+            graph.input.remove(graph_input)
+            graph.input.insert(i, new_input)
+            break
+    graph.initializer.append(scale)
+    for node in reversed(prepended):
+        graph.node.insert(0, node)
+
+    onnx.checker.check_model(wrapped)
+    return wrapped
+
+def make_batch_dynamic(model: "onnx.ModelProto") -> "onnx.ModelProto":
+    """
+    Make the batch dimension of a model dynamic.
+
+    The exported graphs reshape with a hard coded batch of 1. The shapes of reshapes whose data
+    flows from the model input are changed to copy the batch dimension of their input instead
+    (0 in ONNX Reshape), and the batch dimension of the inputs and outputs is renamed to "batch".
+    Reshapes of constants keep their shape, their batch of 1 broadcasts.
+
+    Args:
+        model (onnx.ModelProto): Model exported with a batch size of 1.
+
+    Returns:
+        onnx.ModelProto: The model with a dynamic batch dimension.
+    """
+    import onnx
+    from onnx import numpy_helper
+
+    dynamic = onnx.ModelProto()
+    dynamic.CopyFrom(model)
+    graph = dynamic.graph
+
+    initializers = {initializer.name: initializer for initializer in graph.initializer}
+    for graph_value in list(graph.input) + list(graph.output):
+        if graph_value.name not in initializers:
+            graph_value.type.tensor_type.shape.dim[0].dim_param = "batch"
+
+    # Tensors whose first axis is the batch, the nodes of an ONNX graph are sorted topologically
+    batched = {graph_input.name for graph_input in graph.input if graph_input.name not in initializers}
+    for node in graph.node:
+        if node.op_type in BATCHLESS_OPS or not any(name in batched for name in node.input):
+            continue
+        batched.update(node.output)
+        if node.op_type != "Reshape" or node.input[0] not in batched or node.input[1] not in initializers:
+            continue
+        shape = numpy_helper.to_array(initializers[node.input[1]]).copy()
+        if shape.size > 0 and shape[0] == 1:
+            shape[0] = 0
+            initializers[node.input[1]].CopyFrom(numpy_helper.from_array(shape, node.input[1]))
+
+    # Inferred shapes still carry the old batch size
+    del graph.value_info[:]
+
+    onnx.checker.check_model(dynamic)
+    return dynamic
+
+def wrap_model_file(model_path: str, uint8: bool = True, dynamic_batch: bool = False, output_path: str = None) -> str:
+    """
+    Write a wrapped variant of a model file.
+
+    Args:
+        model_path (str): Path of the original model.
+        uint8 (bool): Take uint8 NHWC input.
+        dynamic_batch (bool): Take any batch size.
+        output_path (str): Path of the wrapped model. Defaults to get_variant_path(model_path, uint8, dynamic_batch).
+
+    Returns:
+        str: Path of the wrapped model.
+    """
+    import onnx
+
+    output_path = output_path or get_variant_path(model_path, uint8, dynamic_batch)
+    model = onnx.load(model_path)
+    if dynamic_batch:
+        model = make_batch_dynamic(model)
+    if uint8:
+        model = wrap_uint8_input(model)
+    onnx.save(model, output_path)
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wrap ONNX models so they take uint8 NHWC frames or any batch size.")
+    parser.add_argument("models", nargs="+", help="Paths of the float input models")
+    parser.add_argument("--no-uint8", dest="uint8", action="store_false", help="Keep the float16 NCHW input")
+    parser.add_argument("--dynamic-batch", action="store_true", help="Make the batch dimension dynamic")
+    args = parser.parse_args()
+
+    for model_path in args.models:
+        print(f"{model_path} -> {wrap_model_file(model_path, args.uint8, args.dynamic_batch)}")
@@ -1,23 +1,22 @@
 import cv2
 import numpy as np
-import tensorflow as tf
 
 from typing import List, Tuple, Union
 from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
 
 
-def draw_boxes_with_scores(frame: np.ndarray, boxes: tf.Tensor, scores: tf.Tensor, threshold: float = 0.5) -> None:
+def draw_boxes_with_scores(frame: np.ndarray, boxes: np.ndarray, scores: np.ndarray, threshold: float = 0.5) -> None:
     """
     Draw bounding boxes on a frame for detections with a score above the threshold.
 
     Args:
         frame (np.ndarray): The image/frame to draw on.
-        boxes (np.ndarray or tf.Tensor): Bounding boxes of shape (N, 4), normalized to the model input size.
-        scores (np.ndarray or tf.Tensor): Confidence scores of shape (N, num_classes).
+        boxes (np.ndarray): Bounding boxes of shape (N, 4), normalized to the model input size.
+        scores (np.ndarray): Confidence scores of shape (N, num_classes).
         threshold (float): Minimum score to draw a box.
     """
-    boxes_np = boxes.numpy() if isinstance(boxes, tf.Tensor) else boxes
-    scores_np = scores.numpy() if isinstance(scores, tf.Tensor) else scores
+    boxes_np = np.asarray(boxes)
+    scores_np = np.asarray(scores)
 
     frame_height, frame_width = frame.shape[:2]
     scale_x = frame_width / MODEL_WIDTH
@@ -1,7 +1,10 @@
 import customtkinter as ctk
 import asyncio
+import queue
+import threading
 from logic.view.ctk_type_enum import CtkTypeEnum
 from logic.api.entity.camera import CameraDoesNotExistError
+import logic.api.config as config
 import logic.api.services.board_storage as storage
 from logic.api.services.board_service import BoardService
 from logic.api.entity.board_factory import BoardFactory
@@ -24,6 +27,8 @@ class App(ctk.CTk):
     self.boards = None
     self.board_service = None
     self.progress_window = None
+    # Board creation thread of the current attempt, Apply stays disabled until it has returned
+    self.connection_thread = None
     
     self.reset_board_command = reset_board_function
     self.reset_all_boards_command = reset_all_boards_function
@@ -143,30 +148,95 @@ class App(ctk.CTk):
     self.error_label.configure(text="")
   
   def apply_number_of_cameras(self) -> None:
-    """ Apply the number of cameras and start the connection. """
+    """ Apply the number of cameras and start connecting to them in the background. """
+    if self.connection_thread is not None:
+      # Return still reaches this while the Apply button is disabled
+      return
+    
     number = self.number_of_cameras_entry.get().strip()
     
     if number.isdigit() and int(number) > 0:
       self.clear_entry_label()
-      
-      try:
-        self.number_of_cameras = int(number)
-        board_factory = BoardFactory()
-        self.boards = board_factory.create_boards(self.number_of_cameras)
-        self.board_service = BoardService()
-        storage.boards = self.boards
-        
-      except CameraDoesNotExistError as e:
-        self.highlight_status_and_entry(f"Error: {e}", CtkTypeEnum.ERROR)
-        self.number_of_cameras = 0
-        return
-      
+      self.number_of_cameras = int(number)
       self.disable_main_buttons()
-      self.progress_window = ProgressBarTopLevel(self, self.number_of_cameras, self.on_connection_finished)
+      self.progress_window = ProgressBarTopLevel(
+        self, self.number_of_cameras, self.on_connection_finished, on_cancel_callback=self.on_connection_cancelled
+      )
+      # Each attempt has its own queue, events of an earlier attempt can not reach this one
+      events = queue.Queue()
+      self.connection_thread = threading.Thread(
+        target=self.create_boards, args=(self.number_of_cameras, self.progress_window, events), daemon=True
+      )
+      self.connection_thread.start()
+      self.poll_connection_events(events)
     else:
       self.highlight_status_and_entry("Please enter a valid number of cameras.", CtkTypeEnum.ERROR)
       self.number_of_cameras = 0
       
+  def create_boards(self, number_of_cameras:int, progress_window:ProgressBarTopLevel, events:queue.Queue) -> None:
+    """ Open the cameras concurrently, off the UI thread. Progress and results are queued for poll_connection_events,
+    Tk must not be called from this thread. The last event is always on_boards_created or on_connection_failed. """
+    try:
+      boards = BoardFactory(capture_profile=config.CAPTURE_PROFILE).create_boards(
+        number_of_cameras,
+        progress_callback=lambda done, total: events.put((progress_window.set_progress, done))
+      )
+    except CameraDoesNotExistError as e:
+      events.put((self.on_connection_failed, progress_window, str(e)))
+      return
+    except Exception as e:
+      events.put((self.on_connection_failed, progress_window, f"Could not connect the cameras ({e})"))
+      return
+    
+    events.put((self.on_boards_created, progress_window, boards))
+
+  def poll_connection_events(self, events:queue.Queue) -> None:
+    """ Apply the queued events of a board creation thread on the Tk thread, until the boards are created or failed. """
+    while True:
+      try:
+        callback, *args = events.get_nowait()
+      except queue.Empty:
+        break
+      callback(*args)
+      if callback in (self.on_boards_created, self.on_connection_failed):
+        self.connection_thread = None
+        return
+    self.after(50, lambda: self.poll_connection_events(events))
+    
+  def on_boards_created(self, progress_window:ProgressBarTopLevel, boards:dict) -> None:
+    """ Store the boards and finish the connection, or release them if the connection was cancelled. """
+    if progress_window.cancelled:
+      for board in boards.values():
+        board.camera.release()
+      self.on_cancel_finished()
+      return
+    
+    self.boards = boards
+    self.board_service = BoardService()
+    storage.boards = self.boards
+    progress_window.finish_connection()
+    
+  def on_connection_failed(self, progress_window:ProgressBarTopLevel, msg:str) -> None:
+    """ Callback when a camera could not be opened, the boards that did open are released by then. """
+    if progress_window.cancelled:
+      self.on_cancel_finished()
+      return
+    
+    progress_window.close()
+    self.highlight_status_and_entry(f"Error: {msg}", CtkTypeEnum.ERROR)
+    self.number_of_cameras = 0
+    self.enable_main_buttons()
+    
+  def on_connection_cancelled(self) -> None:
+    """ Callback when the connection is cancelled, the buttons stay disabled until the cameras being opened are released. """
+    self.highlight_entry_label("Cancelling, closing the cameras...", CtkTypeEnum.WARNING)
+    
+  def on_cancel_finished(self) -> None:
+    """ Callback when a cancelled connection has released its cameras. """
+    self.highlight_entry_label("Connection cancelled.", CtkTypeEnum.WARNING)
+    self.number_of_cameras = 0
+    self.enable_main_buttons()
+      
   def start_tournament(self) -> None:
     """ Start the tournament if cameras are connected. """
     if self.number_of_cameras > 0 and self.board_service:
@@ -2,7 +2,7 @@ import customtkinter as ctk
 
 class ProgressBarTopLevel(ctk.CTkToplevel):
   """ A progress bar window that shows the progress of connecting to cameras. """
-  def __init__(self, parent, total_cameras:int, on_finish_callback):
+  def __init__(self, parent, total_cameras:int, on_finish_callback, on_cancel_callback=None):
     super().__init__(parent)
     self.title("Connecting to Cameras...")
     self.geometry("420x130")
@@ -13,6 +13,7 @@ class ProgressBarTopLevel(ctk.CTkToplevel):
     self.total = total_cameras
     self.current = 0
     self.on_finish_callback = on_finish_callback
+    self.on_cancel_callback = on_cancel_callback or on_finish_callback
     self.cancelled = False
     
     self.center_on_parent()
@@ -31,7 +32,6 @@ class ProgressBarTopLevel(ctk.CTkToplevel):
     cancel_button.grid(row=1, column=1, sticky="e", padx=20, pady=(5, 10))
     
     self.fade_in()
-    self.update_progress()
     
   def center_on_parent(self) -> None:
     """ Center the window on the parent window. """
@@ -58,26 +58,35 @@ class ProgressBarTopLevel(ctk.CTkToplevel):
     else:
       self.attributes("-alpha", 1.0)
       
-  def update_progress(self) -> None:
-    """ Update the progress bar. """
+  def set_progress(self, current:int) -> None:
+    """ Show the number of cameras opened so far. A failed camera counts too, the owner finishes or closes the window. """
     if self.cancelled:
       return None
     
-    if self.current <= self.total:
-      progress = self.current / self.total
-      self.progressbar.set(progress)
-      self.current += 1
-      self.after(300, self.update_progress)
-    else:
-      self.after(700, self.finish_connection)
+    self.current = current
+    self.progressbar.set(self.current / self.total)
       
   def cancel_connection(self) -> None:
     """ Cancel the connection. """
+    if self.cancelled:
+      return None
+    
     self.cancelled = True
     self.destroy()
-    self.on_finish_callback()
+    self.on_cancel_callback()
     
   def finish_connection(self) -> None:
-    """ Finish the connection. """
+    """ Finish the connection once the boards are created. """
+    if self.cancelled:
+      return None
+    
     self.destroy()
-    self.on_finish_callback()
\ No newline at end of file
+    self.on_finish_callback()
+    
+  def close(self) -> None:
+    """ Close the window without finishing the connection, e.g. when a camera failed. """
+    if self.cancelled:
+      return None
+    
+    self.cancelled = True
+    self.destroy()
\ No newline at end of file